@@ -1,15 +1,30 @@
 from __future__ import annotations
 
 from functools import lru_cache
+from pathlib import Path
+from typing import Optional
 
 from .config import Settings
+from .services.batch_store import BatchStore
+from .services.cassette import CassetteSettings, configure_cassette
+from .services.circuit_breaker import BreakerPolicy, get_circuit_breakers
+from .services.gateway_pool import PoolPolicy, get_gateway_pools, member_specs
+from .services.generation_scheduler import SchedulerPolicy, get_generation_scheduler
+from .services.hedging import HedgePolicy, get_image_hedger
+from .services.http_pool import PoolLimits, get_http_pool
 from .services.image_generator import ImageGenerator
+from .services.model_router import ModelRoutingPolicy, get_model_router
 from .services.llm_client import OpenRouterClient
 from .services.outline_generator import OutlineGenerator
 from .services.prompt_builder import PromptBuilder
+from .services.rate_limiter import RateLimitPolicy, get_rate_limiter
+from .services.response_cache import ResponseCache
+from .services.retry_budget import RetryPolicy, get_retry_budget
+from .services.strategy_memory import get_strategy_memory
 from .services.pptx_exporter import PPTXExporter
 from .services.style_analyzer import StyleAnalyzer
 from .services.template_store import TemplateStore
+from .services.warmup import get_gateway_warmup
 from .services.config_manager import get_app_config
 
 
@@ -33,14 +48,118 @@ def get_template_store() -> TemplateStore:
     return TemplateStore(config.template_store_path)
 
 
+def configure_gateway_services() -> None:
+    """按当前配置调整全局共享的HTTP连接池（含录制/回放）、速率限制器、熔断器、重试预算、图像生成调度器、请求对冲器、图像策略记忆、网关池与分阶段模型路由"""
+    config = get_app_config()
+    cassette = configure_cassette(
+        CassetteSettings(
+            mode=config.cassette_mode,
+            path=Path(config.cassette_path),
+            replay_speed=config.cassette_replay_speed,
+        )
+    )
+    get_http_pool().configure(
+        PoolLimits(
+            max_connections=config.http_max_connections,
+            max_keepalive_connections=config.http_max_keepalive_connections,
+            keepalive_expiry=config.http_keepalive_expiry_seconds,
+            http2=config.http2_enabled,
+        ),
+        transport_wrapper=cassette.wrap if cassette else None,
+    )
+    get_rate_limiter().configure(
+        RateLimitPolicy(
+            requests_per_minute=config.rate_limit_rpm,
+            max_concurrency=config.rate_limit_max_concurrency,
+            min_concurrency=min(config.rate_limit_min_concurrency, config.rate_limit_max_concurrency),
+        )
+    )
+    get_circuit_breakers().configure(
+        BreakerPolicy(
+            failure_threshold=config.breaker_failure_threshold,
+            reset_timeout_seconds=config.breaker_reset_seconds,
+        )
+    )
+    get_retry_budget().configure(
+        RetryPolicy(
+            max_attempts=config.retry_max_attempts,
+            backoff_base_seconds=config.retry_backoff_base_seconds,
+            backoff_max_seconds=config.retry_backoff_max_seconds,
+            backoff_jitter=config.retry_backoff_jitter,
+            budget_ratio=config.retry_budget_ratio,
+            budget_min_retries=config.retry_budget_min_retries,
+            budget_window_seconds=config.retry_budget_window_seconds,
+        )
+    )
+    get_generation_scheduler().configure(SchedulerPolicy(max_concurrency=config.image_max_concurrency))
+    get_image_hedger().configure(
+        HedgePolicy(
+            enabled=config.image_hedge_enabled,
+            percentile=config.image_hedge_percentile,
+            min_delay_seconds=config.image_hedge_min_delay_seconds,
+            budget_per_minute=config.image_hedge_budget_per_minute,
+        )
+    )
+    get_strategy_memory().configure(
+        Path(config.image_strategy_memory_path),
+        reprobe_interval=config.image_strategy_reprobe_interval,
+    )
+    pool_policy = PoolPolicy(
+        drain_seconds=config.gateway_pool_drain_seconds,
+        failure_threshold=config.gateway_pool_failure_threshold,
+    )
+    gateway_pools = get_gateway_pools()
+    gateway_pools.configure("chat", member_specs(config.llm_chat_pool, config.llm_api_base), pool_policy)
+    gateway_pools.configure("image", member_specs(config.llm_image_pool, config.resolved_image_api_base()), pool_policy)
+    get_model_router().configure(
+        ModelRoutingPolicy(
+            default_model=config.llm_chat_model,
+            stage_models={
+                "outline": config.llm_outline_model.strip(),
+                "insert_slide": config.llm_insert_slide_model.strip(),
+                "style_analysis": config.llm_style_analysis_model.strip(),
+                "connection_test": config.llm_connection_test_model.strip(),
+            },
+            fast_model=config.llm_fast_model.strip(),
+            downgrade_stages=tuple(config.llm_downgrade_stages),
+            small_input_chars=config.llm_downgrade_max_input_chars,
+            p95_threshold_seconds=config.llm_downgrade_p95_seconds,
+        )
+    )
+
+
+@lru_cache
+def get_response_cache() -> Optional[ResponseCache]:
+    """文本生成响应缓存实例，未启用时返回None"""
+    config = get_app_config()
+    if not config.llm_cache_enabled:
+        return None
+    return ResponseCache(
+        Path(config.llm_cache_path),
+        ttl_seconds=config.llm_cache_ttl_seconds,
+        max_entries=config.llm_cache_max_entries,
+        max_bytes=config.llm_cache_max_mb * 1024 * 1024,
+        max_temperature=config.llm_cache_max_temperature,
+    )
+
+
+@lru_cache
+def get_batch_store() -> BatchStore:
+    """批量生成任务存储实例（进程内唯一，配置更新后不重建，避免丢失进行中的任务）"""
+    return BatchStore(Path(get_app_config().batch_store_path))
+
+
 @lru_cache
 def get_llm_client() -> OpenRouterClient:
     """文本LLM客户端实例"""
     config = get_app_config()
+    configure_gateway_services()
     return OpenRouterClient(
         api_key=config.llm_api_key,
         base_url=config.llm_api_base,
         timeout_seconds=config.llm_timeout_seconds,
+        response_cache=get_response_cache(),
+        gateway_pool=get_gateway_pools().get("chat"),
     )
 
 
@@ -48,10 +167,12 @@ def get_llm_client() -> OpenRouterClient:
 def get_image_llm_client() -> OpenRouterClient:
     """图像LLM客户端实例"""
     config = get_app_config()
+    configure_gateway_services()
     return OpenRouterClient(
         api_key=config.resolved_image_api_key(),
         base_url=config.resolved_image_api_base(),
         timeout_seconds=config.llm_timeout_seconds,
+        gateway_pool=get_gateway_pools().get("image"),
     )
 
 
@@ -64,14 +185,14 @@ def get_prompt_builder() -> PromptBuilder:
 def get_style_analyzer() -> StyleAnalyzer:
     """风格分析器实例"""
     config = get_app_config()
-    return StyleAnalyzer(get_llm_client(), config.llm_chat_model)
+    return StyleAnalyzer(get_llm_client(), config.llm_chat_model, model_router=get_model_router())
 
 
 @lru_cache
 def get_outline_generator() -> OutlineGenerator:
     """大纲生成器实例"""
     config = get_app_config()
-    return OutlineGenerator(get_llm_client(), config.llm_chat_model)
+    return OutlineGenerator(get_llm_client(), config.llm_chat_model, model_router=get_model_router())
 
 
 @lru_cache
@@ -82,6 +203,7 @@ def get_image_generator() -> ImageGenerator:
         output_dir=config.image_output_dir,
         llm_client=get_image_llm_client(),
         image_model=config.llm_image_model,
+        deadline_seconds=config.image_deadline_seconds,
     )
 
 
@@ -92,8 +214,43 @@ def get_pptx_exporter() -> PPTXExporter:
     return PPTXExporter(config.pptx_output_dir, config.image_output_dir)
 
 
+def schedule_gateway_warmup(reason: str) -> None:
+    """构建客户端与生成器实例，并在后台预热文本/图像网关连接（启动及配置更新后调用）"""
+    config = get_app_config()
+    warmup = get_gateway_warmup()
+
+    # 提前构建依赖实例，首个请求无需再付出构造开销
+    chat_client = get_llm_client()
+    image_client = get_image_llm_client()
+    get_outline_generator()
+    get_style_analyzer()
+    get_image_generator()
+
+    if config.warmup_connections == 0:
+        warmup.skip("warm-up disabled")
+        return
+    if config.cassette_mode == "replay":
+        warmup.skip("cassette replay")
+        return
+    if not (config.llm_api_key.strip() or config.llm_chat_pool):
+        warmup.skip("API key not configured")
+        return
+
+    connections = config.warmup_connections
+    steps = [("chat", lambda: chat_client.warm_up(connections))]
+    same_gateway = (
+        chat_client.gateway_pool is None
+        and image_client.gateway_pool is None
+        and (image_client.base_url, image_client.api_key) == (chat_client.base_url, chat_client.api_key)
+    )
+    if not same_gateway:
+        steps.append(("image", lambda: image_client.warm_up(connections)))
+    warmup.schedule(steps, reason)
+
+
 def clear_dependency_caches() -> None:
     """配置更新后清理依赖缓存，确保新的网关配置立即生效。"""
+    get_response_cache.cache_clear()
     get_llm_client.cache_clear()
     get_image_llm_client.cache_clear()
     get_style_analyzer.cache_clear()
@@ -103,14 +260,18 @@ def clear_dependency_caches() -> None:
 
 
 __all__ = [
+    "configure_gateway_services",
+    "get_batch_store",
     "get_image_generator",
     "get_image_llm_client",
     "get_llm_client",
     "get_outline_generator",
     "get_prompt_builder",
+    "get_response_cache",
     "get_pptx_exporter",
     "get_settings",
     "get_style_analyzer",
     "get_template_store",
     "clear_dependency_caches",
+    "schedule_gateway_warmup",
 ]
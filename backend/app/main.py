@@ -1,21 +1,54 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 
-from .dependencies import get_settings
-from .routers import export, outline, project, slide, template, config
-from .services.config_manager import get_app_config
+from .dependencies import (
+    configure_gateway_services,
+    get_image_generator,
+    get_prompt_builder,
+    get_settings,
+    schedule_gateway_warmup,
+)
+from .routers import admin, export, outline, project, slide, template, config
+from .services.config_manager import get_app_config, get_config_manager
+from .services.http_pool import get_http_pool
+from .services.strategy_memory import get_strategy_memory
+from .services.warmup import get_gateway_warmup
 
 # 获取配置（使用动态配置管理器）
 app_config = get_app_config()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 启动时按配置初始化共享HTTP连接池、限流器与熔断器并在后台预热网关连接，关闭时释放所有长连接并保存策略记忆
+    configure_gateway_services()
+    schedule_gateway_warmup("startup")
+    # 恢复重启前未完成的批量生成任务（未配置API密钥时只载入状态，不继续生成）
+    settings = get_settings()
+    batch_generator = slide.get_batch_generator(get_image_generator(), get_prompt_builder(), settings)
+    await batch_generator.resume(generate=get_config_manager().is_configured())
+    # 定期清理超过保留时间的已结束批量任务
+    cleanup_task = asyncio.create_task(batch_generator.run_cleanup(max_age_hours=settings.batch_cleanup_hours))
+    yield
+    cleanup_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await cleanup_task
+    await get_http_pool().aclose()
+    get_strategy_memory().flush()
+
+
 # 创建应用
-app = FastAPI(title=app_config.project_name)
+app = FastAPI(title=app_config.project_name, lifespan=lifespan)
 
 # CORS中间件 - 使用动态配置
 app.add_middleware(
@@ -40,6 +73,7 @@ app.include_router(outline.router, prefix=app_config.api_prefix)
 app.include_router(slide.router, prefix=app_config.api_prefix)
 app.include_router(project.router, prefix=app_config.api_prefix)
 app.include_router(export.router, prefix=app_config.api_prefix)
+app.include_router(admin.router, prefix=app_config.api_prefix)
 
 # 异常处理器 - 详细记录422错误
 @app.exception_handler(ValidationError)
@@ -70,4 +104,14 @@ async def root() -> dict[str, str]:
     }
 
 
+@app.get("/ready")
+async def ready() -> JSONResponse:
+    """就绪检查：网关预热完成后返回200（含各网关的建连耗时），预热进行中返回503"""
+    snapshot = get_gateway_warmup().snapshot()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if snapshot["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=snapshot,
+    )
+
+
 __all__ = ["app"]
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+
+from ..dependencies import get_response_cache
+from ..services.cassette import get_cassette
+from ..services.circuit_breaker import get_circuit_breakers
+from ..services.endpoint_resolver import get_endpoint_resolver
+from ..services.gateway_pool import get_gateway_pools
+from ..services.generation_scheduler import get_generation_scheduler
+from ..services.hedging import get_image_hedger
+from ..services.http_pool import get_http_pool
+from ..services.model_router import get_model_router
+from ..services.rate_limiter import get_rate_limiter
+from ..services.retry_budget import get_retry_budget
+from ..services.single_flight import get_single_flight
+from ..services.strategy_memory import get_strategy_memory
+from ..services.usage_tracker import get_usage_tracker
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/http-pool")
+async def get_http_pool_stats():
+    """
+    获取共享HTTP连接池统计信息，用于在负载下调整连接池大小
+
+    Returns:
+        dict: 连接池配置与每个网关客户端的连接/请求统计
+    """
+    return get_http_pool().stats()
+
+
+@router.get("/endpoints")
+async def get_endpoint_resolution():
+    """
+    获取已学习的网关端点解析结果
+
+    Returns:
+        dict: 每个 (base_url, path) 的首选端点与已知不可用端点
+    """
+    return {"endpoints": get_endpoint_resolver().snapshot()}
+
+
+@router.get("/rate-limits")
+async def get_rate_limit_stats():
+    """
+    获取按 (网关地址, 模型) 共享的速率限制器状态
+
+    Returns:
+        dict: 当前策略以及每个限流器的并发窗口、排队数与429统计
+    """
+    return get_rate_limiter().snapshot()
+
+
+@router.get("/circuit-breakers")
+async def get_circuit_breaker_states():
+    """
+    获取图像生成各网关/策略的熔断器状态
+
+    Returns:
+        dict: 熔断策略以及每个熔断器的状态（closed/open/half_open）和计数
+    """
+    return get_circuit_breakers().snapshot()
+
+
+@router.post("/circuit-breakers/reset")
+async def reset_circuit_breakers(base_url: Optional[str] = None):
+    """
+    手动关闭熔断器（网关恢复后无需等待半开试探）
+
+    Args:
+        base_url: 只重置该网关的熔断器，留空则全部重置
+    """
+    return {"reset": get_circuit_breakers().reset(base_url)}
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """
+    获取文本生成响应缓存的命中统计
+
+    Returns:
+        dict: 缓存条目数、体积以及命中/未命中/绕过次数
+    """
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return cache.snapshot()
+
+
+@router.post("/cache/clear")
+async def clear_cache():
+    """清空文本生成响应缓存"""
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False, "removed": 0}
+    return {"enabled": True, "removed": cache.clear()}
+
+
+@router.get("/gateway-pools")
+async def get_gateway_pool_stats():
+    """
+    获取多密钥/多网关池的路由与利用率统计
+
+    Returns:
+        dict: 每个网关池（chat/image）的容量、排队情况，以及各成员的并发、利用率、暂停状态与失败次数
+    """
+    return {"pools": get_gateway_pools().snapshot()}
+
+
+@router.get("/retry-budget")
+async def get_retry_budget_stats():
+    """
+    获取进程级重试预算的统计信息
+
+    Returns:
+        dict: 重试/退避策略、当前窗口内的成功与重试次数、剩余额度以及预算耗尽（拒绝重试）次数
+    """
+    return get_retry_budget().snapshot()
+
+
+@router.get("/scheduler")
+async def get_scheduler_stats():
+    """
+    获取全局图像生成调度器的统计信息
+
+    Returns:
+        dict: 全局并发上限、各优先级通道（单张生成/批量）的队列深度、排队等待时间分位数，以及各批量任务占用与排队的生成数
+    """
+    return get_generation_scheduler().snapshot()
+
+
+@router.get("/coalescing")
+async def get_coalescing_stats():
+    """
+    获取相同请求合并（single-flight）的统计信息
+
+    Returns:
+        dict: 当前进行中的请求数，以及文本/图像请求的合并与未合并次数
+    """
+    return get_single_flight().snapshot()
+
+
+@router.get("/hedging")
+async def get_hedging_stats():
+    """
+    获取图像生成请求对冲的统计信息
+
+    Returns:
+        dict: 对冲策略、剩余预算、各模型近期延迟分位数以及对冲触发/胜出次数
+    """
+    return get_image_hedger().snapshot()
+
+
+@router.get("/model-routing")
+async def get_model_routing():
+    """
+    获取分阶段模型路由状态
+
+    Returns:
+        dict: 路由策略、各阶段的主模型、按原因统计的路由决策以及各模型近期耗时分位数
+    """
+    return get_model_router().snapshot()
+
+
+@router.get("/image-strategies")
+async def get_image_strategies():
+    """
+    获取每个 (网关地址, 模型) 已学习的图像生成策略
+
+    Returns:
+        dict: 首选策略、首选命中率、重新试探次数以及各策略的成功统计
+    """
+    return {"strategies": get_strategy_memory().snapshot()}
+
+
+@router.post("/image-strategies/reset")
+async def reset_image_strategies():
+    """清除已学习的图像生成策略，下次生成按默认顺序重新试探"""
+    get_strategy_memory().reset()
+    return {"reset": True}
+
+
+@router.get("/cassette")
+async def get_cassette_stats():
+    """
+    获取网关请求录制/回放状态
+
+    Returns:
+        dict: 当前模式、录制文件路径以及已录制/已回放/未命中次数
+    """
+    cassette = get_cassette()
+    if cassette is None:
+        return {"mode": "off"}
+    return cassette.snapshot()
+
+
+@router.get("/usage")
+async def get_usage_stats(session_id: Optional[str] = None):
+    """
+    获取 Token 用量统计（按会话、模型与阶段汇总）
+
+    Args:
+        session_id: 只查看某个会话（PipelineLogger 的 session_id）的用量
+
+    Returns:
+        dict: 累计用量、5分钟/1小时/24小时滚动窗口以及最近会话的用量
+    """
+    tracker = get_usage_tracker()
+    if session_id is None:
+        return tracker.snapshot()
+    session = tracker.session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"未找到会话 {session_id} 的用量记录")
+    return session
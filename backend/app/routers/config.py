@@ -1,24 +1,45 @@
 from __future__ import annotations
 
 import time
-from typing import Dict
+from typing import Dict, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from ..dependencies import clear_dependency_caches, get_llm_client
+from ..dependencies import (
+    clear_dependency_caches,
+    get_image_generator,
+    get_llm_client,
+    get_prompt_builder,
+    get_settings,
+    schedule_gateway_warmup,
+)
 from ..schemas.config import (
     AppConfig,
     ConfigUpdateRequest,
     ConnectionTestRequest,
-    ConnectionTestResponse
+    ConnectionTestResponse,
+    GatewayProbeResult
 )
 from ..services.config_manager import get_config_manager
 from ..services.llm_client import LLMClientError
+from ..services.model_router import get_model_router, message_chars
 from ..utils.logger import get_logger
+from .slide import get_batch_generator
 
 router = APIRouter(prefix="/config", tags=["config"])
 
 
+def _refresh_batch_generator() -> None:
+    """
+    批量生成器是进程内单例：配置变更后换用按新配置构建的图像生成器，
+    并继续启动时因未配置API密钥而暂缓的批量任务
+    """
+    batch_generator = get_batch_generator(get_image_generator(), get_prompt_builder(), get_settings())
+    batch_generator.image_generator = get_image_generator()
+    if get_config_manager().is_configured():
+        batch_generator.resume_deferred()
+
+
 @router.get("/", response_model=AppConfig)
 async def get_config():
     """
@@ -74,7 +95,9 @@ async def update_config(request: ConfigUpdateRequest):
         # 更新配置
         if config_manager.update_config(updates):
             clear_dependency_caches()
+            schedule_gateway_warmup("config update")
             new_config = config_manager.get_config(force_reload=True)
+            _refresh_batch_generator()
             
             # 记录配置更新
             logger.log_request(
@@ -114,6 +137,8 @@ async def reset_config():
         
         if config_manager.reset_to_default():
             clear_dependency_caches()
+            schedule_gateway_warmup("config reset")
+            _refresh_batch_generator()
             new_config = config_manager.get_config(force_reload=True)
             logger.logger.info("配置已重置为默认值")
             return new_config
@@ -128,6 +153,39 @@ async def reset_config():
         raise HTTPException(status_code=500, detail=f"重置配置失败: {str(e)}")
 
 
+async def _probe_gateways(
+    request: ConnectionTestRequest,
+    test_client,
+    test_model: str,
+) -> tuple[Optional[GatewayProbeResult], Optional[GatewayProbeResult]]:
+    """
+    并发探测对话与图像接口，分解 DNS、连接、TLS、首字节与总耗时
+
+    探测失败只记录日志，不影响连接测试结果。
+    """
+    logger = get_logger()
+    chat_result = image_result = None
+    try:
+        chat_result = GatewayProbeResult(**await test_client.probe_latency("chat", test_model, request.probes))
+    except Exception as e:
+        logger.logger.warning(f"对话接口延迟探测失败: {e}")
+
+    if request.image_probes:
+        image_client = test_client.__class__(
+            api_key=request.image_api_key or request.api_key,
+            base_url=request.image_api_base or request.api_base,
+            timeout_seconds=test_client.timeout,
+        )
+        image_model = request.image_model or get_config_manager().get_config().llm_image_model
+        try:
+            image_result = GatewayProbeResult(
+                **await image_client.probe_latency("image", image_model, request.image_probes)
+            )
+        except Exception as e:
+            logger.logger.warning(f"图像接口延迟探测失败: {e}")
+    return chat_result, image_result
+
+
 @router.post("/test", response_model=ConnectionTestResponse)
 async def test_connection(
     request: ConnectionTestRequest,
@@ -144,6 +202,7 @@ async def test_connection(
         ConnectionTestResponse: 连接测试结果
     """
     logger = get_logger()
+    test_model = request.model
     
     try:
         logger.logger.info(f"开始测试AI服务连接: {request.api_base}")
@@ -157,34 +216,48 @@ async def test_connection(
             timeout_seconds=request.timeout_seconds or getattr(llm_client, "timeout", 120),
         )
         
-        # 发送测试请求
+        # 发送测试请求（未指定模型时按连接测试阶段路由）
         test_messages = [
             {"role": "user", "content": "Hello, this is a connection test. Please respond with 'Connection successful'."}
         ]
+        if not test_model:
+            test_model = get_model_router().route("connection_test", message_chars(test_messages)).model
         test_response = await test_client.chat(
             messages=test_messages,
-            model=request.model
+            model=test_model,
+            bypass_cache=True
         )
         
         response_time = time.time() - start_time
+
+        # 延迟分解探测（新建连接，单独计时）
+        chat_probe, image_probe = await _probe_gateways(request, test_client, test_model)
         
         # 检查响应
         if test_response and len(test_response.strip()) > 0:
             logger.logger.info(f"AI服务连接测试成功，响应时间: {response_time:.2f}秒")
+            message = f"连接成功，响应时间: {response_time:.2f}秒"
+            ttfb = chat_probe.phases["ttfb"].p50 if chat_probe else None
+            if ttfb is not None:
+                message += f"，首字节中位数: {ttfb:.2f}秒"
             
             return ConnectionTestResponse(
                 success=True,
-                message=f"连接成功，响应时间: {response_time:.2f}秒",
-                model=request.model,
-                response_time=response_time
+                message=message,
+                model=test_model,
+                response_time=response_time,
+                chat=chat_probe,
+                image=image_probe
             )
         else:
             logger.logger.error("AI服务连接测试失败：响应为空")
             return ConnectionTestResponse(
                 success=False,
                 message="连接失败：响应为空",
-                model=request.model,
-                response_time=response_time
+                model=test_model,
+                response_time=response_time,
+                chat=chat_probe,
+                image=image_probe
             )
             
     except LLMClientError as e:
@@ -192,14 +265,14 @@ async def test_connection(
         return ConnectionTestResponse(
             success=False,
             message=f"连接失败: {str(e)}",
-            model=request.model
+            model=test_model
         )
     except Exception as e:
         logger.logger.error(f"AI服务连接测试失败 (未知错误): {e}")
         return ConnectionTestResponse(
             success=False,
             message=f"连接测试失败: {str(e)}",
-            model=request.model
+            model=test_model
         )
 
 
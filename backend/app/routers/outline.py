@@ -208,13 +208,18 @@ async def generate_outline_stream(
             yield f"data: {json.dumps({'type': 'progress', 'message': '正在调用AI生成大纲...'}, ensure_ascii=False)}\n\n"
             
             try:
-                response_text = await generator.llm_client.chat(
-                    prompt, 
-                    model=generator.chat_model, 
+                # 实时转发模型生成的token
+                response_parts = []
+                async for delta in generator.chat_stream(
+                    prompt,
+                    routing_stage="outline",
                     temperature=0.3,
                     session_id=session_id,
                     stage="outline_generation_stream"
-                )
+                ):
+                    response_parts.append(delta)
+                    yield f"data: {json.dumps({'type': 'token', 'content': delta}, ensure_ascii=False)}\n\n"
+                response_text = "".join(response_parts)
                 
                 # 解析JSON响应
                 yield f"data: {json.dumps({'type': 'progress', 'message': '正在解析AI响应...'}, ensure_ascii=False)}\n\n"
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-from typing import List
+import json
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
-from ..dependencies import get_image_generator, get_prompt_builder, get_settings
+from ..dependencies import get_batch_store, get_image_generator, get_prompt_builder, get_settings
 from ..schemas.generation import (
     SlideGenerateRequest,
     SlideGenerateResponse,
@@ -86,7 +88,8 @@ async def _create_image_response(
             final_prompt, 
             payload.aspect_ratio,
             payload.page_num,
-            session_id
+            session_id,
+            deadline_seconds=payload.deadline_seconds
         )
         
         # 记录最终响应
@@ -176,25 +179,46 @@ def get_batch_generator(
         _batch_generator = BatchImageGenerator(
             image_generator, 
             prompt_builder,
-            max_concurrent_batches=settings.batch_max_concurrent
+            max_concurrent_batches=settings.batch_max_concurrent,
+            store=get_batch_store()
         )
     return _batch_generator
 
 
-@router.post("/batch/generate", response_model=BatchGenerateResponse)
+def _batch_generate_response(batch_task) -> BatchGenerateResponse:
+    return BatchGenerateResponse(
+        batch_id=batch_task.batch_id,
+        status=batch_task.status,
+        total_slides=batch_task.total_slides,
+        completed_slides=batch_task.completed_count,
+        successful=batch_task.success_count,
+        failed=batch_task.failed_count,
+        total_time=batch_task.total_time,
+        results=batch_task.results.copy()
+    )
+
+
+@router.post("/batch/generate", response_model=BatchGenerateResponse, status_code=202)
 async def batch_generate_slides(
     payload: BatchGenerateRequest,
+    response: Response,
+    wait: float = Query(default=0, ge=0, le=300),
     batch_generator=Depends(get_batch_generator),
     settings=Depends(get_settings),
 ):
     """
-    批量生成幻灯片图片
+    提交批量生成任务
+    
+    任务在后台执行，默认立即返回 202 及 batch_id；进度可通过
+    /slide/batch/{batch_id}/events 订阅或 /slide/batch/status 查询。
+    指定 wait 时最多等待该秒数，任务在此之前结束则返回 200 及全部结果。
     
     Args:
         payload: 批量生成请求，包含幻灯片列表和配置参数
+        wait: 等待任务结束的最长秒数（长轮询），0 表示不等待
         
     Returns:
-        BatchGenerateResponse: 批量生成结果，包含所有幻灯片的生成状态
+        BatchGenerateResponse: 任务状态及已完成的结果
     """
     logger = get_logger()
     requested_workers = payload.max_workers or len(payload.slides)
@@ -205,6 +229,8 @@ async def batch_generate_slides(
             status_code=400,
             detail=f"max_workers exceeds maximum allowed: {settings.batch_max_workers}"
         )
+    if payload.batch_id is not None and payload.batch_id in batch_generator.active_batches:
+        raise HTTPException(status_code=409, detail="Batch already exists")
     
     # 开始会话记录
     session_id = logger.start_session(
@@ -225,6 +251,7 @@ async def batch_generate_slides(
                 "max_workers": requested_workers,
                 "aspect_ratio": payload.aspect_ratio,
                 "style_prompt": payload.style_prompt[:500],  # 只记录前500字符
+                "wait": wait,
                 "slides": [
                     {
                         "id": str(slide.id),
@@ -238,87 +265,54 @@ async def batch_generate_slides(
             }
         )
         
-        # 创建批量生成任务
-        batch_id = batch_generator.create_batch(
+        # 创建批量生成任务（后台执行，完成情况记录在任务自身的会话中）
+        batch_id = await batch_generator.create_batch(
             slides=payload.slides,
             style_prompt=payload.style_prompt,
             max_workers=requested_workers,
-            aspect_ratio=payload.aspect_ratio
+            aspect_ratio=payload.aspect_ratio,
+            deadline_seconds=payload.deadline_seconds,
+            weight=payload.weight,
+            batch_id=payload.batch_id
         )
+        batch_task = batch_generator.active_batches[batch_id]
         
-        # 等待批量任务完成（实际应用中可能需要异步处理）
-        import asyncio
-        max_wait_time = 300  # 最大等待时间5分钟
-        wait_interval = 2    # 检查间隔2秒
-        elapsed_time = 0
-        
-        while elapsed_time < max_wait_time:
-            status = batch_generator.get_batch_status(batch_id)
-            if status and status.status in ["completed", "completed_with_errors", "failed"]:
-                break
-            await asyncio.sleep(wait_interval)
-            elapsed_time += wait_interval
-        
-        # 获取最终结果
-        final_status = batch_generator.get_batch_status(batch_id)
-        if not final_status:
-            raise HTTPException(status_code=500, detail="Batch generation failed to start")
-        
-        total_time = elapsed_time
+        # 长轮询：由任务结束事件唤醒，而不是定时查询
+        if wait > 0:
+            await batch_generator.wait_until_done(batch_task, wait)
         
-        # 构建响应
-        response = BatchGenerateResponse(
-            batch_id=batch_id,
-            total_slides=len(payload.slides),
-            successful=final_status.successful,
-            failed=final_status.failed,
-            total_time=total_time,
-            results=final_status.results
-        )
+        result = _batch_generate_response(batch_task)
+        if result.status != "running":
+            response.status_code = 200
         
-        # 记录最终响应
         logger.log_response(
             session_id=session_id,
-            stage="batch_generate_complete",
+            stage="batch_generate_submitted",
             data={
                 "batch_id": str(batch_id),
-                "status": final_status.status,
-                "total_slides": len(payload.slides),
-                "successful": final_status.successful,
-                "failed": final_status.failed,
-                "total_time": total_time,
-                "success_rate": response.success_rate,
-                "results": [
-                    {
-                        "slide_id": str(result.slide_id),
-                        "page_num": result.page_num,
-                        "title": result.title,
-                        "status": result.status.value,
-                        "image_url": result.image_url,
-                        "error_message": result.error_message,
-                        "generation_time": result.generation_time
-                    }
-                    for result in final_status.results
-                ]
+                "status": result.status,
+                "total_slides": result.total_slides,
+                "completed_slides": result.completed_slides,
+                "successful": result.successful,
+                "failed": result.failed,
+                "total_time": result.total_time
             },
-            success=final_status.successful > 0
+            success=True
         )
         
         logger.end_session(
             session_id=session_id,
-            success=final_status.successful > 0,
+            success=True,
             summary={
                 "endpoint": "/slide/batch/generate",
                 "batch_id": str(batch_id),
-                "total_slides": len(payload.slides),
-                "successful": final_status.successful,
-                "failed": final_status.failed,
-                "total_time": total_time,
-                "success_rate": response.success_rate
+                "status": result.status,
+                "total_slides": result.total_slides,
+                "completed_slides": result.completed_slides
             }
         )
         
-        return response
+        return result
         
     except Exception as e:
         logger.log_response(
@@ -352,7 +346,7 @@ async def get_batch_status(
     查询批量生成状态
     
     Args:
-        payload: 包含批量任务ID的请求
+        payload: 包含批量任务ID的请求；wait > 0 时任务仍在运行则最多等待其结束（长轮询）
         
     Returns:
         BatchStatusResponse: 批量任务状态信息
@@ -360,6 +354,9 @@ async def get_batch_status(
     logger = get_logger()
     
     try:
+        batch_task = batch_generator.active_batches.get(payload.batch_id)
+        if batch_task is not None and payload.wait > 0:
+            await batch_generator.wait_until_done(batch_task, payload.wait)
         status = batch_generator.get_batch_status(payload.batch_id)
         if not status:
             raise HTTPException(status_code=404, detail="Batch not found")
@@ -376,6 +373,82 @@ async def get_batch_status(
         raise HTTPException(status_code=500, detail=f"Failed to get batch status: {str(e)}")
 
 
+def _batch_event(payload: dict, event_id: Optional[int] = None) -> str:
+    """格式化一条 SSE 消息；带 id 的消息可在断线重连时通过 Last-Event-ID 续传"""
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+@router.get("/batch/{batch_id}/events")
+async def stream_batch_events(
+    batch_id: UUID,
+    request: Request,
+    last_event_id: Optional[str] = Header(default=None),
+    heartbeat_seconds: float = Query(default=15.0, ge=1, le=120),
+    batch_generator=Depends(get_batch_generator),
+):
+    """
+    以 SSE 推送批量任务进度
+
+    连接后先发送一次 snapshot，之后每完成一张幻灯片推送一条 slide 消息（id 为完成序号），
+    任务结束时推送 complete 并关闭连接；空闲期间定时发送心跳注释。
+    断线重连时浏览器自动携带 Last-Event-ID，只补发之后完成的幻灯片。
+    任务尚未创建（客户端先订阅后提交）时最多等待10秒。
+
+    Args:
+        batch_id: 批量任务ID
+        heartbeat_seconds: 心跳间隔（秒）
+    """
+    batch_task = await batch_generator.wait_for_batch(batch_id, timeout=10.0)
+    if batch_task is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    try:
+        seen = max(int(last_event_id), 0) if last_event_id else 0
+    except ValueError:
+        seen = 0
+
+    def progress() -> dict:
+        return {
+            "batch_id": str(batch_task.batch_id),
+            "status": batch_task.status,
+            "total_slides": batch_task.total_slides,
+            "completed_slides": batch_task.completed_count,
+            "successful": batch_task.success_count,
+            "failed": batch_task.failed_count,
+            "progress": batch_task.progress,
+        }
+
+    async def event_stream():
+        nonlocal seen
+        yield "retry: 2000\n\n"
+        yield _batch_event({"type": "snapshot", **progress()})
+        while True:
+            while seen < len(batch_task.results):
+                item = batch_task.results[seen]
+                seen += 1
+                yield _batch_event(
+                    {"type": "slide", **progress(), "item": item.model_dump(mode="json")},
+                    event_id=seen
+                )
+            if batch_task.status != "running":
+                yield _batch_event({"type": "complete", **progress(), "total_time": batch_task.total_time})
+                return
+            if not await batch_generator.wait_for_change(batch_task, seen, heartbeat_seconds):
+                if await request.is_disconnected():
+                    return
+                yield ": heartbeat\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @router.get("/batch/active-count")
 async def get_active_batches_count(
     batch_generator=Depends(get_batch_generator),
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import io
 import json
 from typing import List
 from uuid import UUID
@@ -98,6 +99,17 @@ async def analyze_template_stream(
         file_count=len(files),
         filenames=[f.filename for f in files]
     )
+
+    # 流式响应开始时请求已结束，上传文件会被关闭，因此先把内容读入内存
+    files = [
+        UploadFile(
+            file=io.BytesIO(await upload.read()),
+            size=upload.size,
+            filename=upload.filename,
+            headers=upload.headers,
+        )
+        for upload in files
+    ]
     
     async def generate_stream():
         try:
@@ -127,21 +139,14 @@ async def analyze_template_stream(
             # LLM分析阶段
             yield f"data: {json.dumps({'type': 'progress', 'message': '正在调用AI进行视觉风格分析...'}, ensure_ascii=False)}\n\n"
             
-            style_prompt = await analyzer.build_prompt(valid_files)
-            
-            # 分块发送风格提示词
-            yield f"data: {json.dumps({'type': 'chunk_start', 'message': '开始生成风格提示词...'}, ensure_ascii=False)}\n\n"
-            
-            # 将风格提示词分成几个部分发送，模拟打字机效果
-            prompt_lines = style_prompt.split('\n')
-            chunk_size = max(1, len(prompt_lines) // 5)  # 分成5块左右
-            
-            for i in range(0, len(prompt_lines), chunk_size):
-                chunk = '\n'.join(prompt_lines[i:i + chunk_size])
-                yield f"data: {json.dumps({'type': 'chunk', 'content': chunk, 'progress': f'{min(i + chunk_size, len(prompt_lines))}/{len(prompt_lines)}'}, ensure_ascii=False)}\n\n"
-                # 模拟处理时间
-                import asyncio
-                await asyncio.sleep(0.3)
+            # 逐段转发模型实时生成的风格提示词
+            prompt_parts = []
+            async for delta in analyzer.stream_prompt(valid_files, session_id):
+                if not prompt_parts:
+                    yield f"data: {json.dumps({'type': 'chunk_start', 'message': '开始生成风格提示词...'}, ensure_ascii=False)}\n\n"
+                prompt_parts.append(delta)
+                yield f"data: {json.dumps({'type': 'chunk', 'content': delta}, ensure_ascii=False)}\n\n"
+            style_prompt = "".join(prompt_parts).strip()
             
             # 发送完成信号
             yield f"data: {json.dumps({'type': 'complete', 'message': '模板分析完成', 'style_prompt': style_prompt}, ensure_ascii=False)}\n\n"
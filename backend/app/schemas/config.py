@@ -1,9 +1,18 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 
 
+class GatewayPoolEntry(BaseModel):
+    """网关池成员（一个API密钥 + 网关地址）"""
+    api_key: str = Field(..., min_length=1, description="该成员使用的API密钥")
+    base_url: str = Field(default="", description="该成员的网关地址，留空则复用对应的API基础地址")
+    weight: float = Field(default=1.0, gt=0, le=1000, description="路由权重，越大分到的请求越多")
+    max_concurrency: int = Field(default=8, ge=1, le=200, description="该成员同时处理的最大请求数")
+    name: str = Field(default="", description="成员名称，留空则自动编号")
+
+
 class AppConfig(BaseModel):
     """应用程序配置模型"""
     # AI服务配置
@@ -14,11 +23,78 @@ class AppConfig(BaseModel):
     llm_image_api_base: str = Field(default="", description="图像生成API基础地址，留空则复用LLM API基础地址")
     llm_image_model: str = Field(default="google/gemini-3-pro-image-preview", description="图像生成模型")
     llm_timeout_seconds: int = Field(default=120, ge=30, le=300, description="API请求超时时间(秒)")
+    image_deadline_seconds: float = Field(default=240, ge=0, le=900, description="单张图片生成的总耗时上限(秒)，覆盖所有重试与回退策略，0表示不限制")
+    image_max_concurrency: int = Field(default=20, ge=1, le=200, description="全局同时进行的图像生成数上限（单张生成优先，批量任务之间按权重公平分配）")
+
+    # 分阶段模型路由（留空则使用文本生成模型）
+    llm_outline_model: str = Field(default="", description="大纲生成使用的模型")
+    llm_insert_slide_model: str = Field(default="", description="插入单页使用的模型")
+    llm_style_analysis_model: str = Field(default="", description="风格分析使用的模型")
+    llm_connection_test_model: str = Field(default="", description="连接测试未指定模型时使用的模型")
+    llm_fast_model: str = Field(default="", description="自动降级使用的快速模型，留空则不降级")
+    llm_downgrade_stages: List[str] = Field(default=["insert_slide"], description="允许自动降级的阶段（outline、insert_slide、style_analysis、connection_test）")
+    llm_downgrade_max_input_chars: int = Field(default=0, ge=0, le=1000000, description="输入少于该字符数时改用快速模型，0表示不启用")
+    llm_downgrade_p95_seconds: float = Field(default=0, ge=0, le=600, description="主模型近期p95耗时超过该值(秒)时改用快速模型，0表示不启用")
+
+    # 多密钥/多网关池（为空时仅使用上面的单个密钥与地址）
+    llm_chat_pool: List[GatewayPoolEntry] = Field(default_factory=list, description="文本生成网关池，按权重分发请求")
+    llm_image_pool: List[GatewayPoolEntry] = Field(default_factory=list, description="图像生成网关池，按权重分发请求")
+    gateway_pool_drain_seconds: float = Field(default=30.0, ge=1, le=3600, description="成员遇到429或连续失败后暂停分配请求的时间(秒)")
+    gateway_pool_failure_threshold: int = Field(default=3, ge=1, le=100, description="成员连续失败多少次后暂停分配")
+
+    # HTTP连接池配置
+    http_max_connections: int = Field(default=100, ge=1, le=1000, description="每个网关的最大连接数")
+    http_max_keepalive_connections: int = Field(default=20, ge=0, le=1000, description="每个网关保持的空闲长连接数")
+    http_keepalive_expiry_seconds: float = Field(default=30.0, ge=1, le=600, description="空闲长连接的保留时间(秒)")
+    http2_enabled: bool = Field(default=True, description="是否启用HTTP/2（需要安装h2）")
+    warmup_connections: int = Field(default=2, ge=0, le=32, description="启动及配置更新后向每个网关预先建立的连接数，0表示不预热")
+
+    # 网关速率限制配置（按 网关地址+模型 共享）
+    rate_limit_rpm: int = Field(default=0, ge=0, le=100000, description="每分钟最大请求数，0表示不限制")
+    rate_limit_max_concurrency: int = Field(default=16, ge=1, le=200, description="自适应并发窗口上限")
+    rate_limit_min_concurrency: int = Field(default=1, ge=1, le=200, description="遇到429时并发窗口的下限")
+
+    # 熔断配置（按 网关地址+生成策略）
+    breaker_failure_threshold: int = Field(default=3, ge=1, le=100, description="连续失败多少次后熔断")
+    breaker_reset_seconds: float = Field(default=30.0, ge=1, le=3600, description="熔断后多久进入半开状态试探")
+
+    # 重试与重试预算（进程内所有网关请求共享，防止网关过载时重试风暴）
+    retry_max_attempts: int = Field(default=3, ge=1, le=10, description="每个端点的最大尝试次数（含首次请求）")
+    retry_backoff_base_seconds: float = Field(default=1.0, ge=0, le=60, description="指数退避的初始等待时间(秒)")
+    retry_backoff_max_seconds: float = Field(default=3.0, ge=0, le=300, description="指数退避的最长等待时间(秒)")
+    retry_backoff_jitter: float = Field(default=0.2, ge=0, le=1, description="退避时间的随机抖动比例")
+    retry_budget_ratio: float = Field(default=0.2, ge=0, le=10, description="窗口内每次成功请求可换取的重试次数")
+    retry_budget_min_retries: int = Field(default=10, ge=0, le=10000, description="窗口内始终允许的最少重试次数")
+    retry_budget_window_seconds: float = Field(default=10.0, ge=1, le=600, description="重试预算的统计窗口(秒)")
+
+    # 图像请求对冲（默认关闭）
+    image_hedge_enabled: bool = Field(default=False, description="图像生成过慢时是否发出第二个请求，先返回者胜出")
+    image_hedge_percentile: float = Field(default=0.9, ge=0.5, le=0.99, description="按近期延迟的该分位数决定何时对冲")
+    image_hedge_min_delay_seconds: float = Field(default=10.0, ge=1, le=300, description="对冲前的最短等待时间(秒)")
+    image_hedge_budget_per_minute: int = Field(default=6, ge=0, le=1000, description="每分钟最多发出的对冲请求数")
+
+    # 图像生成策略记忆（按 网关地址+模型 记住可用的生成接口）
+    image_strategy_memory_path: str = Field(default="data/image_strategies.json", description="图像生成策略记忆文件路径")
+    image_strategy_reprobe_interval: int = Field(default=25, ge=0, le=10000, description="每隔多少次生成按默认顺序重新试探，0表示不试探")
+
+    # 网关请求录制/回放（用于离线、可复现的性能回归）
+    cassette_mode: str = Field(default="off", pattern=r"^(off|record|replay)$", description="录制/回放模式：off、record 或 replay")
+    cassette_path: str = Field(default="data/cassettes/session.jsonl", description="录制文件路径")
+    cassette_replay_speed: float = Field(default=1.0, ge=0, le=1000, description="回放速度倍数：1为原始耗时，大于1为压缩，0为不等待")
+
+    # 文本生成响应缓存（默认关闭）
+    llm_cache_enabled: bool = Field(default=False, description="是否缓存确定性（低温度）文本生成结果")
+    llm_cache_path: str = Field(default="data/llm_cache.sqlite3", description="响应缓存数据库路径")
+    llm_cache_ttl_seconds: int = Field(default=604800, ge=60, description="缓存条目有效期(秒)")
+    llm_cache_max_entries: int = Field(default=500, ge=1, le=100000, description="缓存最大条目数")
+    llm_cache_max_mb: int = Field(default=50, ge=1, le=10240, description="缓存最大体积(MB)")
+    llm_cache_max_temperature: float = Field(default=0.3, ge=0, le=2, description="仅缓存温度不高于该值的调用")
     
     # 文件存储配置
     image_output_dir: str = Field(default="generated/images", description="图像输出目录")
     pptx_output_dir: str = Field(default="generated/pptx", description="PPTX输出目录")
     template_store_path: str = Field(default="data/templates.json", description="模板存储路径")
+    batch_store_path: str = Field(default="data/batches.sqlite3", description="批量生成任务数据库路径（重启后据此恢复未完成的任务）")
     
     # CORS配置
     allowed_origins: List[str] = Field(
@@ -46,11 +122,76 @@ class ConfigUpdateRequest(BaseModel):
     llm_image_api_base: Optional[str] = Field(None, description="图像生成API基础地址")
     llm_image_model: Optional[str] = Field(None, description="图像生成模型")
     llm_timeout_seconds: Optional[int] = Field(None, ge=30, le=300, description="API请求超时时间(秒)")
+    image_deadline_seconds: Optional[float] = Field(None, ge=0, le=900, description="单张图片生成的总耗时上限(秒)，覆盖所有重试与回退策略，0表示不限制")
+    image_max_concurrency: Optional[int] = Field(None, ge=1, le=200, description="全局同时进行的图像生成数上限（单张生成优先，批量任务之间按权重公平分配）")
+
+    # 分阶段模型路由
+    llm_outline_model: Optional[str] = Field(None, description="大纲生成使用的模型")
+    llm_insert_slide_model: Optional[str] = Field(None, description="插入单页使用的模型")
+    llm_style_analysis_model: Optional[str] = Field(None, description="风格分析使用的模型")
+    llm_connection_test_model: Optional[str] = Field(None, description="连接测试未指定模型时使用的模型")
+    llm_fast_model: Optional[str] = Field(None, description="自动降级使用的快速模型，留空则不降级")
+    llm_downgrade_stages: Optional[List[str]] = Field(None, description="允许自动降级的阶段（outline、insert_slide、style_analysis、connection_test）")
+    llm_downgrade_max_input_chars: Optional[int] = Field(None, ge=0, le=1000000, description="输入少于该字符数时改用快速模型，0表示不启用")
+    llm_downgrade_p95_seconds: Optional[float] = Field(None, ge=0, le=600, description="主模型近期p95耗时超过该值(秒)时改用快速模型，0表示不启用")
+
+    # 多密钥/多网关池
+    llm_chat_pool: Optional[List[GatewayPoolEntry]] = Field(None, description="文本生成网关池，按权重分发请求")
+    llm_image_pool: Optional[List[GatewayPoolEntry]] = Field(None, description="图像生成网关池，按权重分发请求")
+    gateway_pool_drain_seconds: Optional[float] = Field(None, ge=1, le=3600, description="成员遇到429或连续失败后暂停分配请求的时间(秒)")
+    gateway_pool_failure_threshold: Optional[int] = Field(None, ge=1, le=100, description="成员连续失败多少次后暂停分配")
+
+    # HTTP连接池配置
+    http_max_connections: Optional[int] = Field(None, ge=1, le=1000, description="每个网关的最大连接数")
+    http_max_keepalive_connections: Optional[int] = Field(None, ge=0, le=1000, description="每个网关保持的空闲长连接数")
+    http_keepalive_expiry_seconds: Optional[float] = Field(None, ge=1, le=600, description="空闲长连接的保留时间(秒)")
+    http2_enabled: Optional[bool] = Field(None, description="是否启用HTTP/2（需要安装h2）")
+    warmup_connections: Optional[int] = Field(None, ge=0, le=32, description="启动及配置更新后向每个网关预先建立的连接数，0表示不预热")
+
+    # 网关速率限制配置
+    rate_limit_rpm: Optional[int] = Field(None, ge=0, le=100000, description="每分钟最大请求数，0表示不限制")
+    rate_limit_max_concurrency: Optional[int] = Field(None, ge=1, le=200, description="自适应并发窗口上限")
+    rate_limit_min_concurrency: Optional[int] = Field(None, ge=1, le=200, description="遇到429时并发窗口的下限")
+
+    # 熔断配置
+    breaker_failure_threshold: Optional[int] = Field(None, ge=1, le=100, description="连续失败多少次后熔断")
+    breaker_reset_seconds: Optional[float] = Field(None, ge=1, le=3600, description="熔断后多久进入半开状态试探")
+    retry_max_attempts: Optional[int] = Field(None, ge=1, le=10, description="每个端点的最大尝试次数（含首次请求）")
+    retry_backoff_base_seconds: Optional[float] = Field(None, ge=0, le=60, description="指数退避的初始等待时间(秒)")
+    retry_backoff_max_seconds: Optional[float] = Field(None, ge=0, le=300, description="指数退避的最长等待时间(秒)")
+    retry_backoff_jitter: Optional[float] = Field(None, ge=0, le=1, description="退避时间的随机抖动比例")
+    retry_budget_ratio: Optional[float] = Field(None, ge=0, le=10, description="窗口内每次成功请求可换取的重试次数")
+    retry_budget_min_retries: Optional[int] = Field(None, ge=0, le=10000, description="窗口内始终允许的最少重试次数")
+    retry_budget_window_seconds: Optional[float] = Field(None, ge=1, le=600, description="重试预算的统计窗口(秒)")
+
+    # 图像请求对冲
+    image_hedge_enabled: Optional[bool] = Field(None, description="图像生成过慢时是否发出第二个请求，先返回者胜出")
+    image_hedge_percentile: Optional[float] = Field(None, ge=0.5, le=0.99, description="按近期延迟的该分位数决定何时对冲")
+    image_hedge_min_delay_seconds: Optional[float] = Field(None, ge=1, le=300, description="对冲前的最短等待时间(秒)")
+    image_hedge_budget_per_minute: Optional[int] = Field(None, ge=0, le=1000, description="每分钟最多发出的对冲请求数")
+
+    # 图像生成策略记忆
+    image_strategy_memory_path: Optional[str] = Field(None, description="图像生成策略记忆文件路径")
+    image_strategy_reprobe_interval: Optional[int] = Field(None, ge=0, le=10000, description="每隔多少次生成按默认顺序重新试探，0表示不试探")
+
+    # 网关请求录制/回放
+    cassette_mode: Optional[str] = Field(None, pattern=r"^(off|record|replay)$", description="录制/回放模式：off、record 或 replay")
+    cassette_path: Optional[str] = Field(None, description="录制文件路径")
+    cassette_replay_speed: Optional[float] = Field(None, ge=0, le=1000, description="回放速度倍数：1为原始耗时，大于1为压缩，0为不等待")
+
+    # 文本生成响应缓存
+    llm_cache_enabled: Optional[bool] = Field(None, description="是否缓存确定性（低温度）文本生成结果")
+    llm_cache_path: Optional[str] = Field(None, description="响应缓存数据库路径")
+    llm_cache_ttl_seconds: Optional[int] = Field(None, ge=60, description="缓存条目有效期(秒)")
+    llm_cache_max_entries: Optional[int] = Field(None, ge=1, le=100000, description="缓存最大条目数")
+    llm_cache_max_mb: Optional[int] = Field(None, ge=1, le=10240, description="缓存最大体积(MB)")
+    llm_cache_max_temperature: Optional[float] = Field(None, ge=0, le=2, description="仅缓存温度不高于该值的调用")
     
     # 文件存储配置
     image_output_dir: Optional[str] = Field(None, description="图像输出目录")
     pptx_output_dir: Optional[str] = Field(None, description="PPTX输出目录")
     template_store_path: Optional[str] = Field(None, description="模板存储路径")
+    batch_store_path: Optional[str] = Field(None, description="批量生成任务数据库路径（重启后据此恢复未完成的任务）")
     
     # CORS配置
     allowed_origins: Optional[List[str]] = Field(None, description="允许的跨域源列表")
@@ -64,8 +205,33 @@ class ConnectionTestRequest(BaseModel):
     """连接测试请求模型"""
     api_key: str = Field(..., description="API密钥")
     api_base: str = Field(..., description="API基础地址")
-    model: str = Field(..., description="测试模型")
+    model: Optional[str] = Field(None, description="测试模型，留空则使用连接测试的路由模型")
     timeout_seconds: Optional[int] = Field(None, ge=30, le=300, description="超时时间(秒)")
+    probes: int = Field(default=1, ge=1, le=20, description="对话接口并发探测次数")
+    image_probes: int = Field(default=0, ge=0, le=10, description="图像接口并发探测次数（每次都是一次计费的生成，默认不探测）")
+    image_api_key: Optional[str] = Field(None, description="图像接口API密钥，留空则复用api_key")
+    image_api_base: Optional[str] = Field(None, description="图像接口基础地址，留空则复用api_base")
+    image_model: Optional[str] = Field(None, description="图像探测模型，留空则使用当前配置的图像模型")
+
+
+class LatencyStats(BaseModel):
+    """单个阶段的延迟分布（秒）"""
+    p50: Optional[float] = Field(None, description="中位数")
+    p95: Optional[float] = Field(None, description="95分位")
+    max: Optional[float] = Field(None, description="最大值")
+
+
+class GatewayProbeResult(BaseModel):
+    """单个网关接口的延迟探测结果"""
+    endpoint: Optional[str] = Field(None, description="实际探测的接口地址")
+    model: str = Field(..., description="探测使用的模型")
+    probes: int = Field(..., description="探测次数")
+    succeeded: int = Field(..., description="成功次数")
+    reused_connections: int = Field(0, description="复用连接池中已有连接的探测次数（这些探测没有连接与TLS耗时）")
+    status_codes: Dict[str, int] = Field(default_factory=dict, description="各状态码出现次数")
+    phases: Dict[str, LatencyStats] = Field(default_factory=dict, description="DNS、连接、TLS、首字节与总耗时的延迟分布")
+    rate_limit_headers: Dict[str, str] = Field(default_factory=dict, description="网关返回的限流响应头")
+    errors: List[str] = Field(default_factory=list, description="探测错误")
 
 
 class ConnectionTestResponse(BaseModel):
@@ -74,11 +240,16 @@ class ConnectionTestResponse(BaseModel):
     message: str = Field(..., description="测试结果消息")
     model: Optional[str] = Field(None, description="测试的模型名称")
     response_time: Optional[float] = Field(None, description="响应时间(秒)")
+    chat: Optional[GatewayProbeResult] = Field(None, description="对话接口延迟分解")
+    image: Optional[GatewayProbeResult] = Field(None, description="图像接口延迟分解")
 
 
 __all__ = [
     "AppConfig",
+    "GatewayPoolEntry",
     "ConfigUpdateRequest", 
     "ConnectionTestRequest",
-    "ConnectionTestResponse"
+    "ConnectionTestResponse",
+    "GatewayProbeResult",
+    "LatencyStats"
 ]
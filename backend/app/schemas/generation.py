@@ -15,6 +15,7 @@ class SlideGenerateRequest(BaseModel):
     page_num: Optional[int] = None
     title: Optional[str] = None
     content_text: Optional[str] = None
+    deadline_seconds: Optional[float] = Field(default=None, gt=0, le=900)  # 单张图片总耗时上限，留空使用配置值
 
 
 class SlideGenerateResponse(BaseModel):
@@ -33,6 +34,9 @@ class BatchGenerateRequest(BaseModel):
     style_prompt: str  # 统一的风格提示词
     max_workers: Optional[int] = Field(default=None, ge=1, le=100)  # 留空时按图片数量并发
     aspect_ratio: str = Field(default="16:9", pattern=r"^\d{1,2}:\d{1,2}$")
+    deadline_seconds: Optional[float] = Field(default=None, gt=0, le=900)  # 每张图片的总耗时上限，留空使用配置值
+    weight: float = Field(default=1.0, gt=0, le=10)  # 与其他批量任务争用全局生成并发时的权重
+    batch_id: Optional[UUID] = None  # 客户端预先生成的任务ID，便于提交前订阅进度推送
 
 
 class BatchGenerateItem(BaseModel):
@@ -48,13 +52,15 @@ class BatchGenerateItem(BaseModel):
 
 
 class BatchGenerateResponse(BaseModel):
-    """批量生成的响应"""
+    """批量生成的响应（任务未结束时只含已完成的结果）"""
     batch_id: UUID
+    status: str  # "running", "completed", "completed_with_errors", "failed"
     total_slides: int
+    completed_slides: int = 0
     successful: int
     failed: int
-    total_time: float  # 总生成时间（秒）
-    results: List[BatchGenerateItem]
+    total_time: Optional[float] = None  # 服务端测得的总生成时间（秒），任务结束前为空
+    results: List[BatchGenerateItem] = []
     
     @property
     def success_rate(self) -> float:
@@ -64,6 +70,7 @@ class BatchGenerateResponse(BaseModel):
 class BatchStatusRequest(BaseModel):
     """查询批量生成状态的请求"""
     batch_id: UUID
+    wait: float = Field(default=0, ge=0, le=300)  # 长轮询：任务仍在运行时最多等待其结束的秒数
 
 
 class BatchStatusResponse(BaseModel):
@@ -76,6 +83,7 @@ class BatchStatusResponse(BaseModel):
     successful: int
     failed: int
     estimated_remaining_time: Optional[float] = None  # 秒
+    total_time: Optional[float] = None  # 服务端测得的总生成时间（秒），任务结束前为空
     results: List[BatchGenerateItem] = []
 
 
@@ -1,10 +1,9 @@
 from __future__ import annotations
 
 import asyncio
+import sqlite3
 import time
-import uuid
-from concurrent.futures import ProcessPoolExecutor, as_completed
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional
 from uuid import UUID, uuid4
@@ -12,110 +11,11 @@ from uuid import UUID, uuid4
 from ..schemas.generation import BatchGenerateItem, BatchStatusResponse
 from ..schemas.slide import SlideData, SlideStatus
 from ..utils.logger import get_logger
+from .batch_store import BatchStore
 from .image_generator import ImageGenerator
 from .llm_client import LLMClientError
 from .prompt_builder import PromptBuilder
-
-
-# 多进程worker函数 - 必须在模块级别定义
-def _generate_slide_worker(
-    slide_data: dict,
-    style_prompt: str,
-    aspect_ratio: str,
-    config: dict
-) -> dict:
-    """
-    多进程worker函数，生成单个幻灯片
-    slide_data: 序列化的幻灯片数据
-    """
-    import time
-    import asyncio
-    from pathlib import Path
-    
-    # 重新创建依赖对象（因为多进程不能共享对象）
-    from ..utils.logger import get_logger
-    from ..schemas.slide import SlideData, SlideStatus
-    from .llm_client import OpenRouterClient
-    from .prompt_builder import PromptBuilder
-    from .image_generator import ImageGenerator
-    
-    try:
-        # 重建依赖对象
-        llm_client = OpenRouterClient(
-            api_key=config["api_key"],
-            base_url=config["base_url"]
-        )
-        prompt_builder = PromptBuilder()
-        image_generator = ImageGenerator(
-            output_dir=Path(config["output_dir"]),
-            llm_client=llm_client,
-            image_model=config["image_model"]
-        )
-        
-        # 重建SlideData对象
-        slide = SlideData(
-            id=slide_data["id"],
-            page_num=slide_data["page_num"],
-            type=slide_data["type"],
-            title=slide_data["title"],
-            content_text=slide_data["content_text"],
-            visual_desc=slide_data["visual_desc"]
-        )
-        
-        start_time = time.time()
-        
-        # 构建最终提示词
-        final_prompt = prompt_builder.build(
-            style_prompt=style_prompt,
-            visual_desc=slide.visual_desc,
-            title=slide.title,
-            content_text=slide.content_text,
-            aspect_ratio=aspect_ratio
-        )
-        
-        # 生成图片（直接使用异步方法，因为在多进程中每个进程都有自己的事件循环）
-        import asyncio
-        
-        async def generate_image():
-            return await image_generator.create(
-                title=slide.title,
-                final_prompt=final_prompt,
-                aspect_ratio=aspect_ratio,
-                page_num=slide.page_num
-            )
-        
-        # 在新的事件循环中运行
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            generated = loop.run_until_complete(generate_image())
-        finally:
-            loop.close()
-        
-        generation_time = time.time() - start_time
-        
-        return {
-            "success": True,
-            "slide_id": slide.id,
-            "page_num": slide.page_num,
-            "title": slide.title,
-            "image_url": generated.image_url,
-            "final_prompt": final_prompt,
-            "generation_time": generation_time,
-            "status": "done"
-        }
-        
-    except Exception as e:
-        generation_time = time.time() - start_time if 'start_time' in locals() else 0
-        return {
-            "success": False,
-            "slide_id": slide_data["id"],
-            "page_num": slide_data["page_num"],
-            "title": slide_data.get("title", ""),
-            "error_message": str(e),
-            "generation_time": generation_time,
-            "status": "error"
-        }
+from .rate_limiter import get_rate_limiter
 
 
 @dataclass
@@ -128,10 +28,26 @@ class BatchTask:
     aspect_ratio: str
     start_time: float
     results: List[BatchGenerateItem]
+    deadline_seconds: Optional[float] = None
+    weight: float = 1.0
     status: str = "running"
     completed_count: int = 0
     success_count: int = 0
     failed_count: int = 0
+    finished_at: Optional[float] = None
+    # 每追加一条结果或任务结束时通知，供进度推送等待
+    changed: asyncio.Condition = field(default_factory=asyncio.Condition, repr=False, compare=False)
+    # 任务结束（任意终态）时置位，供长轮询等待
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.status != "running":
+            self.done.set()
+
+    @property
+    def total_time(self) -> Optional[float]:
+        """服务端测得的总耗时（秒），任务未结束时为 None"""
+        return self.finished_at - self.start_time if self.finished_at is not None else None
 
     @property
     def progress(self) -> float:
@@ -143,40 +59,53 @@ class BatchTask:
 
 
 class BatchImageGenerator:
-    """批量图片生成服务，支持多进程并发生成"""
+    """
+    批量图片生成服务
+
+    每个批量任务在当前事件循环中为每张幻灯片创建一个协程，由信号量限制并发，
+    共享同一个 ImageGenerator（及其连接池、限流器、重试预算与网关池）。
+    生成过程是 I/O 密集型，无需多进程，批量执行期间事件循环保持响应。
+    配置了 BatchStore 时，任务与每张幻灯片的结果实时写入 SQLite，
+    重启后由 resume() 恢复任务状态并继续生成未完成的幻灯片。
+    所有存储读写都放到线程中执行，不阻塞事件循环。
+    """
 
     def __init__(
         self,
         image_generator: ImageGenerator,
         prompt_builder: PromptBuilder,
         max_concurrent_batches: int = 10,  # 增加到10个同时进行的批量任务
+        store: Optional[BatchStore] = None,
     ):
         self.image_generator = image_generator
         self.prompt_builder = prompt_builder
         self.max_concurrent_batches = max_concurrent_batches
+        self.store = store
         self.logger = get_logger()
         
         # 存储正在进行的批量任务
         self.active_batches: Dict[UUID, BatchTask] = {}
-        self.executor = ProcessPoolExecutor(max_workers=max_concurrent_batches)
-        
-        # 多进程配置 - 从image_generator获取必要配置
-        self.multiprocess_config = {
-            "output_dir": str(image_generator.output_dir),
-            "image_model": image_generator.image_model,
-            "api_key": image_generator.llm_client.api_key,
-            "base_url": str(image_generator.llm_client.base_url)
-        }
-
-    def create_batch(
+        # 等待尚未创建的批量任务的订阅者
+        self._batch_created: Dict[UUID, asyncio.Event] = {}
+        # 持有批量任务的引用，避免后台任务在执行中被垃圾回收
+        self._batch_tasks: set[asyncio.Task[None]] = set()
+        # 启动时因未配置API密钥而暂缓继续生成的任务及其未完成幻灯片的位置
+        self._deferred: Dict[UUID, List[int]] = {}
+
+    async def create_batch(
         self,
         slides: List[SlideData],
         style_prompt: str,
         max_workers: int = None,
-        aspect_ratio: str = "16:9"
+        aspect_ratio: str = "16:9",
+        deadline_seconds: Optional[float] = None,
+        weight: float = 1.0,
+        batch_id: Optional[UUID] = None
     ) -> UUID:
-        """创建新的批量生成任务"""
-        batch_id = uuid4()
+        """创建新的批量生成任务（batch_id 可由客户端指定，便于提交前先订阅进度）"""
+        batch_id = batch_id or uuid4()
+        if batch_id in self.active_batches:
+            raise ValueError(f"Batch {batch_id} already exists")
         
         # 默认按图片数量全开并发，由路由层负责上限校验
         if max_workers is None:
@@ -190,10 +119,26 @@ class BatchImageGenerator:
             max_workers=max_workers,
             aspect_ratio=aspect_ratio,
             start_time=time.time(),
-            results=[]
+            results=[],
+            deadline_seconds=deadline_seconds,
+            weight=weight
         )
         
         self.active_batches[batch_id] = batch_task
+        created = self._batch_created.pop(batch_id, None)
+        if created is not None:
+            created.set()
+        await self._persist(
+            "create",
+            str(batch_id),
+            batch_task.slides,
+            style_prompt,
+            aspect_ratio,
+            max_workers,
+            deadline_seconds,
+            weight,
+            batch_task.start_time
+        )
         
         # 开始会话记录
         session_id = self.logger.start_session(
@@ -226,12 +171,161 @@ class BatchImageGenerator:
         )
         
         # 异步执行批量生成
-        asyncio.create_task(self._execute_batch(batch_task, session_id))
+        self._start(batch_task, session_id, range(len(batch_task.slides)))
         
         return batch_id
 
-    async def _execute_batch(self, batch_task: BatchTask, session_id: str):
-        """执行批量生成任务"""
+    def _start(self, batch_task: BatchTask, session_id: str, positions) -> None:
+        task = asyncio.create_task(self._execute_batch(batch_task, session_id, list(positions)))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def resume(self, generate: bool = True) -> int:
+        """
+        从持久化存储恢复批量任务（启动时调用）
+
+        所有任务都会重新载入以便查询状态；中断时仍在运行的任务只重新生成尚无结果的幻灯片。
+        generate 为 False（如尚未配置API密钥）时只载入状态，未完成的任务保持 running，
+        配置API密钥后由 resume_deferred() 继续生成。
+
+        Returns:
+            int: 恢复执行的任务数量
+        """
+        if self.store is None:
+            return 0
+        resumed = 0
+        for stored in await asyncio.to_thread(self.store.load_all):
+            batch_id = UUID(stored.batch_id)
+            if batch_id in self.active_batches:
+                continue
+            batch_task = BatchTask(
+                batch_id=batch_id,
+                slides=stored.slides,
+                style_prompt=stored.style_prompt,
+                max_workers=stored.max_workers,
+                aspect_ratio=stored.aspect_ratio,
+                start_time=stored.start_time,
+                results=stored.results,
+                deadline_seconds=stored.deadline_seconds,
+                weight=stored.weight,
+                status=stored.status,
+                completed_count=len(stored.results),
+                success_count=sum(1 for item in stored.results if item.status == SlideStatus.done),
+                failed_count=sum(1 for item in stored.results if item.status != SlideStatus.done),
+                finished_at=stored.finished_at
+            )
+            self.active_batches[batch_id] = batch_task
+            if stored.status != "running":
+                continue
+            if not generate:
+                self._deferred[batch_id] = stored.pending_positions
+                continue
+            self._resume_batch(batch_task, stored.pending_positions)
+            resumed += 1
+        if resumed:
+            self.logger.logger.info(f"Resumed {resumed} unfinished batch(es) from {self.store.path}")
+        if self._deferred:
+            self.logger.logger.info(
+                f"{len(self._deferred)} unfinished batch(es) wait for an API key before resuming"
+            )
+        return resumed
+
+    def resume_deferred(self) -> int:
+        """
+        继续生成启动时暂缓的任务（配置API密钥后调用）
+
+        Returns:
+            int: 恢复执行的任务数量
+        """
+        deferred, self._deferred = self._deferred, {}
+        for batch_id, positions in deferred.items():
+            self._resume_batch(self.active_batches[batch_id], positions)
+        if deferred:
+            self.logger.logger.info(f"Resumed {len(deferred)} deferred batch(es) after the API key was configured")
+        return len(deferred)
+
+    def _resume_batch(self, batch_task: BatchTask, positions: List[int]) -> None:
+        session_id = self.logger.start_session(
+            "batch_generate",
+            batch_id=str(batch_task.batch_id),
+            total_slides=len(batch_task.slides),
+            max_workers=batch_task.max_workers,
+            aspect_ratio=batch_task.aspect_ratio,
+            resumed=True
+        )
+        self.logger.log_pipeline_step(
+            session_id=session_id,
+            step="batch_resumed",
+            details={
+                "batch_id": str(batch_task.batch_id),
+                "completed_slides": batch_task.completed_count,
+                "pending_slides": len(positions),
+                "stage": "服务重启后继续生成未完成的幻灯片"
+            }
+        )
+        self._start(batch_task, session_id, positions)
+
+    async def _notify(self, batch_task: BatchTask) -> None:
+        """唤醒等待该任务进度的订阅者"""
+        async with batch_task.changed:
+            batch_task.changed.notify_all()
+
+    async def wait_for_batch(self, batch_id: UUID, timeout: float) -> Optional[BatchTask]:
+        """获取批量任务；任务尚未创建时最多等待 timeout 秒"""
+        batch_task = self.active_batches.get(batch_id)
+        if batch_task is not None:
+            return batch_task
+        created = self._batch_created.setdefault(batch_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(created.wait(), timeout)
+        except asyncio.TimeoutError:
+            if self._batch_created.get(batch_id) is created:
+                del self._batch_created[batch_id]
+        return self.active_batches.get(batch_id)
+
+    async def wait_until_done(self, batch_task: BatchTask, timeout: float) -> bool:
+        """
+        等待任务结束，最多 timeout 秒
+
+        Returns:
+            bool: 任务已结束时为 True
+        """
+        try:
+            await asyncio.wait_for(batch_task.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def wait_for_change(self, batch_task: BatchTask, seen: int, timeout: float) -> bool:
+        """
+        等待任务出现第 seen 条之后的新结果或结束
+
+        Returns:
+            bool: 超时前有新进度时为 True
+        """
+        async with batch_task.changed:
+            try:
+                await asyncio.wait_for(
+                    batch_task.changed.wait_for(
+                        lambda: len(batch_task.results) > seen or batch_task.status != "running"
+                    ),
+                    timeout
+                )
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    async def _persist(self, method: str, *args) -> None:
+        """调用持久化存储的写入方法；写入失败只记录日志，不影响生成"""
+        if self.store is None:
+            return
+        try:
+            await asyncio.to_thread(getattr(self.store, method), *args)
+        except sqlite3.Error as e:
+            self.logger.logger.warning(f"Batch store write failed: {e}")
+
+    async def _execute_batch(self, batch_task: BatchTask, session_id: str, positions: List[int]):
+        """执行批量生成任务（positions 为待生成幻灯片的下标）"""
         try:
             self.logger.log_pipeline_step(
                 session_id=session_id,
@@ -239,111 +333,53 @@ class BatchImageGenerator:
                 details={
                     "batch_id": str(batch_task.batch_id),
                     "total_slides": len(batch_task.slides),
+                    "pending_slides": len(positions),
                     "max_workers": batch_task.max_workers,
                     "stage": "开始批量执行"
                 }
             )
             
-            # 使用多进程执行并发生成 - 提交任务到进程池
-            with ProcessPoolExecutor(max_workers=batch_task.max_workers) as executor:
-                # 将所有幻灯片序列化为字典（多进程需要）
-                slide_data_list = []
-                for slide in batch_task.slides:
-                    slide_data_list.append({
-                        "id": slide.id,
-                        "page_num": slide.page_num,
-                        "type": slide.type,
-                        "title": slide.title,
-                        "content_text": slide.content_text,
-                        "visual_desc": slide.visual_desc
-                    })
-                
-                # 提交所有任务到进程池
-                future_to_slide_data = {}
-                for i, slide_data in enumerate(slide_data_list):
-                    future = executor.submit(
-                        _generate_slide_worker,
-                        slide_data,
-                        batch_task.style_prompt,
-                        batch_task.aspect_ratio,
-                        self.multiprocess_config
-                    )
-                    future_to_slide_data[future] = slide_data
-                
-                # 等待所有任务完成
-                for future in as_completed(future_to_slide_data):
-                    slide_data = future_to_slide_data[future]
-                    
-                    try:
-                        worker_result = future.result()  # 获取多进程worker的结果
-                        
-                        # 将worker结果转换为BatchGenerateItem
-                        if worker_result["success"]:
-                            batch_generate_item = BatchGenerateItem(
-                                slide_id=worker_result["slide_id"],
-                                page_num=worker_result["page_num"],
-                                title=worker_result["title"],
-                                image_url=worker_result.get("image_url", ""),
-                                final_prompt=worker_result.get("final_prompt", ""),
-                                status=SlideStatus.done,
-                                generation_time=worker_result["generation_time"]
-                            )
-                            batch_task.success_count += 1
-                        else:
-                            batch_generate_item = BatchGenerateItem(
-                                slide_id=worker_result["slide_id"],
-                                page_num=worker_result["page_num"],
-                                title=worker_result["title"],
-                                status=SlideStatus.error,
-                                error_message=worker_result.get("error_message", "Unknown error"),
-                                generation_time=worker_result["generation_time"]
-                            )
-                            batch_task.failed_count += 1
-                        
-                        batch_task.results.append(batch_generate_item)
-                        batch_task.completed_count += 1
-                        
-                        # 记录单个幻灯片完成
-                        self.logger.log_pipeline_step(
-                            session_id=session_id,
-                            step="slide_completed",
-                            details={
-                                "batch_id": str(batch_task.batch_id),
-                                "slide_id": str(worker_result["slide_id"]),
-                                "page_num": worker_result["page_num"],
-                                "status": worker_result["status"],
-                                "completed_count": batch_task.completed_count,
-                                "total_count": len(batch_task.slides),
-                                "progress": batch_task.progress,
-                                "success": worker_result["success"],
-                                "stage": f"幻灯片 {worker_result['page_num']} 生成完成"
-                            }
-                        )
-                        
-                    except Exception as e:
-                        # 处理进程池异常
-                        batch_generate_item = BatchGenerateItem(
-                            slide_id=slide_data["id"],
-                            page_num=slide_data["page_num"],
-                            title=slide_data.get("title", ""),
-                            status=SlideStatus.error,
-                            error_message=f"进程池错误: {str(e)}"
-                        )
-                        batch_task.results.append(batch_generate_item)
-                        batch_task.completed_count += 1
-                        batch_task.failed_count += 1
-                        
-                        self.logger.log_pipeline_step(
-                            session_id=session_id,
-                            step="slide_error",
-                            details={
-                                "batch_id": str(batch_task.batch_id),
-                                "slide_id": str(slide_data["id"]),
-                                "page_num": slide_data["page_num"],
-                                "error": str(e),
-                                "stage": f"幻灯片 {slide_data['page_num']} 进程池失败"
-                            }
-                        )
+            # 并发数不超过共享限流器当前的自适应窗口，避免批量任务引发429风暴；
+            # 配置了网关池时按各成员的窗口与并发上限之和计算，吞吐随密钥数量扩展
+            max_workers = max(1, min(batch_task.max_workers, self._concurrency_limit()))
+            semaphore = asyncio.Semaphore(max_workers)
+            tasks = [
+                asyncio.create_task(self._generate_slide(batch_task, position, semaphore))
+                for position in positions
+            ]
+
+            # 按完成顺序记录结果，等待期间不阻塞事件循环
+            for next_done in asyncio.as_completed(tasks):
+                position, item = await next_done
+                batch_task.results.append(item)
+                batch_task.completed_count += 1
+                if item.status == SlideStatus.done:
+                    batch_task.success_count += 1
+                else:
+                    batch_task.failed_count += 1
+                await self._notify(batch_task)
+                await self._persist(
+                    "record_result",
+                    str(batch_task.batch_id), position, item, batch_task.completed_count
+                )
+
+                # 记录单个幻灯片完成
+                self.logger.log_pipeline_step(
+                    session_id=session_id,
+                    step="slide_completed",
+                    details={
+                        "batch_id": str(batch_task.batch_id),
+                        "slide_id": str(item.slide_id),
+                        "page_num": item.page_num,
+                        "status": item.status.value,
+                        "completed_count": batch_task.completed_count,
+                        "total_count": len(batch_task.slides),
+                        "progress": batch_task.progress,
+                        "success": item.status == SlideStatus.done,
+                        "error": item.error_message,
+                        "stage": f"幻灯片 {item.page_num} 生成完成"
+                    }
+                )
             
             # 更新任务状态
             if batch_task.failed_count == 0:
@@ -352,8 +388,13 @@ class BatchImageGenerator:
                 batch_task.status = "completed_with_errors"
             else:
                 batch_task.status = "failed"
+            batch_task.finished_at = time.time()
+            # 结束状态先写入存储再唤醒等待者，等待者看到的结果已持久化
+            await self._persist("finish", str(batch_task.batch_id), batch_task.status)
+            batch_task.done.set()
+            await self._notify(batch_task)
             
-            total_time = time.time() - batch_task.start_time
+            total_time = batch_task.total_time
             
             # 记录批量任务完成
             self.logger.log_response(
@@ -399,6 +440,10 @@ class BatchImageGenerator:
             
         except Exception as e:
             batch_task.status = "failed"
+            batch_task.finished_at = time.time()
+            await self._persist("finish", str(batch_task.batch_id), batch_task.status)
+            batch_task.done.set()
+            await self._notify(batch_task)
             self.logger.log_response(
                 session_id=session_id,
                 stage="batch_generate_error",
@@ -410,7 +455,71 @@ class BatchImageGenerator:
                 success=False
             )
 
-  
+    def _concurrency_limit(self) -> int:
+        """共享限流器当前允许的图像生成并发数"""
+        rate_limiter = get_rate_limiter()
+        llm_client = self.image_generator.llm_client
+        image_model = self.image_generator.image_model
+        if llm_client.gateway_pool:
+            return sum(
+                min(
+                    member.spec.max_concurrency,
+                    rate_limiter.get(member.rate_limit_scope, image_model).concurrency_limit,
+                )
+                for member in llm_client.gateway_pool.members
+            )
+        return rate_limiter.get(llm_client.rate_limit_scope, image_model).concurrency_limit
+
+    async def _generate_slide(
+        self,
+        batch_task: BatchTask,
+        position: int,
+        semaphore: asyncio.Semaphore
+    ) -> tuple[int, BatchGenerateItem]:
+        """在并发许可内生成单张幻灯片，异常转为错误结果"""
+        slide = batch_task.slides[position]
+        async with semaphore:
+            start_time = time.time()
+            final_prompt = ""
+            try:
+                final_prompt = self.prompt_builder.build(
+                    style_prompt=batch_task.style_prompt,
+                    visual_desc=slide.visual_desc,
+                    title=slide.title,
+                    content_text=slide.content_text,
+                    aspect_ratio=batch_task.aspect_ratio
+                )
+                # 每张幻灯片的截止时间：请求指定优先，否则沿用配置值
+                generated = await self.image_generator.create(
+                    title=slide.title,
+                    final_prompt=final_prompt,
+                    aspect_ratio=batch_task.aspect_ratio,
+                    page_num=slide.page_num,
+                    deadline_seconds=batch_task.deadline_seconds,
+                    lane="batch",
+                    flow=str(batch_task.batch_id),
+                    weight=batch_task.weight
+                )
+            except Exception as e:
+                return position, BatchGenerateItem(
+                    slide_id=slide.id,
+                    page_num=slide.page_num,
+                    title=slide.title,
+                    final_prompt=final_prompt,
+                    status=SlideStatus.error,
+                    error_message=str(e),
+                    generation_time=time.time() - start_time
+                )
+            return position, BatchGenerateItem(
+                slide_id=slide.id,
+                page_num=slide.page_num,
+                title=slide.title,
+                image_url=generated.image_url,
+                final_prompt=final_prompt,
+                status=SlideStatus.done,
+                generation_time=time.time() - start_time
+            )
+
     def get_batch_status(self, batch_id: UUID) -> Optional[BatchStatusResponse]:
         """获取批量任务状态"""
         batch_task = self.active_batches.get(batch_id)
@@ -433,6 +542,7 @@ class BatchImageGenerator:
             successful=batch_task.success_count,
             failed=batch_task.failed_count,
             estimated_remaining_time=estimated_remaining_time,
+            total_time=batch_task.total_time,
             results=batch_task.results.copy()
         )
 
@@ -444,20 +554,37 @@ class BatchImageGenerator:
         
         return batch_task.results.copy()
 
-    def cleanup_completed_batches(self, max_age_hours: int = 24):
-        """清理已完成的批量任务"""
+    async def cleanup_completed_batches(self, max_age_hours: int = 24) -> int:
+        """
+        清理已结束超过 max_age_hours 小时的批量任务（内存及持久化存储）
+
+        Returns:
+            int: 清理的任务数量
+        """
         current_time = time.time()
         max_age_seconds = max_age_hours * 3600
         
         completed_batches = [
             batch_id for batch_id, batch_task in self.active_batches.items()
             if batch_task.status in ["completed", "completed_with_errors", "failed"] and
-               (current_time - batch_task.start_time) > max_age_seconds
+               (current_time - (batch_task.finished_at or batch_task.start_time)) > max_age_seconds
         ]
         
         for batch_id in completed_batches:
             del self.active_batches[batch_id]
             self.logger.logger.info(f"Cleaned up batch {batch_id} (older than {max_age_hours}h)")
+        if completed_batches:
+            await self._persist("delete", [str(batch_id) for batch_id in completed_batches])
+        return len(completed_batches)
+
+    async def run_cleanup(self, interval_seconds: float = 3600, max_age_hours: int = 24) -> None:
+        """每隔 interval_seconds 秒清理一次过期任务，直到被取消（由应用生命周期启动）"""
+        while True:
+            try:
+                await self.cleanup_completed_batches(max_age_hours)
+            except Exception as e:
+                self.logger.logger.warning(f"Batch cleanup failed: {e}")
+            await asyncio.sleep(interval_seconds)
 
     def get_active_batches_count(self) -> int:
         """获取活跃的批量任务数量"""
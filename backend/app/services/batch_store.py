@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from ..schemas.generation import BatchGenerateItem
+from ..schemas.slide import SlideData
+
+
+@dataclass
+class StoredBatch:
+    """A batch as persisted: its parameters, every slide and the results recorded so far."""
+
+    batch_id: str
+    style_prompt: str
+    aspect_ratio: str
+    max_workers: int
+    deadline_seconds: Optional[float]
+    weight: float
+    status: str
+    start_time: float
+    finished_at: Optional[float]
+    slides: list[SlideData]
+    results: list[BatchGenerateItem]
+    pending_positions: list[int]
+
+
+class BatchStore:
+    """
+    SQLite store for batch generation jobs.
+
+    One row per batch and one per slide; a slide row gets its result as soon
+    as the slide finishes, so after a restart only slides without a result
+    need to be generated again. Writes are small and committed immediately.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS batches (
+                batch_id TEXT PRIMARY KEY,
+                style_prompt TEXT NOT NULL,
+                aspect_ratio TEXT NOT NULL,
+                max_workers INTEGER NOT NULL,
+                deadline_seconds REAL,
+                weight REAL NOT NULL,
+                status TEXT NOT NULL,
+                start_time REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS batch_slides (
+                batch_id TEXT NOT NULL REFERENCES batches(batch_id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                slide TEXT NOT NULL,
+                result TEXT,
+                completed_seq INTEGER,
+                PRIMARY KEY (batch_id, position)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def create(
+        self,
+        batch_id: str,
+        slides: list[SlideData],
+        style_prompt: str,
+        aspect_ratio: str,
+        max_workers: int,
+        deadline_seconds: Optional[float],
+        weight: float,
+        start_time: float,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO batches (batch_id, style_prompt, aspect_ratio, max_workers, deadline_seconds, weight, "
+                "status, start_time) VALUES (?, ?, ?, ?, ?, ?, 'running', ?)",
+                (batch_id, style_prompt, aspect_ratio, max_workers, deadline_seconds, weight, start_time),
+            )
+            self._conn.executemany(
+                "INSERT INTO batch_slides (batch_id, position, slide) VALUES (?, ?, ?)",
+                [(batch_id, position, slide.model_dump_json()) for position, slide in enumerate(slides)],
+            )
+            self._conn.commit()
+
+    def record_result(self, batch_id: str, position: int, item: BatchGenerateItem, completed_seq: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE batch_slides SET result = ?, completed_seq = ? WHERE batch_id = ? AND position = ?",
+                (item.model_dump_json(), completed_seq, batch_id, position),
+            )
+            self._conn.commit()
+
+    def finish(self, batch_id: str, status: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE batches SET status = ?, finished_at = ? WHERE batch_id = ?",
+                (status, time.time(), batch_id),
+            )
+            self._conn.commit()
+
+    def load_all(self) -> list[StoredBatch]:
+        with self._lock:
+            batches = self._conn.execute(
+                "SELECT batch_id, style_prompt, aspect_ratio, max_workers, deadline_seconds, weight, status, "
+                "start_time, finished_at FROM batches ORDER BY start_time"
+            ).fetchall()
+            slide_rows = self._conn.execute(
+                "SELECT batch_id, slide, result FROM batch_slides ORDER BY batch_id, position"
+            ).fetchall()
+            # Results in completion order, as the in-memory list had them.
+            result_rows = self._conn.execute(
+                "SELECT batch_id, result FROM batch_slides WHERE result IS NOT NULL ORDER BY batch_id, completed_seq"
+            ).fetchall()
+
+        slides: dict[str, list[SlideData]] = {}
+        pending: dict[str, list[int]] = {}
+        for batch_id, slide, result in slide_rows:
+            batch_slides = slides.setdefault(batch_id, [])
+            if result is None:
+                pending.setdefault(batch_id, []).append(len(batch_slides))
+            batch_slides.append(SlideData.model_validate_json(slide))
+        results: dict[str, list[BatchGenerateItem]] = {}
+        for batch_id, result in result_rows:
+            results.setdefault(batch_id, []).append(BatchGenerateItem.model_validate_json(result))
+        return [
+            StoredBatch(
+                batch_id=row[0],
+                style_prompt=row[1],
+                aspect_ratio=row[2],
+                max_workers=row[3],
+                deadline_seconds=row[4],
+                weight=row[5],
+                status=row[6],
+                start_time=row[7],
+                finished_at=row[8],
+                slides=slides.get(row[0], []),
+                results=results.get(row[0], []),
+                pending_positions=pending.get(row[0], []),
+            )
+            for row in batches
+        ]
+
+    def delete(self, batch_ids: list[str]) -> None:
+        if not batch_ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM batch_slides WHERE batch_id = ?", [(batch_id,) for batch_id in batch_ids])
+            self._conn.executemany("DELETE FROM batches WHERE batch_id = ?", [(batch_id,) for batch_id in batch_ids])
+            self._conn.commit()
+
+
+__all__ = ["BatchStore", "StoredBatch"]
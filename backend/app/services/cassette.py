@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+from ..utils.logger import get_logger
+
+REDACTED = "REDACTED"
+_SECRET_HEADERS = {"authorization", "proxy-authorization", "x-api-key", "api-key", "cookie", "set-cookie"}
+_SECRET_PARAMS = {"key", "api_key", "apikey", "token", "access_token", "signature", "sig"}
+
+
+@dataclass(frozen=True)
+class CassetteSettings:
+    mode: str = "off"  # off | record | replay
+    path: Optional[Path] = None
+    replay_speed: float = 1.0  # 1 = original timing, >1 compressed, 0 = no delays
+
+
+def _redact_url(url: str) -> str:
+    parts = urlsplit(url)
+    if not parts.query:
+        return url
+    query = [
+        (name, REDACTED if name.lower() in _SECRET_PARAMS else value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+    ]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _redact_headers(headers: httpx.Headers) -> list[list[str]]:
+    return [
+        [name, REDACTED if name.lower() in _SECRET_HEADERS else value]
+        for name, value in headers.multi_items()
+    ]
+
+
+def _request_key(method: str, url: str, body: bytes) -> str:
+    return f"{method.upper()} {_redact_url(url)} {hashlib.sha256(body).hexdigest()}"
+
+
+def _route_key(method: str, url: str, body: bytes) -> str:
+    """Fallback match: same endpoint and same kind of request (model, streaming, image output)."""
+    parts = urlsplit(url)
+    shape = ""
+    try:
+        payload = json.loads(body) if body else None
+    except ValueError:
+        payload = None
+    if isinstance(payload, dict):
+        shape = json.dumps(
+            [sorted(payload), payload.get("model"), bool(payload.get("stream")), bool(payload.get("modalities"))]
+        )
+    return f"{method.upper()} {parts.scheme}://{parts.netloc}{parts.path} {shape}"
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """Pass response chunks through to the client while noting when each one arrived."""
+
+    def __init__(self, inner: httpx.AsyncByteStream, started: float, on_done) -> None:
+        self._inner = inner
+        self._started = started
+        self._on_done = on_done
+        self._chunks: list[tuple[float, bytes]] = []
+        self._done = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._inner:
+            self._chunks.append((time.perf_counter() - self._started, chunk))
+            yield chunk
+        self._finish(complete=True)
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+        self._finish(complete=False)
+
+    def _finish(self, complete: bool) -> None:
+        if not self._done:
+            self._done = True
+            self._on_done(self._chunks, complete)
+
+
+class _ReplayStream(httpx.AsyncByteStream):
+    def __init__(self, chunks: list[tuple[float, bytes]], started: float, speed: float) -> None:
+        self._chunks = chunks
+        self._started = started
+        self._speed = speed
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for offset, data in self._chunks:
+            if self._speed > 0:
+                delay = offset / self._speed - (time.perf_counter() - self._started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield data
+
+    async def aclose(self) -> None:
+        return None
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Forward requests to the real transport and append each exchange to the cassette."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, cassette: "Cassette") -> None:
+        self._inner = inner
+        self._cassette = cassette
+
+    @property
+    def _pool(self) -> Any:
+        # Lets HTTPClientPool.stats() keep reporting the real connection pool.
+        return getattr(self._inner, "_pool", None)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        started = time.perf_counter()
+        response = await self._inner.handle_async_request(request)
+        headers_at = time.perf_counter() - started
+
+        def on_done(chunks: list[tuple[float, bytes]], complete: bool) -> None:
+            self._cassette.append(request, body, response, headers_at, chunks, complete)
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response.stream, started, on_done),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Answer requests from the cassette without touching the network."""
+
+    def __init__(self, cassette: "Cassette") -> None:
+        self._cassette = cassette
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        started = time.perf_counter()
+        entry = self._cassette.match(request.method, str(request.url), body)
+        if entry is None:
+            return httpx.Response(
+                404,
+                json={"error": {"message": f"No recorded interaction for {request.method} {_redact_url(str(request.url))}"}},
+                request=request,
+            )
+
+        speed = self._cassette.settings.replay_speed
+        response_data = entry["response"]
+        if speed > 0:
+            await asyncio.sleep(response_data.get("headers_at", 0.0) / speed)
+        chunks = [(chunk["t"], base64.b64decode(chunk["data"])) for chunk in response_data.get("chunks", [])]
+        return httpx.Response(
+            status_code=response_data["status"],
+            headers=[tuple(item) for item in response_data.get("headers", [])],
+            stream=_ReplayStream(chunks, started, speed),
+            request=request,
+        )
+
+
+class Cassette:
+    """
+    Record/replay store for gateway HTTP exchanges (one JSON object per line).
+
+    In record mode every request made through the shared HTTP pool is
+    forwarded to the gateway and saved together with the arrival time of
+    each response chunk; credentials in headers and query strings are
+    redacted. In replay mode requests are matched by method, URL and body
+    hash (falling back to method and URL in recorded order) and answered
+    offline with the original or compressed timing.
+    """
+
+    def __init__(self, settings: CassetteSettings) -> None:
+        self.settings = settings
+        self.path = Path(settings.path) if settings.path else Path("data/cassettes/session.jsonl")
+        self.logger = get_logger()
+        self._lock = threading.Lock()
+        self._by_request: dict[str, deque[dict[str, Any]]] = defaultdict(deque)
+        self._by_route: dict[str, deque[dict[str, Any]]] = defaultdict(deque)
+        self.stats = {"recorded": 0, "replayed": 0, "replayed_fuzzy": 0, "misses": 0, "loaded": 0}
+        if settings.mode == "replay":
+            self._load()
+
+    def wrap(self, transport: httpx.AsyncBaseTransport) -> httpx.AsyncBaseTransport:
+        if self.settings.mode == "record":
+            return RecordingTransport(transport, self)
+        if self.settings.mode == "replay":
+            return ReplayTransport(self)
+        return transport
+
+    def append(
+        self,
+        request: httpx.Request,
+        body: bytes,
+        response: httpx.Response,
+        headers_at: float,
+        chunks: list[tuple[float, bytes]],
+        complete: bool,
+    ) -> None:
+        entry = {
+            "recorded_at": time.time(),
+            "request": {
+                "method": request.method,
+                "url": _redact_url(str(request.url)),
+                "headers": _redact_headers(request.headers),
+                "body_sha256": hashlib.sha256(body).hexdigest(),
+                "body": body.decode("utf-8", errors="replace"),
+            },
+            "response": {
+                "status": response.status_code,
+                "headers": _redact_headers(response.headers),
+                "headers_at": round(headers_at, 4),
+                "complete": complete,
+                "chunks": [
+                    {"t": round(offset, 4), "data": base64.b64encode(data).decode("ascii")}
+                    for offset, data in chunks
+                ],
+            },
+        }
+        line = json.dumps(entry, ensure_ascii=False)
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as handle:
+                    handle.write(line + "\n")
+            self.stats["recorded"] += 1
+        except OSError as exc:
+            self.logger.warning(f"Failed to write cassette {self.path}: {exc}")
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            self.logger.warning(f"Cassette not found for replay: {self.path}")
+            return
+        with open(self.path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    request = entry["request"]
+                except (ValueError, KeyError) as exc:
+                    self.logger.warning(f"Skipping malformed cassette entry: {exc}")
+                    continue
+                key = f"{request['method'].upper()} {request['url']} {request['body_sha256']}"
+                self._by_request[key].append(entry)
+                recorded_body = request.get("body", "").encode("utf-8")
+                self._by_route[_route_key(request["method"], request["url"], recorded_body)].append(entry)
+                self.stats["loaded"] += 1
+        self.logger.logger.info(f"Loaded {self.stats['loaded']} recorded interactions from {self.path}")
+
+    @staticmethod
+    def _take(queue: deque[dict[str, Any]]) -> dict[str, Any]:
+        # Rotate so repeated identical requests replay recordings in order, then cycle.
+        entry = queue[0]
+        queue.rotate(-1)
+        return entry
+
+    def match(self, method: str, url: str, body: bytes) -> Optional[dict[str, Any]]:
+        exact = self._by_request.get(_request_key(method, url, body))
+        if exact:
+            self.stats["replayed"] += 1
+            return self._take(exact)
+        fuzzy = self._by_route.get(_route_key(method, url, body))
+        if fuzzy:
+            self.stats["replayed_fuzzy"] += 1
+            return self._take(fuzzy)
+        self.stats["misses"] += 1
+        return None
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "mode": self.settings.mode,
+            "path": str(self.path),
+            "replay_speed": self.settings.replay_speed,
+            **self.stats,
+        }
+
+
+# 全局录制/回放实例
+_cassette: Optional[Cassette] = None
+
+
+def configure_cassette(settings: CassetteSettings) -> Optional[Cassette]:
+    """按配置切换录制/回放模式，配置未变化时复用现有实例；关闭时返回None"""
+    global _cassette
+    if _cassette is not None and _cassette.settings == settings:
+        return _cassette
+    _cassette = Cassette(settings) if settings.mode in {"record", "replay"} else None
+    return _cassette
+
+
+def get_cassette() -> Optional[Cassette]:
+    """获取当前的录制/回放实例（未启用时为None）"""
+    return _cassette
+
+
+__all__ = [
+    "Cassette",
+    "CassetteSettings",
+    "RecordingTransport",
+    "ReplayTransport",
+    "configure_cassette",
+    "get_cassette",
+]
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Iterator, Optional
+
+from ..utils.logger import get_logger
+from .deadline import DeadlineExceeded
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is rejected because its breaker is open."""
+
+
+@dataclass(frozen=True)
+class BreakerPolicy:
+    failure_threshold: int = 3
+    reset_timeout_seconds: float = 30.0
+    half_open_max_calls: int = 1
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker for one (base_url, strategy).
+
+    closed -> open after `failure_threshold` consecutive failures; open
+    rejects immediately until `reset_timeout_seconds` have passed; then
+    half_open lets `half_open_max_calls` probes through, closing on success
+    and re-opening on failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        key: tuple[str, str],
+        policy: BreakerPolicy,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.key = key
+        self.policy = policy
+        self._clock = clock
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_in_flight = 0
+        self.last_error: Optional[str] = None
+        self.stats = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+        self.logger = get_logger()
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        self.logger.logger.info(f"Circuit {self.key[0]} [{self.key[1]}]: {self.state} -> {state}")
+        self.state = state
+        if state == self.OPEN:
+            self.opened_at = self._clock()
+            self.stats["opened"] += 1
+        if state != self.HALF_OPEN:
+            self.half_open_in_flight = 0
+
+    def allow(self) -> bool:
+        """Return True when a call may proceed; reserves a probe slot in half-open state."""
+        if self.state == self.OPEN:
+            if self._clock() - self.opened_at < self.policy.reset_timeout_seconds:
+                self.stats["rejected"] += 1
+                return False
+            self._transition(self.HALF_OPEN)
+
+        if self.state == self.HALF_OPEN:
+            if self.half_open_in_flight >= self.policy.half_open_max_calls:
+                self.stats["rejected"] += 1
+                return False
+            self.half_open_in_flight += 1
+        return True
+
+    def record_success(self) -> None:
+        self.stats["successes"] += 1
+        self.consecutive_failures = 0
+        self._transition(self.CLOSED)
+
+    def record_failure(self, error: Optional[str] = None) -> None:
+        self.stats["failures"] += 1
+        self.consecutive_failures += 1
+        self.last_error = error
+        if self.state == self.HALF_OPEN:
+            self.half_open_in_flight = max(self.half_open_in_flight - 1, 0)
+            self._transition(self.OPEN)
+        elif self.consecutive_failures >= self.policy.failure_threshold:
+            self._transition(self.OPEN)
+
+    def _abandon(self) -> None:
+        # Cancelled calls say nothing about gateway health; just free the probe slot.
+        if self.state == self.HALF_OPEN:
+            self.half_open_in_flight = max(self.half_open_in_flight - 1, 0)
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Run a block under this breaker; exceptions count as failures."""
+        if not self.allow():
+            remaining = self.policy.reset_timeout_seconds - (self._clock() - self.opened_at)
+            raise CircuitOpenError(
+                f"circuit open for {self.key[0]} [{self.key[1]}], retry in {max(remaining, 0):.0f}s"
+            )
+        try:
+            yield
+        except DeadlineExceeded:
+            # The caller ran out of time budget; that says little about gateway health.
+            self._abandon()
+            raise
+        except Exception as exc:
+            self.record_failure(str(exc)[:300])
+            raise
+        except BaseException:
+            self._abandon()
+            raise
+        else:
+            self.record_success()
+
+    def reset(self) -> None:
+        self.consecutive_failures = 0
+        self._transition(self.CLOSED)
+
+    def snapshot(self) -> dict[str, Any]:
+        retry_in = None
+        if self.state == self.OPEN:
+            retry_in = round(max(self.policy.reset_timeout_seconds - (self._clock() - self.opened_at), 0.0), 1)
+        return {
+            "base_url": self.key[0],
+            "strategy": self.key[1],
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in_seconds": retry_in,
+            "last_error": self.last_error,
+            **self.stats,
+        }
+
+
+class CircuitBreakerRegistry:
+    """Process-wide breakers keyed by (base_url, strategy)."""
+
+    def __init__(self, policy: Optional[BreakerPolicy] = None, clock: Callable[[], float] = time.monotonic) -> None:
+        self.policy = policy or BreakerPolicy()
+        self._clock = clock
+        self._breakers: dict[tuple[str, str], CircuitBreaker] = {}
+
+    def configure(self, policy: BreakerPolicy) -> None:
+        self.policy = policy
+        for breaker in self._breakers.values():
+            breaker.policy = policy
+
+    def get(self, base_url: str, strategy: str) -> CircuitBreaker:
+        key = (base_url.rstrip("/"), strategy)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(key, self.policy, self._clock)
+            self._breakers[key] = breaker
+        return breaker
+
+    def reset(self, base_url: Optional[str] = None) -> int:
+        """Close breakers (optionally only those of one gateway); returns how many were reset."""
+        count = 0
+        for (breaker_base, _), breaker in self._breakers.items():
+            if base_url is None or breaker_base == base_url.rstrip("/"):
+                breaker.reset()
+                count += 1
+        return count
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "policy": asdict(self.policy),
+            "breakers": [breaker.snapshot() for breaker in self._breakers.values()],
+        }
+
+
+# 全局熔断器实例
+_circuit_breakers: Optional[CircuitBreakerRegistry] = None
+
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """获取全局熔断器注册表"""
+    global _circuit_breakers
+    if _circuit_breakers is None:
+        _circuit_breakers = CircuitBreakerRegistry()
+    return _circuit_breakers
+
+
+__all__ = [
+    "BreakerPolicy",
+    "CircuitBreaker",
+    "CircuitBreakerRegistry",
+    "CircuitOpenError",
+    "get_circuit_breakers",
+]
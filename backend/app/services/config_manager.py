@@ -13,6 +13,7 @@ from pydantic import ValidationError
 
 from ..schemas.config import AppConfig
 from ..utils.logger import get_logger
+from .endpoint_resolver import get_endpoint_resolver
 
 
 class ConfigManager:
@@ -51,6 +52,15 @@ class ConfigManager:
             image_output_dir=self._resolve_runtime_path(os.getenv("IMAGE_OUTPUT_DIR", "generated/images")),
             pptx_output_dir=self._resolve_runtime_path(os.getenv("PPTX_OUTPUT_DIR", "generated/pptx")),
             template_store_path=self._resolve_runtime_path(os.getenv("TEMPLATE_STORE_PATH", "data/templates.json")),
+            llm_cache_path=self._resolve_runtime_path(os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite3")),
+            batch_store_path=self._resolve_runtime_path(os.getenv("BATCH_STORE_PATH", "data/batches.sqlite3")),
+            image_strategy_memory_path=self._resolve_runtime_path(
+                os.getenv("IMAGE_STRATEGY_MEMORY_PATH", "data/image_strategies.json")
+            ),
+            cassette_mode=os.getenv("LLM_CASSETTE_MODE", "off"),
+            cassette_path=self._resolve_runtime_path(
+                os.getenv("LLM_CASSETTE_PATH", "data/cassettes/session.jsonl")
+            ),
             
             allowed_origins=os.getenv("ALLOWED_ORIGINS", "http://localhost:5173,https://your-domain.com").split(","),
             
@@ -75,7 +85,8 @@ class ConfigManager:
 
     def _normalize_config_paths(self, config_data: Dict) -> Dict:
         normalized = dict(config_data)
-        for field_name in ("image_output_dir", "pptx_output_dir", "template_store_path"):
+        for field_name in ("image_output_dir", "pptx_output_dir", "template_store_path", "llm_cache_path",
+                           "image_strategy_memory_path", "cassette_path", "batch_store_path"):
             field_value = normalized.get(field_name)
             if isinstance(field_value, str) and field_value.strip():
                 normalized[field_name] = self._resolve_runtime_path(field_value)
@@ -266,6 +277,8 @@ class ConfigManager:
             if self._save_to_file(new_config):
                 self._config = new_config
                 self._last_loaded = time.time()
+                # 网关配置可能已变化，重新探测端点
+                get_endpoint_resolver().reset()
                 self.logger.logger.info("配置更新成功")
                 return True
             else:
@@ -288,6 +301,7 @@ class ConfigManager:
         if self._save_to_file(self._default_config):
             self._config = self._default_config
             self._last_loaded = time.time()
+            get_endpoint_resolver().reset()
             self.logger.logger.info("已重置为默认配置")
             return True
         else:
@@ -301,7 +315,7 @@ class ConfigManager:
             是否已配置
         """
         config = self.get_config()
-        return bool(config.llm_api_key.strip())
+        return bool(config.llm_api_key.strip() or config.llm_chat_pool)
     
     def validate_config(self, config: AppConfig) -> list[str]:
         """
@@ -315,8 +329,8 @@ class ConfigManager:
         """
         errors = []
         
-        # 检查API密钥
-        if not config.llm_api_key.strip():
+        # 检查API密钥（配置了文本生成网关池时可留空）
+        if not config.llm_api_key.strip() and not config.llm_chat_pool:
             errors.append("API密钥不能为空")
         
         # 检查API基础地址
@@ -331,6 +345,14 @@ class ConfigManager:
             config.llm_image_api_base.startswith('https://')
         ):
             errors.append("图像API基础地址必须以http://或https://开头")
+
+        for pool_name, entries in (("文本生成网关池", config.llm_chat_pool), ("图像生成网关池", config.llm_image_pool)):
+            for index, entry in enumerate(entries, start=1):
+                if entry.base_url.strip() and not entry.base_url.startswith(("http://", "https://")):
+                    errors.append(f"{pool_name}第{index}个成员的网关地址必须以http://或https://开头")
+        
+        if config.retry_backoff_base_seconds > config.retry_backoff_max_seconds:
+            errors.append("重试退避的初始等待时间不能大于最长等待时间")
         
         # 检查超时时间
         if config.llm_timeout_seconds < 30 or config.llm_timeout_seconds > 300:
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request's end-to-end time budget has run out."""
+
+
+class Deadline:
+    """
+    End-to-end time budget shared by every attempt of one logical request.
+
+    Created once by the caller and passed down, so retries, endpoint
+    candidates and fallback strategies all draw from the same budget
+    instead of each getting the full per-request timeout.
+    """
+
+    def __init__(self, seconds: float) -> None:
+        self.budget = float(seconds)
+        self.expires_at = time.monotonic() + self.budget
+
+    @classmethod
+    def after(cls, seconds: Optional[float]) -> Optional["Deadline"]:
+        """Build a deadline, or None when `seconds` is empty or 0 (no deadline)."""
+        if not seconds or seconds <= 0:
+            return None
+        return cls(seconds)
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def timeout(self, cap: float) -> float:
+        """Per-attempt timeout: `cap`, shortened to what is left of the budget."""
+        remaining = self.remaining()
+        if remaining <= 0.0:
+            raise DeadlineExceeded(f"deadline of {self.budget:g}s exceeded")
+        return min(cap, remaining)
+
+    def allows_wait(self, seconds: float) -> bool:
+        """Whether sleeping `seconds` (e.g. a retry backoff) still leaves time for another attempt."""
+        return self.remaining() > seconds
+
+
+__all__ = ["Deadline", "DeadlineExceeded"]
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Optional
+
+from ..utils.logger import get_logger
+
+# Statuses that say the URL itself is wrong for this gateway. 429, 5xx and
+# network errors say nothing about the path and never mark a candidate bad.
+WRONG_PATH_STATUSES = frozenset({404, 405, 501})
+
+
+class EndpointResolver:
+    """
+    Remember which endpoint candidate works for each (base_url, path).
+
+    `OpenRouterClient` tries the learned URL first and skips candidates that
+    answered with a wrong-path status (see `WRONG_PATH_STATUSES`). A skipped
+    candidate is probed again after `bad_ttl_seconds`; `reset()`, which the
+    config manager calls whenever the gateway configuration changes, forgets
+    everything at once.
+    """
+
+    def __init__(self, bad_ttl_seconds: float = 600.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.logger = get_logger()
+        self.bad_ttl_seconds = bad_ttl_seconds
+        self._clock = clock
+        self._preferred: dict[tuple[str, str], str] = {}
+        # (base_url, path) -> {url: time after which the url is tried again}
+        self._bad: dict[tuple[str, str], dict[str, float]] = {}
+
+    def _known_bad(self, key: tuple[str, str]) -> dict[str, float]:
+        now = self._clock()
+        bad = self._bad.get(key, {})
+        for url in [url for url, expires_at in bad.items() if expires_at <= now]:
+            del bad[url]
+        return bad
+
+    def order(self, base_url: str, path: str, candidates: list[str]) -> list[str]:
+        """Return candidates with the learned URL first and known-bad URLs removed."""
+        key = (base_url, path)
+        bad = self._known_bad(key)
+        usable = [url for url in candidates if url not in bad]
+        if not usable:
+            # Nothing left to try: fall back to the full list rather than failing outright.
+            usable = list(candidates)
+
+        preferred = self._preferred.get(key)
+        if preferred in usable:
+            usable.remove(preferred)
+            usable.insert(0, preferred)
+        return usable
+
+    def record_success(self, base_url: str, path: str, url: str, failed: Optional[list[str]] = None) -> None:
+        """
+        Remember `url` as the working candidate.
+
+        `failed` lists the candidates tried before it that answered with a
+        wrong-path status; they are skipped for `bad_ttl_seconds`.
+        """
+        key = (base_url, path)
+        self._known_bad(key)
+        bad = self._bad.setdefault(key, {})
+        bad.pop(url, None)
+        newly_bad = [candidate for candidate in (failed or []) if candidate != url and candidate not in bad]
+        expires_at = self._clock() + self.bad_ttl_seconds
+        for candidate in newly_bad:
+            bad[candidate] = expires_at
+        if self._preferred.get(key) != url or newly_bad:
+            self.logger.logger.info(
+                f"Endpoint resolved for {base_url} {path}: {url}"
+                + (f" (skipping {', '.join(newly_bad)})" if newly_bad else "")
+            )
+        self._preferred[key] = url
+
+    def reset(self) -> None:
+        """Forget everything learned so the next request probes all candidates again."""
+        if self._preferred or self._bad:
+            self.logger.logger.info("Endpoint resolution cache cleared")
+        self._preferred.clear()
+        self._bad.clear()
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        keys = set(self._preferred) | set(self._bad)
+        return [
+            {
+                "base_url": base_url,
+                "path": path,
+                "preferred": self._preferred.get((base_url, path)),
+                "known_bad": sorted(self._known_bad((base_url, path))),
+            }
+            for base_url, path in sorted(keys)
+        ]
+
+
+# 全局端点解析器实例
+_endpoint_resolver: Optional[EndpointResolver] = None
+
+
+def get_endpoint_resolver() -> EndpointResolver:
+    """获取全局端点解析器实例"""
+    global _endpoint_resolver
+    if _endpoint_resolver is None:
+        _endpoint_resolver = EndpointResolver()
+    return _endpoint_resolver
+
+
+__all__ = ["EndpointResolver", "WRONG_PATH_STATUSES", "get_endpoint_resolver"]
@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Iterable, Optional
+
+import httpx
+
+from ..utils.logger import get_logger
+
+
+@dataclass(frozen=True)
+class GatewayMemberSpec:
+    """One pool entry: an API key on a gateway, with its routing weight and concurrency cap."""
+
+    name: str
+    api_key: str
+    base_url: str
+    weight: float = 1.0
+    max_concurrency: int = 8
+
+    @property
+    def identity(self) -> tuple[str, str]:
+        return (self.base_url.rstrip("/"), self.api_key)
+
+
+@dataclass(frozen=True)
+class PoolPolicy:
+    drain_seconds: float = 30.0
+    failure_threshold: int = 3
+
+
+class GatewayMember:
+    """
+    Runtime state of one pool member.
+
+    A member is drained (skipped by routing) after a 429 - for the gateway's
+    `retry-after` when given, otherwise `drain_seconds` - or after
+    `failure_threshold` consecutive 5xx replies or transport errors. 4xx
+    replies (a bad prompt, a validation error) say nothing about the member
+    and are not counted.
+    """
+
+    def __init__(self, spec: GatewayMemberSpec, policy: PoolPolicy) -> None:
+        self.spec = spec
+        self.policy = policy
+        self.in_flight = 0
+        self.drained_until = 0.0
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.has_peers = False
+        self.created_at = time.monotonic()
+        self._slot_seconds = 0.0
+        self._last_change = self.created_at
+        self.stats = {"leases": 0, "successes": 0, "failures": 0, "throttled": 0, "drained": 0, "failovers": 0}
+
+    @property
+    def name(self) -> str:
+        return self.spec.name
+
+    @property
+    def rate_limit_scope(self) -> str:
+        # Each key gets its own limiter window instead of sharing the gateway's.
+        return f"{self.spec.base_url.rstrip('/')}#{self.spec.name}"
+
+    def should_fail_over(self) -> bool:
+        """True when retrying on this member is pointless because another member can take the call."""
+        return self.has_peers and self.is_drained()
+
+    def is_drained(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.monotonic()) < self.drained_until
+
+    def has_capacity(self) -> bool:
+        return self.in_flight < self.spec.max_concurrency
+
+    def load(self) -> float:
+        return (self.in_flight + 1) / self.spec.weight
+
+    def _track(self, delta: int) -> None:
+        now = time.monotonic()
+        self._slot_seconds += self.in_flight * (now - self._last_change)
+        self._last_change = now
+        self.in_flight = max(self.in_flight + delta, 0)
+
+    def _drain(self, seconds: float, reason: str) -> None:
+        until = time.monotonic() + seconds
+        if until > self.drained_until:
+            if not self.is_drained():
+                self.stats["drained"] += 1
+                get_logger().logger.warning(f"Gateway pool member {self.name} drained for {seconds:g}s: {reason}")
+            self.drained_until = until
+
+    def observe(self, response: httpx.Response) -> None:
+        """Classify one gateway response (called by the member's client for every HTTP reply)."""
+        if response.status_code == 429:
+            self.stats["throttled"] += 1
+            retry_after = response.headers.get("retry-after")
+            try:
+                seconds = float(retry_after) if retry_after else self.policy.drain_seconds
+            except ValueError:
+                seconds = self.policy.drain_seconds
+            self._drain(max(seconds, 1.0), "HTTP 429")
+        elif response.status_code >= 500:
+            self.record_failure(f"HTTP {response.status_code}")
+        elif response.status_code < 400:
+            self.consecutive_failures = 0
+
+    def observe_error(self, exc: BaseException) -> None:
+        """Count a transport failure (connect error, timeout, dropped connection) of the member's client."""
+        self.record_failure(f"{type(exc).__name__}: {exc}")
+
+    def record_success(self) -> None:
+        self.stats["successes"] += 1
+        self.consecutive_failures = 0
+
+    def record_failure(self, error: str) -> None:
+        self.stats["failures"] += 1
+        self.consecutive_failures += 1
+        self.last_error = error[:300]
+        if self.consecutive_failures >= self.policy.failure_threshold:
+            self._drain(self.policy.drain_seconds, f"{self.consecutive_failures} consecutive failures")
+
+    def snapshot(self) -> dict[str, Any]:
+        now = time.monotonic()
+        slot_seconds = self._slot_seconds + self.in_flight * (now - self._last_change)
+        elapsed = max(now - self.created_at, 1e-6)
+        return {
+            "name": self.name,
+            "base_url": self.spec.base_url,
+            "api_key": f"...{self.spec.api_key[-4:]}" if len(self.spec.api_key) > 8 else "***",
+            "weight": self.spec.weight,
+            "max_concurrency": self.spec.max_concurrency,
+            "in_flight": self.in_flight,
+            "utilisation": round(self.in_flight / self.spec.max_concurrency, 3),
+            "avg_utilisation": round(slot_seconds / (elapsed * self.spec.max_concurrency), 3),
+            "drained_for_seconds": round(max(self.drained_until - now, 0.0), 1),
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            **self.stats,
+        }
+
+
+class GatewayPool:
+    """
+    Weighted routing across several (api_key, base_url) members.
+
+    `lease()` picks the healthy member with the lowest weighted load
+    ((in_flight + 1) / weight) that still has free concurrency, waiting when
+    every member is full. When all members are drained the one that recovers
+    first is used rather than failing outright.
+    """
+
+    def __init__(self, name: str, specs: Iterable[GatewayMemberSpec], policy: Optional[PoolPolicy] = None) -> None:
+        self.name = name
+        self.policy = policy or PoolPolicy()
+        self.members: list[GatewayMember] = []
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self.stats = {"waited": 0, "wait_seconds_total": 0.0}
+        self.configure(specs, self.policy)
+
+    def configure(self, specs: Iterable[GatewayMemberSpec], policy: PoolPolicy) -> None:
+        # Members whose key and gateway are unchanged keep their runtime state.
+        existing = {member.spec.identity: member for member in self.members}
+        members: list[GatewayMember] = []
+        for spec in specs:
+            member = existing.get(spec.identity)
+            if member is None:
+                member = GatewayMember(spec, policy)
+            else:
+                member.spec = spec
+                member.policy = policy
+            members.append(member)
+        for member in members:
+            member.has_peers = len(members) > 1
+        self.members = members
+        self.policy = policy
+        self._wake()
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def _pick(self, exclude: set[str]) -> Optional[GatewayMember]:
+        now = time.monotonic()
+        candidates = [member for member in self.members if member.name not in exclude] or self.members
+        healthy = [member for member in candidates if not member.is_drained(now)]
+        if not healthy:
+            # Everything is drained: use whoever recovers first instead of failing.
+            soonest = min(member.drained_until for member in candidates)
+            healthy = [member for member in candidates if member.drained_until == soonest]
+        free = [member for member in healthy if member.has_capacity()]
+        if not free:
+            return None
+        lowest = min(member.load() for member in free)
+        return random.choice([member for member in free if member.load() == lowest])
+
+    async def _acquire(self, exclude: set[str]) -> GatewayMember:
+        start = time.monotonic()
+        waited = False
+        while True:
+            member = self._pick(exclude)
+            if member is not None:
+                break
+            waited = True
+            future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+            self._waiters.append(future)
+            try:
+                # Re-check periodically: a drained member may recover without a release.
+                await asyncio.wait_for(asyncio.shield(future), 1.0)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                if future in self._waiters:
+                    self._waiters.remove(future)
+        member._track(+1)
+        member.stats["leases"] += 1
+        if waited:
+            self.stats["waited"] += 1
+            self.stats["wait_seconds_total"] += time.monotonic() - start
+        return member
+
+    def _wake(self) -> None:
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done() and not future.get_loop().is_closed():
+                future.get_loop().call_soon_threadsafe(_resolve, future)
+
+    @asynccontextmanager
+    async def lease(self, exclude: Optional[set[str]] = None) -> AsyncIterator[GatewayMember]:
+        """
+        Hold one member for the duration of a call.
+
+        Failures are counted where they happen, once per HTTP reply or transport
+        error (`observe` / `observe_error`, called by the member's client); an
+        exception leaving the lease may be a 4xx or the caller's own error and
+        is not counted again here.
+        """
+        member = await self._acquire(exclude or set())
+        try:
+            yield member
+            member.record_success()
+        finally:
+            member._track(-1)
+            self._wake()
+
+    def capacity(self) -> int:
+        return sum(member.spec.max_concurrency for member in self.members)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "policy": asdict(self.policy),
+            "capacity": self.capacity(),
+            "in_flight": sum(member.in_flight for member in self.members),
+            "queued": len(self._waiters),
+            "waited": self.stats["waited"],
+            "wait_seconds_total": round(self.stats["wait_seconds_total"], 3),
+            "members": [member.snapshot() for member in self.members],
+        }
+
+
+class GatewayPoolRegistry:
+    """Process-wide pools by purpose ("chat", "image")."""
+
+    def __init__(self) -> None:
+        self._pools: dict[str, GatewayPool] = {}
+
+    def configure(self, name: str, specs: Iterable[GatewayMemberSpec], policy: PoolPolicy) -> Optional[GatewayPool]:
+        """Create or update a pool; an empty member list removes it and returns None."""
+        specs = list(specs)
+        if not specs:
+            self._pools.pop(name, None)
+            return None
+        pool = self._pools.get(name)
+        if pool is None:
+            pool = GatewayPool(name, specs, policy)
+            self._pools[name] = pool
+        else:
+            pool.configure(specs, policy)
+        return pool
+
+    def get(self, name: str) -> Optional[GatewayPool]:
+        return self._pools.get(name)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {name: pool.snapshot() for name, pool in self._pools.items()}
+
+
+def member_specs(entries: Iterable[Any], default_base_url: str) -> list[GatewayMemberSpec]:
+    """Build member specs from config entries (objects or dicts with api_key/base_url/weight/...)."""
+    specs: list[GatewayMemberSpec] = []
+    seen: set[str] = set()
+    for index, entry in enumerate(entries, start=1):
+        data = entry if isinstance(entry, dict) else entry.dict()
+        name = (data.get("name") or "").strip() or f"member-{index}"
+        if name in seen:
+            name = f"{name}-{index}"
+        seen.add(name)
+        specs.append(
+            GatewayMemberSpec(
+                name=name,
+                api_key=data["api_key"].strip(),
+                base_url=((data.get("base_url") or "").strip() or default_base_url).rstrip("/"),
+                weight=float(data.get("weight", 1.0)),
+                max_concurrency=int(data.get("max_concurrency", 8)),
+            )
+        )
+    return specs
+
+
+def _resolve(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+# 全局网关池实例
+_gateway_pools: Optional[GatewayPoolRegistry] = None
+
+
+def get_gateway_pools() -> GatewayPoolRegistry:
+    """获取全局网关池注册表"""
+    global _gateway_pools
+    if _gateway_pools is None:
+        _gateway_pools = GatewayPoolRegistry()
+    return _gateway_pools
+
+
+__all__ = [
+    "GatewayMember",
+    "GatewayMemberSpec",
+    "GatewayPool",
+    "GatewayPoolRegistry",
+    "PoolPolicy",
+    "get_gateway_pools",
+    "member_specs",
+]
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Optional
+
+from .hedging import LatencyTracker
+
+# Lanes in priority order: a free slot always goes to the first non-empty lane.
+LANES = ("interactive", "batch")
+
+
+@dataclass(frozen=True)
+class SchedulerPolicy:
+    max_concurrency: int = 16
+
+
+@dataclass
+class Ticket:
+    """One granted generation slot."""
+
+    lane: str
+    flow: str
+    weight: float
+    enqueued_at: float = field(default_factory=time.monotonic)
+    wait_seconds: float = 0.0
+    future: Optional[asyncio.Future[None]] = None
+
+
+class GenerationScheduler:
+    """
+    Process-wide admission control for image generations.
+
+    At most `max_concurrency` generations run at once. When a slot frees,
+    the interactive lane (single-slide generate/regenerate) is served before
+    the batch lane. Within a lane, slots are shared between flows (one flow
+    per batch) by weight: the next slot goes to the flow with the lowest
+    (running + 1) / weight, oldest waiter first, so a large batch cannot
+    starve a small one.
+    """
+
+    def __init__(self, policy: Optional[SchedulerPolicy] = None) -> None:
+        self.policy = policy or SchedulerPolicy()
+        self.running = 0
+        self._queues: dict[str, list[Ticket]] = {lane: [] for lane in LANES}
+        self._flow_running: dict[str, int] = defaultdict(int)
+        self._flow_lane: dict[str, str] = {}
+        self._wait_times = {lane: LatencyTracker() for lane in LANES}
+        self.stats = {
+            lane: {"granted": 0, "queued": 0, "cancelled": 0, "wait_seconds_total": 0.0, "max_wait_seconds": 0.0}
+            for lane in LANES
+        }
+
+    def configure(self, policy: SchedulerPolicy) -> None:
+        self.policy = policy
+        self._dispatch()
+
+    def _grant(self, ticket: Ticket) -> None:
+        ticket.wait_seconds = time.monotonic() - ticket.enqueued_at
+        self.running += 1
+        self._flow_running[ticket.flow] += 1
+        self._flow_lane[ticket.flow] = ticket.lane
+        stats = self.stats[ticket.lane]
+        stats["granted"] += 1
+        stats["wait_seconds_total"] += ticket.wait_seconds
+        stats["max_wait_seconds"] = max(stats["max_wait_seconds"], ticket.wait_seconds)
+        self._wait_times[ticket.lane].observe(ticket.wait_seconds)
+
+    def _release(self, ticket: Ticket) -> None:
+        self.running -= 1
+        self._flow_running[ticket.flow] -= 1
+        if self._flow_running[ticket.flow] <= 0:
+            del self._flow_running[ticket.flow]
+            if not any(waiting.flow == ticket.flow for waiting in self._queues[ticket.lane]):
+                self._flow_lane.pop(ticket.flow, None)
+        self._dispatch()
+
+    def _next(self) -> Optional[Ticket]:
+        for lane in LANES:
+            queue = self._queues[lane]
+            if queue:
+                ticket = min(
+                    queue,
+                    key=lambda waiting: ((self._flow_running[waiting.flow] + 1) / waiting.weight, waiting.enqueued_at),
+                )
+                queue.remove(ticket)
+                return ticket
+        return None
+
+    def _dispatch(self) -> None:
+        while self.running < self.policy.max_concurrency:
+            ticket = self._next()
+            if ticket is None:
+                return
+            if ticket.future.cancelled():
+                # Cancelled, but its task has not run the handler in _acquire yet.
+                continue
+            self._grant(ticket)
+            ticket.future.set_result(None)
+
+    async def _acquire(self, ticket: Ticket) -> None:
+        if self.running < self.policy.max_concurrency and not any(self._queues.values()):
+            self._grant(ticket)
+            return
+        ticket.future = asyncio.get_running_loop().create_future()
+        self._queues[ticket.lane].append(ticket)
+        self.stats[ticket.lane]["queued"] += 1
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # Granted just before the cancellation: hand the slot on.
+                self._release(ticket)
+            elif ticket in self._queues[ticket.lane]:
+                self._queues[ticket.lane].remove(ticket)
+            self.stats[ticket.lane]["cancelled"] += 1
+            raise
+
+    @asynccontextmanager
+    async def slot(self, lane: str = "interactive", flow: str = "", weight: float = 1.0) -> AsyncIterator[Ticket]:
+        """Hold one generation slot; `flow` groups the calls of one batch for fair sharing."""
+        if lane not in self._queues:
+            raise ValueError(f"unknown scheduler lane: {lane}")
+        ticket = Ticket(lane=lane, flow=flow or lane, weight=max(weight, 0.01))
+        await self._acquire(ticket)
+        try:
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    def snapshot(self) -> dict[str, Any]:
+        flows: dict[str, dict[str, Any]] = {}
+        for lane, queue in self._queues.items():
+            for ticket in queue:
+                flow = flows.setdefault(ticket.flow, {"lane": lane, "weight": ticket.weight, "running": 0, "queued": 0})
+                flow["queued"] += 1
+        for name, running in self._flow_running.items():
+            flow = flows.setdefault(name, {"lane": self._flow_lane.get(name), "weight": None, "running": 0, "queued": 0})
+            flow["running"] = running
+        return {
+            "policy": asdict(self.policy),
+            "running": self.running,
+            "lanes": {
+                lane: {
+                    "queue_depth": len(self._queues[lane]),
+                    "running": sum(
+                        running for name, running in self._flow_running.items() if self._flow_lane.get(name) == lane
+                    ),
+                    **{key: round(value, 3) if isinstance(value, float) else value for key, value in stats.items()},
+                    "p50_wait_seconds": _round(self._wait_times[lane].percentile(0.5)),
+                    "p95_wait_seconds": _round(self._wait_times[lane].percentile(0.95)),
+                }
+                for lane, stats in self.stats.items()
+            },
+            "flows": flows,
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+# 全局图像生成调度器实例
+_generation_scheduler: Optional[GenerationScheduler] = None
+
+
+def get_generation_scheduler() -> GenerationScheduler:
+    """获取全局图像生成调度器实例"""
+    global _generation_scheduler
+    if _generation_scheduler is None:
+        _generation_scheduler = GenerationScheduler()
+    return _generation_scheduler
+
+
+__all__ = ["GenerationScheduler", "LANES", "SchedulerPolicy", "Ticket", "get_generation_scheduler"]
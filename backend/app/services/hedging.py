@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from ..utils.logger import get_logger
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    enabled: bool = False
+    percentile: float = 0.9
+    min_delay_seconds: float = 10.0
+    budget_per_minute: int = 6
+    min_samples: int = 10
+
+
+class LatencyTracker:
+    """Recent successful latencies for one (base_url, model)."""
+
+    def __init__(self, max_samples: int = 200) -> None:
+        self._samples: deque[float] = deque(maxlen=max_samples)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(int(fraction * len(ordered)), len(ordered) - 1)
+        return ordered[index]
+
+
+class ImageRequestHedger:
+    """
+    Fire a second (hedge) request when the first is slower than usual.
+
+    The hedge delay is the configured percentile of recently observed
+    latency for the same gateway and model. The first successful response
+    wins and the other request is cancelled. Hedges are limited by a
+    process-wide per-minute budget so the extra cost stays bounded.
+    """
+
+    def __init__(self, policy: Optional[HedgePolicy] = None) -> None:
+        self.policy = policy or HedgePolicy()
+        self.logger = get_logger()
+        self._trackers: dict[tuple[str, str], LatencyTracker] = {}
+        self._spent: deque[float] = deque()
+        self.stats = {
+            "requests": 0,
+            "hedges_fired": 0,
+            "hedge_wins": 0,
+            "primary_wins": 0,
+            "budget_exhausted": 0,
+        }
+
+    def configure(self, policy: HedgePolicy) -> None:
+        if policy == self.policy:
+            return
+        self.policy = policy
+        self.logger.logger.info(f"请求对冲配置已更新: {asdict(policy)}")
+
+    def _tracker(self, base_url: str, model: str) -> LatencyTracker:
+        key = (base_url.rstrip("/"), model)
+        tracker = self._trackers.get(key)
+        if tracker is None:
+            tracker = LatencyTracker()
+            self._trackers[key] = tracker
+        return tracker
+
+    def hedge_delay(self, base_url: str, model: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging should not happen."""
+        if not self.policy.enabled:
+            return None
+        tracker = self._tracker(base_url, model)
+        if len(tracker) < self.policy.min_samples:
+            return None
+        observed = tracker.percentile(self.policy.percentile)
+        return max(observed or 0.0, self.policy.min_delay_seconds)
+
+    def _try_spend(self) -> bool:
+        now = time.monotonic()
+        while self._spent and now - self._spent[0] >= 60.0:
+            self._spent.popleft()
+        if len(self._spent) >= self.policy.budget_per_minute:
+            self.stats["budget_exhausted"] += 1
+            return False
+        self._spent.append(now)
+        return True
+
+    async def run(self, base_url: str, model: str, factory: Callable[[], Awaitable[T]]) -> T:
+        """Run `factory()` and possibly one hedged duplicate; return the first success."""
+        self.stats["requests"] += 1
+        tracker = self._tracker(base_url, model)
+        loop = asyncio.get_running_loop()
+        started: dict[asyncio.Task[T], float] = {}
+
+        def launch() -> asyncio.Task[T]:
+            task = loop.create_task(factory())
+            started[task] = time.perf_counter()
+            return task
+
+        primary = launch()
+        pending = {primary}
+        last_error: Optional[BaseException] = None
+        try:
+            delay = self.hedge_delay(base_url, model)
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done and self._try_spend():
+                    self.stats["hedges_fired"] += 1
+                    self.logger.logger.info(
+                        f"Hedging image request to {base_url} [{model}] after {delay:.1f}s"
+                    )
+                    pending.add(launch())
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled():
+                        continue
+                    error = task.exception()
+                    if error is not None:
+                        last_error = error
+                        continue
+                    tracker.observe(time.perf_counter() - started[task])
+                    if len(started) > 1:
+                        self.stats["primary_wins" if task is primary else "hedge_wins"] += 1
+                    return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        assert last_error is not None
+        raise last_error
+
+    def snapshot(self) -> dict[str, Any]:
+        latencies = []
+        for (base_url, model), tracker in self._trackers.items():
+            p50 = tracker.percentile(0.5)
+            p_hedge = tracker.percentile(self.policy.percentile)
+            latencies.append({
+                "base_url": base_url,
+                "model": model,
+                "samples": len(tracker),
+                "p50_seconds": round(p50, 2) if p50 is not None else None,
+                "hedge_percentile_seconds": round(p_hedge, 2) if p_hedge is not None else None,
+            })
+        now = time.monotonic()
+        spent = sum(1 for ts in self._spent if now - ts < 60.0)
+        return {
+            "policy": asdict(self.policy),
+            "budget_remaining": max(self.policy.budget_per_minute - spent, 0),
+            "latencies": latencies,
+            **self.stats,
+        }
+
+
+# 全局图像请求对冲器实例
+_image_hedger: Optional[ImageRequestHedger] = None
+
+
+def get_image_hedger() -> ImageRequestHedger:
+    """获取全局图像请求对冲器实例"""
+    global _image_hedger
+    if _image_hedger is None:
+        _image_hedger = ImageRequestHedger()
+    return _image_hedger
+
+
+__all__ = ["HedgePolicy", "ImageRequestHedger", "LatencyTracker", "get_image_hedger"]
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Callable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from ..utils.logger import get_logger
+
+try:  # HTTP/2 support is provided by the optional `h2` package (httpx[http2]).
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover
+    HTTP2_AVAILABLE = False
+
+
+@dataclass(frozen=True)
+class PoolLimits:
+    """Connection pool sizing shared by every gateway client."""
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+
+
+TransportWrapper = Callable[[httpx.AsyncBaseTransport], httpx.AsyncBaseTransport]
+
+
+@dataclass
+class _PooledClient:
+    origin: str
+    client: httpx.AsyncClient
+    loop: asyncio.AbstractEventLoop
+    limits: PoolLimits
+    created_at: float = field(default_factory=time.time)
+    requests_total: int = 0
+    errors_total: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    retired: bool = False
+
+
+class RequestTrace:
+    """
+    Connection-phase timings of one request via httpcore's `trace` extension.
+
+    Pass as `extensions={"trace": trace}`. Phases that did not happen (no
+    TCP connect or TLS handshake on a reused keep-alive connection) are None.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.events: dict[str, float] = {}
+
+    async def __call__(self, name: str, info: dict[str, Any]) -> None:
+        self.events.setdefault(name, time.perf_counter())
+
+    def _at(self, *names: str) -> Optional[float]:
+        for name in names:
+            if name in self.events:
+                return self.events[name]
+        return None
+
+    def _span(self, start: Optional[float], end: Optional[float]) -> Optional[float]:
+        if start is None or end is None:
+            return None
+        return round(end - start, 4)
+
+    def breakdown(self) -> dict[str, Any]:
+        connect = self._span(
+            self._at("connection.connect_tcp.started"), self._at("connection.connect_tcp.complete")
+        )
+        return {
+            "connect_seconds": connect,
+            "tls_seconds": self._span(
+                self._at("connection.start_tls.started"), self._at("connection.start_tls.complete")
+            ),
+            "ttfb_seconds": self._span(
+                self._at("http11.send_request_headers.started", "http2.send_request_headers.started"),
+                self._at("http11.receive_response_headers.complete", "http2.receive_response_headers.complete"),
+            ),
+            "reused_connection": connect is None,
+        }
+
+
+class HTTPClientPool:
+    """
+    Process-wide registry of long-lived `httpx.AsyncClient` instances.
+
+    One client is kept per gateway origin (scheme + host + port) so chat,
+    image and download requests to the same gateway reuse keep-alive
+    connections instead of paying DNS/TCP/TLS setup on every attempt.
+    Clients are bound to the event loop that created them.
+    """
+
+    def __init__(self, limits: Optional[PoolLimits] = None) -> None:
+        self.limits = limits or PoolLimits()
+        self.transport_wrapper: Optional[TransportWrapper] = None
+        self.logger = get_logger()
+        self._clients: dict[tuple[int, str], _PooledClient] = {}
+        self._retired: list[_PooledClient] = []
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        parts = urlsplit(url)
+        scheme = (parts.scheme or "https").lower()
+        host = (parts.hostname or "").lower()
+        port = parts.port or (443 if scheme == "https" else 80)
+        return f"{scheme}://{host}:{port}"
+
+    def configure(self, limits: PoolLimits, transport_wrapper: Optional[TransportWrapper] = None) -> None:
+        """
+        Apply new pool limits. Existing clients are retired once idle.
+
+        `transport_wrapper` (e.g. cassette record/replay) wraps the transport
+        of every client created from now on.
+        """
+        if limits == self.limits and transport_wrapper == self.transport_wrapper:
+            return
+        self.limits = limits
+        self.transport_wrapper = transport_wrapper
+        for key, entry in list(self._clients.items()):
+            entry.retired = True
+            self._retired.append(entry)
+            del self._clients[key]
+        self._close_idle_retired()
+        self.logger.logger.info(f"HTTP连接池配置已更新: {asdict(limits)}")
+
+    def _build_client(self) -> httpx.AsyncClient:
+        http2 = self.limits.http2 and HTTP2_AVAILABLE
+        limits = httpx.Limits(
+            max_connections=self.limits.max_connections,
+            max_keepalive_connections=self.limits.max_keepalive_connections,
+            keepalive_expiry=self.limits.keepalive_expiry,
+        )
+        if self.transport_wrapper is None:
+            # Default construction keeps httpx's environment proxy support.
+            return httpx.AsyncClient(http2=http2, limits=limits)
+        transport = httpx.AsyncHTTPTransport(http2=http2, limits=limits)
+        return httpx.AsyncClient(transport=self.transport_wrapper(transport))
+
+    def _entry_for(self, url: str) -> _PooledClient:
+        loop = asyncio.get_running_loop()
+        origin = self._origin(url)
+        key = (id(loop), origin)
+        entry = self._clients.get(key)
+        if entry is not None and (entry.loop is not loop or entry.client.is_closed):
+            del self._clients[key]
+            entry = None
+        if entry is None:
+            self._drop_closed_loops()
+            entry = _PooledClient(
+                origin=origin,
+                client=self._build_client(),
+                loop=loop,
+                limits=self.limits,
+            )
+            self._clients[key] = entry
+        return entry
+
+    def _drop_closed_loops(self) -> None:
+        for key, entry in list(self._clients.items()):
+            if entry.loop.is_closed():
+                del self._clients[key]
+        self._retired = [entry for entry in self._retired if not entry.loop.is_closed()]
+
+    def _close_idle_retired(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        remaining: list[_PooledClient] = []
+        for entry in self._retired:
+            if entry.in_flight == 0 and entry.loop is loop:
+                loop.create_task(entry.client.aclose())
+            elif not entry.loop.is_closed():
+                remaining.append(entry)
+        self._retired = remaining
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Return the shared client for the gateway serving `url`."""
+        return self._entry_for(url).client
+
+    @asynccontextmanager
+    async def acquire(self, url: str) -> AsyncIterator[httpx.AsyncClient]:
+        """Yield the shared client for `url` while tracking in-flight usage."""
+        entry = self._entry_for(url)
+        entry.requests_total += 1
+        entry.in_flight += 1
+        entry.peak_in_flight = max(entry.peak_in_flight, entry.in_flight)
+        try:
+            yield entry.client
+        except BaseException:
+            entry.errors_total += 1
+            raise
+        finally:
+            entry.in_flight -= 1
+            if entry.retired and entry.in_flight == 0:
+                self._close_idle_retired()
+
+    def _connection_stats(self, client: httpx.AsyncClient) -> dict[str, Any]:
+        # httpx does not expose pool internals publicly; read them defensively.
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        requests = list(getattr(pool, "_requests", []) or [])
+        idle = sum(1 for conn in connections if _safe_call(conn, "is_idle"))
+        http2 = sum(1 for conn in connections if "HTTP/2" in str(_safe_call(conn, "info") or ""))
+        return {
+            "connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+            "http2_connections": http2,
+            "queued_requests": sum(1 for req in requests if _safe_call(req, "is_queued")),
+        }
+
+    def stats(self) -> dict[str, Any]:
+        """Snapshot of every live client and its connection pool."""
+        clients = []
+        for entry in [*self._clients.values(), *self._retired]:
+            if entry.loop.is_closed():
+                continue
+            clients.append({
+                "origin": entry.origin,
+                "retired": entry.retired,
+                "http2": entry.limits.http2 and HTTP2_AVAILABLE,
+                "created_at": entry.created_at,
+                "requests_total": entry.requests_total,
+                "errors_total": entry.errors_total,
+                "in_flight": entry.in_flight,
+                "peak_in_flight": entry.peak_in_flight,
+                **self._connection_stats(entry.client),
+            })
+        return {
+            "limits": asdict(self.limits),
+            "http2_available": HTTP2_AVAILABLE,
+            "clients": clients,
+        }
+
+    async def aclose(self) -> None:
+        """Close every client owned by the running event loop."""
+        loop = asyncio.get_running_loop()
+        for key, entry in list(self._clients.items()):
+            if entry.loop is loop:
+                await entry.client.aclose()
+                del self._clients[key]
+        for entry in self._retired:
+            if entry.loop is loop:
+                await entry.client.aclose()
+        self._retired = [entry for entry in self._retired if entry.loop is not loop]
+
+
+def _safe_call(obj: Any, name: str) -> Any:
+    method = getattr(obj, name, None)
+    if method is None:
+        return None
+    try:
+        return method()
+    except Exception:
+        return None
+
+
+# 全局HTTP连接池实例
+_http_pool: Optional[HTTPClientPool] = None
+
+
+def get_http_pool() -> HTTPClientPool:
+    """获取全局HTTP连接池实例"""
+    global _http_pool
+    if _http_pool is None:
+        _http_pool = HTTPClientPool()
+    return _http_pool
+
+
+__all__ = ["HTTP2_AVAILABLE", "HTTPClientPool", "PoolLimits", "RequestTrace", "get_http_pool"]
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import hashlib
 import textwrap
 from dataclasses import dataclass
@@ -10,6 +9,8 @@ from uuid import uuid4
 
 from PIL import Image, ImageDraw, ImageFont
 
+from .deadline import Deadline
+from .generation_scheduler import GenerationScheduler, Ticket, get_generation_scheduler
 from .llm_client import LLMClientError, OpenRouterClient
 from ..utils.logger import get_logger
 
@@ -22,19 +23,39 @@ class GeneratedImage:
 
 
 class ImageGenerator:
-    def __init__(self, output_dir: Path, llm_client: OpenRouterClient, image_model: str):
+    def __init__(
+        self,
+        output_dir: Path,
+        llm_client: OpenRouterClient,
+        image_model: str,
+        deadline_seconds: Optional[float] = None,
+        scheduler: Optional[GenerationScheduler] = None,
+    ):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.llm_client = llm_client
         self.image_model = image_model
+        # 单张图片的默认总耗时上限（覆盖所有重试与回退策略），None或0表示不限制
+        self.deadline_seconds = deadline_seconds
+        # 所有图像生成经全局调度器排队：交互请求优先，批量任务之间按权重公平分配
+        self.scheduler = scheduler or get_generation_scheduler()
         self.logger = get_logger()
 
-    async def create(self, title: str | None, final_prompt: str, aspect_ratio: str, page_num: Optional[int] = None) -> GeneratedImage:
-        return await self._create_with_session(title, final_prompt, aspect_ratio, page_num)
-
-    def create_sync(self, title: str | None, final_prompt: str, aspect_ratio: str, page_num: Optional[int] = None, session_id: Optional[str] = None) -> GeneratedImage:
-        """Synchronous version of create for use in thread pools"""
-        return asyncio.run(self._create_with_session(title, final_prompt, aspect_ratio, page_num, session_id))
+    async def create(
+        self,
+        title: str | None,
+        final_prompt: str,
+        aspect_ratio: str,
+        page_num: Optional[int] = None,
+        deadline_seconds: Optional[float] = None,
+        lane: str = "interactive",
+        flow: str = "",
+        weight: float = 1.0,
+    ) -> GeneratedImage:
+        return await self._create_with_session(
+            title, final_prompt, aspect_ratio, page_num,
+            deadline_seconds=deadline_seconds, lane=lane, flow=flow, weight=weight
+        )
 
     async def _create_with_session(
         self, 
@@ -42,7 +63,11 @@ class ImageGenerator:
         final_prompt: str, 
         aspect_ratio: str,
         page_num: Optional[int] = None,
-        session_id: Optional[str] = None
+        session_id: Optional[str] = None,
+        deadline_seconds: Optional[float] = None,
+        lane: str = "interactive",
+        flow: str = "",
+        weight: float = 1.0,
     ) -> GeneratedImage:
         if session_id is None:
             session_id = self.logger.start_session(
@@ -52,6 +77,25 @@ class ImageGenerator:
                 aspect_ratio=aspect_ratio
             )
 
+        # 排队等待生成许可的时间不计入截止时间
+        async with self.scheduler.slot(lane, flow, weight) as ticket:
+            return await self._generate(
+                title, final_prompt, aspect_ratio, page_num, session_id, deadline_seconds, ticket
+            )
+
+    async def _generate(
+        self,
+        title: str | None,
+        final_prompt: str,
+        aspect_ratio: str,
+        page_num: Optional[int],
+        session_id: str,
+        deadline_seconds: Optional[float],
+        ticket: Ticket,
+    ) -> GeneratedImage:
+        # 截止时间从此刻开始计算，由本次生成的所有重试和策略共享
+        deadline = Deadline.after(deadline_seconds or self.deadline_seconds)
+
         width, height = self._dimensions(aspect_ratio)
         # 使用页数和UUID生成文件名，格式：slide_{页数}_{UUID}.jpg 或 slide_{UUID}.jpg
         page_prefix = f"{int(page_num):03d}_" if page_num is not None else ""
@@ -69,23 +113,25 @@ class ImageGenerator:
                 "width": width,
                 "height": height,
                 "filename": filename,
-                "file_path": str(file_path)
+                "file_path": str(file_path),
+                "deadline_seconds": deadline.budget if deadline else None,
+                "scheduler_lane": ticket.lane,
+                "queue_wait_seconds": round(ticket.wait_seconds, 3)
             }
         )
 
         try:
-            image_bytes = await self.llm_client.generate_image(
-                final_prompt, 
-                self.image_model, 
-                width, 
+            # 直接流式写入图片文件，避免在内存中保留完整图片
+            file_size = await self.llm_client.generate_image_to_file(
+                final_prompt,
+                self.image_model,
+                width,
                 height,
-                session_id=session_id
+                file_path,
+                session_id=session_id,
+                deadline=deadline
             )
             
-            # 保存图片文件
-            file_path.write_bytes(image_bytes)
-            file_size = file_path.stat().st_size
-            
             # 记录成功生成图片
             self.logger.log_pipeline_step(
                 session_id=session_id,
@@ -2,18 +2,107 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import binascii
+import json
+import os
 import re
-from typing import Any, Iterable, Optional
+import time
+from dataclasses import dataclass, replace
+from urllib.parse import urlsplit
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, BinaryIO, Callable, Iterable, Optional
 
 import httpx
 
 from ..utils.logger import get_logger
+from .circuit_breaker import CircuitBreakerRegistry, CircuitOpenError, get_circuit_breakers
+from .deadline import Deadline, DeadlineExceeded
+from .endpoint_resolver import WRONG_PATH_STATUSES, EndpointResolver, get_endpoint_resolver
+from .gateway_pool import GatewayMember, GatewayPool
+from .hedging import ImageRequestHedger, get_image_hedger
+from .http_pool import HTTPClientPool, RequestTrace, get_http_pool
+from .rate_limiter import RateLimiterRegistry, get_rate_limiter
+from .response_cache import ResponseCache
+from .retry_budget import RetryBudget, get_retry_budget
+from .single_flight import SingleFlight, get_single_flight
+from .strategy_memory import StrategyMemory, get_strategy_memory
+from .usage_tracker import UsageTracker, get_usage_tracker, normalize_usage
+
+try:  # Fast decoder for multi-megabyte gateway responses (in requirements.txt; the stdlib is the fallback).
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 
 class LLMClientError(RuntimeError):
     pass
 
 
+# Base64 is decoded in slices of this many characters (a multiple of 4).
+_BASE64_CHUNK_CHARS = 4 * 256 * 1024
+_DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+
+def _loads(content: bytes | str) -> Any:
+    """Decode JSON with orjson when installed, falling back to the stdlib."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _slim_response(data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Keep only the fields the client reads from a completion response.
+
+    Retains `choices[0].message.content`/`images`, `data[0]`, `usage` and
+    `error`; everything else (other choices, reasoning, provider metadata)
+    is dropped right after decoding.
+    """
+    slim: dict[str, Any] = {}
+    choices = data.get("choices")
+    if isinstance(choices, list) and choices:
+        first = choices[0]
+        if isinstance(first, dict):
+            message = first.get("message")
+            if isinstance(message, dict):
+                first = {"message": {key: message[key] for key in ("content", "images") if key in message}}
+        slim["choices"] = [first]
+    items = data.get("data")
+    if isinstance(items, list) and items:
+        slim["data"] = [items[0]]
+    for key in ("usage", "error"):
+        if key in data:
+            slim[key] = data[key]
+    return slim
+
+
+def _latency_summary(values: Iterable[Optional[float]]) -> dict[str, Optional[float]]:
+    ordered = sorted(value for value in values if value is not None)
+    if not ordered:
+        return {"p50": None, "p95": None, "max": None}
+
+    def percentile(fraction: float) -> float:
+        return round(ordered[min(int(fraction * len(ordered)), len(ordered) - 1)], 4)
+
+    return {"p50": percentile(0.5), "p95": percentile(0.95), "max": round(ordered[-1], 4)}
+
+
+@dataclass(frozen=True)
+class ImageRef:
+    """
+    Where a generated image lives, without holding a decoded copy.
+
+    `kind` is "base64" (payload starts at `start` inside `value`, e.g. after
+    the `data:image/png;base64,` prefix) or "url" (a remote image to download).
+    `usage` is the gateway's token usage for the call that produced it.
+    """
+
+    kind: str
+    value: str
+    start: int = 0
+    usage: Optional[dict[str, Any]] = None
+
+
 class OpenRouterClient:
     """
     LLM client compatible with OpenRouter and OpenAI-style gateways.
@@ -27,12 +116,270 @@ class OpenRouterClient:
         api_key: str | None,
         base_url: str,
         timeout_seconds: int = 120,
+        http_pool: HTTPClientPool | None = None,
+        endpoint_resolver: EndpointResolver | None = None,
+        rate_limiter: RateLimiterRegistry | None = None,
+        circuit_breakers: CircuitBreakerRegistry | None = None,
+        response_cache: ResponseCache | None = None,
+        single_flight: SingleFlight | None = None,
+        image_hedger: ImageRequestHedger | None = None,
+        strategy_memory: StrategyMemory | None = None,
+        usage_tracker: UsageTracker | None = None,
+        gateway_pool: GatewayPool | None = None,
+        gateway_member: GatewayMember | None = None,
+        retry_budget: RetryBudget | None = None,
     ) -> None:
         self.api_key = api_key
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout_seconds
+        # With a pool, public calls are routed to per-member clients (see `_via_pool`);
+        # a member client reports every response to its member and has its own limiter window.
+        self.gateway_pool = gateway_pool
+        self.gateway_member = gateway_member
+        self.rate_limit_scope = gateway_member.rate_limit_scope if gateway_member else self.base_url
+        self._member_clients: dict[str, OpenRouterClient] = {}
+        self.http_pool = http_pool or get_http_pool()
+        self.endpoint_resolver = endpoint_resolver or get_endpoint_resolver()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.circuit_breakers = circuit_breakers or get_circuit_breakers()
+        self.response_cache = response_cache
+        self.single_flight = single_flight or get_single_flight()
+        self.image_hedger = image_hedger or get_image_hedger()
+        self.strategy_memory = strategy_memory or get_strategy_memory()
+        self.usage_tracker = usage_tracker or get_usage_tracker()
+        self.retry_budget = retry_budget or get_retry_budget()
         self.logger = get_logger()
 
+    def _member_client(self, member: GatewayMember) -> OpenRouterClient:
+        client = self._member_clients.get(member.name)
+        if client is None or (client.base_url, client.api_key) != member.spec.identity:
+            client = OpenRouterClient(
+                api_key=member.spec.api_key,
+                base_url=member.spec.base_url,
+                timeout_seconds=self.timeout,
+                http_pool=self.http_pool,
+                endpoint_resolver=self.endpoint_resolver,
+                rate_limiter=self.rate_limiter,
+                circuit_breakers=self.circuit_breakers,
+                response_cache=self.response_cache,
+                single_flight=self.single_flight,
+                image_hedger=self.image_hedger,
+                strategy_memory=self.strategy_memory,
+                usage_tracker=self.usage_tracker,
+                gateway_member=member,
+                retry_budget=self.retry_budget,
+            )
+            self._member_clients[member.name] = client
+        return client
+
+    async def _on_member(self, call: Callable[[OpenRouterClient], Awaitable[Any]]) -> Any:
+        """Run `call` on a pool member's client when a pool is configured, otherwise on this client."""
+        if self.gateway_pool is not None:
+            return await self._via_pool(call)
+        return await call(self)
+
+    async def _via_pool(self, call: Callable[[OpenRouterClient], Awaitable[Any]]) -> Any:
+        """
+        Run `call` on a pool member's client.
+
+        If the member was drained by this call (429 or repeated errors), the
+        call is retried once per remaining member before giving up.
+        """
+        tried: set[str] = set()
+        while True:
+            member: Optional[GatewayMember] = None
+            try:
+                async with self.gateway_pool.lease(exclude=tried) as member:
+                    return await call(self._member_client(member))
+            except LLMClientError as exc:
+                if member is None:
+                    raise
+                tried.add(member.name)
+                if not member.is_drained() or len(tried) >= len(self.gateway_pool):
+                    raise
+                member.stats["failovers"] += 1
+                self.logger.warning(f"Gateway pool {self.gateway_pool.name}: {member.name} drained, failing over ({str(exc)[:200]})")
+
+    async def _warm_get(self, url: str, timeout: float) -> tuple[httpx.Response, RequestTrace]:
+        trace = RequestTrace()
+        async with self.http_pool.acquire(url) as client:
+            response = await client.get(
+                url,
+                headers=self._headers(),
+                timeout=timeout,
+                extensions={"trace": trace},
+            )
+        return response, trace
+
+    async def warm_up(self, connections: int = 2, timeout: float = 10.0) -> list[dict[str, Any]]:
+        """
+        Open pooled connections to the gateway and learn its endpoint prefix.
+
+        Sends `connections` concurrent `GET /models` requests (no tokens are
+        spent), which leaves that many keep-alive connections in the shared
+        pool. The first candidate that answers marks `/chat/completions` and
+        `/images/generations` under the same prefix as preferred; candidates
+        answering 404 are skipped from then on. With a gateway pool every
+        member is warmed.
+        """
+        if self.gateway_pool is not None:
+            results: list[dict[str, Any]] = []
+            for member in self.gateway_pool.members:
+                for result in await self._member_client(member).warm_up(connections, timeout):
+                    results.append({"member": member.name, **result})
+            return results
+
+        started = time.perf_counter()
+        result: dict[str, Any] = {
+            "base_url": self.base_url,
+            "models_url": None,
+            "status_code": None,
+            "opened_connections": 0,
+            "connect_seconds": None,
+            "tls_seconds": None,
+            "error": None,
+        }
+        not_found: list[str] = []
+        for url in self._endpoint_candidates("/models"):
+            try:
+                replies = await asyncio.gather(*(self._warm_get(url, timeout) for _ in range(max(connections, 1))))
+            except Exception as exc:
+                # Candidates share the origin, so a network failure applies to all of them.
+                result["error"] = f"{type(exc).__name__}: {exc}"
+                break
+            breakdowns = [trace.breakdown() for _, trace in replies]
+            connects = [item["connect_seconds"] for item in breakdowns if item["connect_seconds"] is not None]
+            tls = [item["tls_seconds"] for item in breakdowns if item["tls_seconds"] is not None]
+            result["opened_connections"] += len(connects)
+            result["connect_seconds"] = max(connects) if connects else result["connect_seconds"]
+            result["tls_seconds"] = max(tls) if tls else result["tls_seconds"]
+            status = replies[0][0].status_code
+            result["status_code"] = status
+            if status == 404:
+                not_found.append(url)
+                continue
+            if status < 400:
+                prefix = url[: -len("/models")]
+                for path in ("/chat/completions", "/images/generations"):
+                    self.endpoint_resolver.record_success(
+                        self.base_url,
+                        path,
+                        f"{prefix}{path}",
+                        [f"{bad[: -len('/models')]}{path}" for bad in not_found],
+                    )
+                result["models_url"] = url
+            else:
+                result["error"] = f"HTTP {status}: {self._response_snippet(replies[0][0], 120)}"
+            break
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        return [result]
+
+    async def _probe_once(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        payload: dict[str, Any],
+        timeout: float,
+    ) -> dict[str, Any]:
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        dns_seconds: Optional[float] = None
+        try:
+            resolve_start = time.perf_counter()
+            await asyncio.get_running_loop().getaddrinfo(parts.hostname, port)
+            dns_seconds = round(time.perf_counter() - resolve_start, 4)
+        except OSError:
+            pass
+
+        trace = RequestTrace()
+        start = time.perf_counter()
+        try:
+            response = await client.post(
+                url,
+                json=payload,
+                headers=self._headers(),
+                timeout=timeout,
+                extensions={"trace": trace},
+            )
+        except Exception as exc:
+            return {"error": f"{type(exc).__name__}: {exc}", "dns_seconds": dns_seconds}
+        return {
+            "status_code": response.status_code,
+            "error": None if response.status_code < 400 else f"HTTP {response.status_code}: {self._response_snippet(response, 120)}",
+            "dns_seconds": dns_seconds,
+            **trace.breakdown(),
+            "total_seconds": round(time.perf_counter() - start, 4),
+            "rate_limit_headers": {
+                name: value
+                for name, value in response.headers.items()
+                if "ratelimit" in name.lower() or name.lower() == "retry-after"
+            },
+        }
+
+    async def probe_latency(
+        self,
+        kind: str,
+        model: str,
+        probes: int = 1,
+        timeout: Optional[float] = None,
+    ) -> dict[str, Any]:
+        """
+        Send `probes` concurrent requests and break their latency down by phase.
+
+        Reports p50/p95/max of DNS, TCP connect, TLS, time-to-first-byte and
+        total time plus the rate-limit headers the gateway returned. Probes
+        go through the shared HTTP pool (and cassette, when one is active),
+        so they measure the same path real calls take: a probe that reuses a
+        keep-alive connection has no connect or TLS phase, and
+        `reused_connections` says how many did. `kind` is "chat" (a tiny
+        completion) or "image" (one real, billed generation per probe, using
+        the strategy learned for this gateway).
+        """
+        if kind == "image":
+            strategy = self.strategy_memory.order(self.base_url, model, ["chat_completions", "images_generations"])[0][0]
+            prompt = "A plain light-grey background."
+            if strategy == "images_generations":
+                path, payload = "/images/generations", self._images_generations_payload(prompt, model, 256, 256)
+            else:
+                path, payload = "/chat/completions", self._image_chat_payload(prompt, model)
+        else:
+            path = "/chat/completions"
+            payload = self._chat_payload([{"role": "user", "content": "ping"}], model, 0.0, 8)
+
+        timeout = timeout or self.timeout
+        results: list[dict[str, Any]] = []
+        url: Optional[str] = None
+        for url in self._endpoint_candidates(path):
+            async with self.http_pool.acquire(url) as client:
+                results = list(await asyncio.gather(
+                    *(self._probe_once(client, url, payload, timeout) for _ in range(max(probes, 1)))
+                ))
+            # A 404 on every probe means the wrong prefix; try the next candidate.
+            if not all(result.get("status_code") == 404 for result in results):
+                break
+
+        status_codes: dict[str, int] = {}
+        rate_limit_headers: dict[str, str] = {}
+        for result in results:
+            key = str(result.get("status_code", "error"))
+            status_codes[key] = status_codes.get(key, 0) + 1
+            rate_limit_headers.update(result.get("rate_limit_headers") or {})
+        ok = [result for result in results if result.get("error") is None]
+        return {
+            "endpoint": url,
+            "model": model,
+            "probes": len(results),
+            "succeeded": len(ok),
+            "reused_connections": sum(1 for result in ok if result.get("reused_connection")),
+            "status_codes": status_codes,
+            "phases": {
+                phase: _latency_summary(result.get(f"{phase}_seconds") for result in ok)
+                for phase in ("dns", "connect", "tls", "ttfb", "total")
+            },
+            "rate_limit_headers": rate_limit_headers,
+            "errors": sorted({result["error"] for result in results if result.get("error")}),
+        }
+
     def _is_openrouter(self) -> bool:
         return "openrouter.ai" in self.base_url.lower()
 
@@ -50,8 +397,11 @@ class OpenRouterClient:
             headers["X-Title"] = "AI-PPT Flow"
         return headers
 
+    def _normalize_path(self, path: str) -> str:
+        return path if path.startswith("/") else f"/{path}"
+
     def _endpoint_candidates(self, path: str) -> list[str]:
-        normalized_path = path if path.startswith("/") else f"/{path}"
+        normalized_path = self._normalize_path(path)
         base = self.base_url.rstrip("/")
 
         candidates = [f"{base}{normalized_path}"]
@@ -65,7 +415,8 @@ class OpenRouterClient:
             if url not in seen:
                 unique.append(url)
                 seen.add(url)
-        return unique
+        # Learned resolution: last working URL first, known-bad URLs skipped.
+        return self.endpoint_resolver.order(self.base_url, normalized_path, unique)
 
     def _response_snippet(self, response: httpx.Response, limit: int = 240) -> str:
         body = (response.text or "").replace("\n", " ").strip()
@@ -73,31 +424,102 @@ class OpenRouterClient:
             body = body[:limit] + "..."
         return body
 
+    def _flight_key(self, kind: str, payload: dict[str, Any]) -> str:
+        # Keyed on the request alone (the payload names the model): with a gateway
+        # pool, identical calls coalesce before the leader picks a member.
+        return ResponseCache.make_key({"kind": kind, "payload": payload})
+
+    def _retry_wait(self, response: httpx.Response, attempt: int) -> float:
+        retry_after = response.headers.get("retry-after")
+        try:
+            wait = float(retry_after) if retry_after else self.retry_budget.policy.backoff(attempt)
+        except ValueError:
+            wait = self.retry_budget.policy.backoff(attempt)
+        return max(wait, 0.5)
+
+    def _may_retry(self, attempt: int, max_attempts: int, wait: float, deadline: Optional[Deadline]) -> bool:
+        if attempt >= max_attempts:
+            return False
+        if self.gateway_member is not None and self.gateway_member.should_fail_over():
+            # Fail over to another pool member rather than waiting out this one.
+            return False
+        if deadline is not None and not deadline.allows_wait(wait):
+            return False
+        # Checked last so only retries that would actually happen spend the shared budget.
+        return self.retry_budget.try_spend()
+
+    async def _send_post(
+        self,
+        url: str,
+        payload: dict[str, Any],
+        model: str,
+        timeout: float,
+    ) -> httpx.Response:
+        # Shared per-(gateway, model) limiter: RPM bucket + adaptive concurrency.
+        try:
+            async with self.rate_limiter.slot(self.rate_limit_scope, model) as permit, \
+                    self.http_pool.acquire(url) as client:
+                response = await client.post(
+                    url,
+                    json=payload,
+                    headers=self._headers(),
+                    timeout=timeout,
+                )
+                permit.observe(response)
+        except httpx.TransportError as exc:
+            if self.gateway_member is not None:
+                self.gateway_member.observe_error(exc)
+            raise
+        if self.gateway_member is not None:
+            self.gateway_member.observe(response)
+        return response
+
     async def _post_json(
         self,
         path: str,
         payload: dict[str, Any],
         request_name: str,
+        deadline: Optional[Deadline] = None,
     ) -> dict[str, Any]:
         errors: list[str] = []
-        max_attempts = 3
+        failed_urls: list[str] = []
+        max_attempts = self.retry_budget.policy.max_attempts
+        normalized_path = self._normalize_path(path)
+        model = str(payload.get("model", ""))
+
+        def deadline_exceeded() -> DeadlineExceeded:
+            return DeadlineExceeded(
+                f"{request_name} exceeded its {deadline.budget:g}s deadline. "
+                f"Attempts: {' | '.join(errors) or 'none'}"
+            )
 
         for url in self._endpoint_candidates(path):
+            # Only a wrong-path answer marks the candidate bad; 429/5xx/network errors are transient.
+            wrong_path = False
             for attempt in range(1, max_attempts + 1):
                 try:
-                    async with httpx.AsyncClient(timeout=self.timeout) as client:
-                        response = await client.post(
-                            url,
-                            json=payload,
-                            headers=self._headers(),
+                    if deadline is None:
+                        response = await self._send_post(url, payload, model, self.timeout)
+                    else:
+                        # Every attempt only gets what is left of the shared budget
+                        # (including time spent queued in the rate limiter).
+                        attempt_timeout = deadline.timeout(self.timeout)
+                        response = await asyncio.wait_for(
+                            self._send_post(url, payload, model, attempt_timeout),
+                            attempt_timeout,
                         )
+                except DeadlineExceeded:
+                    raise deadline_exceeded() from None
                 except Exception as exc:
+                    if deadline is not None and deadline.expired:
+                        raise deadline_exceeded() from exc
                     errors.append(
                         f"{url} [try {attempt}/{max_attempts}] -> network error: "
                         f"{type(exc).__name__}: {exc}"
                     )
-                    if attempt < max_attempts:
-                        await asyncio.sleep(min(2 ** (attempt - 1), 3))
+                    wait = self.retry_budget.policy.backoff(attempt)
+                    if self._may_retry(attempt, max_attempts, wait, deadline):
+                        await asyncio.sleep(wait)
                         continue
                     break
 
@@ -105,18 +527,16 @@ class OpenRouterClient:
                     errors.append(
                         f"{url} [try {attempt}/{max_attempts}] -> HTTP {response.status_code}, body: {self._response_snippet(response)}"
                     )
-                    if response.status_code in {429, 500, 502, 503, 504} and attempt < max_attempts:
-                        retry_after = response.headers.get("retry-after")
-                        try:
-                            wait = float(retry_after) if retry_after else min(2 ** (attempt - 1), 3)
-                        except ValueError:
-                            wait = min(2 ** (attempt - 1), 3)
-                        await asyncio.sleep(max(wait, 0.5))
+                    wrong_path = response.status_code in WRONG_PATH_STATUSES
+                    wait = self._retry_wait(response, attempt)
+                    if response.status_code in {429, 500, 502, 503, 504} and \
+                            self._may_retry(attempt, max_attempts, wait, deadline):
+                        await asyncio.sleep(wait)
                         continue
                     break
 
                 try:
-                    data = response.json()
+                    data = _loads(response.content)
                 except Exception as exc:
                     content_type = response.headers.get("content-type", "unknown")
                     errors.append(
@@ -126,10 +546,19 @@ class OpenRouterClient:
                     break
 
                 if isinstance(data, dict):
-                    return data
+                    self.retry_budget.record_success()
+                    self.endpoint_resolver.record_success(
+                        self.base_url, normalized_path, url, failed_urls
+                    )
+                    return _slim_response(data)
                 errors.append(f"{url} -> unexpected JSON type: {type(data).__name__}")
                 break
 
+            if wrong_path:
+                failed_urls.append(url)
+            if deadline is not None and deadline.expired:
+                raise deadline_exceeded()
+
         raise LLMClientError(f"{request_name} failed. Attempts: {' | '.join(errors)}")
 
     def _extract_text_from_chat_response(self, data: dict[str, Any]) -> str:
@@ -153,23 +582,81 @@ class OpenRouterClient:
 
         raise LLMClientError("Chat API returned empty content.")
 
-    def _decode_data_url(self, value: str) -> bytes | None:
+    def _data_url_payload_start(self, value: str) -> int | None:
+        """Offset of the base64 payload in a data URL, found without copying the string."""
         if not value.startswith("data:image/"):
             return None
-        match = re.match(r"data:image/[^;]+;base64,(.+)", value, re.DOTALL)
-        if not match:
+        marker = value.find(";base64,", 0, 256)
+        if marker < 0:
             return None
-        return base64.b64decode(match.group(1))
+        return marker + len(";base64,")
+
+    def _image_ref_from_string(self, value: str) -> ImageRef:
+        start = self._data_url_payload_start(value)
+        if start is not None:
+            return ImageRef("base64", value, start)
+        return ImageRef("url", value)
+
+    def _write_base64(self, value: str, start: int, sink: BinaryIO) -> int:
+        """Decode `value[start:]` into `sink` one slice at a time; returns bytes written."""
+        written = 0
+        carry = ""
+        end = len(value)
+        for offset in range(start, end, _BASE64_CHUNK_CHARS):
+            # Whitespace (line wrapping, a trailing newline) can appear anywhere: strip it per slice
+            # and carry whatever lies past the last 4-character boundary into the next slice.
+            chunk = carry + "".join(value[offset:min(offset + _BASE64_CHUNK_CHARS, end)].split())
+            aligned = len(chunk) - len(chunk) % 4
+            written += sink.write(binascii.a2b_base64(chunk[:aligned]))
+            carry = chunk[aligned:]
+        if carry:
+            written += sink.write(binascii.a2b_base64(carry))
+        return written
 
-    async def _resolve_image_ref_to_bytes(self, image_ref: str) -> bytes:
-        data = self._decode_data_url(image_ref)
-        if data is not None:
-            return data
+    def _write_base64_file(self, ref: ImageRef, destination: Path) -> int:
+        with open(destination, "wb") as sink:
+            return self._write_base64(ref.value, ref.start, sink)
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(image_ref)
-        response.raise_for_status()
-        return response.content
+    async def _download_to_file(self, url: str, destination: Path) -> int:
+        written = 0
+        async with self.http_pool.acquire(url) as client:
+            async with client.stream("GET", url, timeout=self.timeout) as response:
+                response.raise_for_status()
+                with open(destination, "wb") as sink:
+                    async for chunk in response.aiter_bytes(_DOWNLOAD_CHUNK_BYTES):
+                        written += sink.write(chunk)
+        return written
+
+    async def _write_image_ref(self, ref: ImageRef, destination: Path) -> int:
+        """Stream an image reference to `destination` (atomically, via a .part file)."""
+        destination = Path(destination)
+        partial = destination.with_name(destination.name + ".part")
+        try:
+            if ref.kind == "base64":
+                written = await asyncio.to_thread(self._write_base64_file, ref, partial)
+            else:
+                written = await self._download_to_file(ref.value, partial)
+            if written == 0:
+                raise LLMClientError("Image payload is empty.")
+            os.replace(partial, destination)
+            return written
+        except LLMClientError:
+            partial.unlink(missing_ok=True)
+            raise
+        except (httpx.HTTPError, OSError, binascii.Error, ValueError) as exc:
+            partial.unlink(missing_ok=True)
+            raise LLMClientError(f"Failed to store generated image: {type(exc).__name__}: {exc}") from exc
+
+    async def _image_ref_to_bytes(self, ref: ImageRef) -> bytes:
+        try:
+            if ref.kind == "base64":
+                return base64.b64decode(ref.value[ref.start:])
+            async with self.http_pool.acquire(ref.value) as client:
+                response = await client.get(ref.value, timeout=self.timeout)
+            response.raise_for_status()
+            return response.content
+        except (httpx.HTTPError, binascii.Error, ValueError) as exc:
+            raise LLMClientError(f"Failed to load generated image: {type(exc).__name__}: {exc}") from exc
 
     def _extract_url_from_text(self, text: str) -> str | None:
         # Markdown image: ![alt](https://...)
@@ -232,7 +719,7 @@ class OpenRouterClient:
 
         return None
 
-    async def _extract_image_bytes_from_images_endpoint(self, data: dict[str, Any]) -> bytes:
+    def _extract_image_ref_from_images_endpoint(self, data: dict[str, Any]) -> ImageRef:
         items = data.get("data") or []
         if not items:
             raise LLMClientError("No images returned from images endpoint.")
@@ -243,33 +730,45 @@ class OpenRouterClient:
 
         b64_value = first.get("b64_json")
         if isinstance(b64_value, str) and b64_value:
-            return base64.b64decode(b64_value)
+            return ImageRef("base64", b64_value)
 
         for field in ("url", "image_url"):
             ref = first.get(field)
             if isinstance(ref, str) and ref:
-                return await self._resolve_image_ref_to_bytes(ref)
+                return self._image_ref_from_string(ref)
 
         raise LLMClientError("Images endpoint returned unsupported image payload format.")
 
-    async def chat(
+    def _chat_payload(
         self,
-        messages: Iterable[dict[str, Any]],
+        messages: list[dict[str, Any]],
         model: str,
-        temperature: float = 0.4,
-        max_output_tokens: Optional[int] = None,
-        session_id: Optional[str] = None,
-        stage: str = "chat"
-    ) -> str:
+        temperature: float,
+        max_output_tokens: Optional[int],
+    ) -> dict[str, Any]:
         payload: dict[str, Any] = {
             "model": model,
-            "messages": list(messages),
+            "messages": messages,
             "temperature": temperature,
         }
         if max_output_tokens is not None:
             payload["max_tokens"] = max_output_tokens
             if self._is_openrouter():
                 payload["max_output_tokens"] = max_output_tokens
+        return payload
+
+    async def chat(
+        self,
+        messages: Iterable[dict[str, Any]],
+        model: str,
+        temperature: float = 0.4,
+        max_output_tokens: Optional[int] = None,
+        session_id: Optional[str] = None,
+        stage: str = "chat",
+        bypass_cache: bool = False,
+    ) -> str:
+        messages = list(messages)
+        payload = self._chat_payload(messages, model, temperature, max_output_tokens)
 
         if session_id:
             self.logger.log_llm_call(
@@ -281,11 +780,40 @@ class OpenRouterClient:
                 max_tokens=max_output_tokens
             )
 
+        # Opt-in response cache for deterministic (low-temperature) calls.
+        cache_key: Optional[str] = None
+        if self.response_cache is not None and self.response_cache.accepts(temperature):
+            if bypass_cache:
+                self.response_cache.record_bypass()
+            else:
+                cache_key = self.response_cache.make_key(payload)
+                cached = await self.response_cache.get(cache_key)
+                if cached is not None:
+                    self.usage_tracker.record(model, stage, None, session_id, cached=True)
+                    if session_id:
+                        self.logger.log_pipeline_step(
+                            session_id=session_id,
+                            step=f"{stage}_cache_hit",
+                            details={"model": model, "cache_key": cache_key}
+                        )
+                        self.logger.log_llm_call(
+                            session_id=session_id,
+                            stage=stage,
+                            model=model,
+                            messages=list(messages),
+                            temperature=temperature,
+                            max_tokens=max_output_tokens,
+                            response=cached
+                        )
+                    return cached
+
         try:
-            data = await self._post_json(
-                "/chat/completions",
-                payload,
-                "Chat completion request",
+            # Identical concurrent requests share one upstream call; with a pool the
+            # flight leader picks the member.
+            data = await self.single_flight.do(
+                self._flight_key("chat", payload),
+                lambda: self._on_member(lambda client: client._post_chat(payload, model, stage, session_id)),
+                kind="chat",
             )
         except Exception as exc:  # pragma: no cover
             error_msg = f"Chat completion request failed: {str(exc)}"
@@ -311,33 +839,286 @@ class OpenRouterClient:
                 messages=list(messages),
                 temperature=temperature,
                 max_tokens=max_output_tokens,
-                response=response_text
+                response=response_text,
+                usage=normalize_usage(data.get("usage"))
             )
 
+        if cache_key is not None:
+            await self.response_cache.set(cache_key, response_text)
+
         return response_text
 
-    async def generate_image(
+    async def _post_chat(
+        self,
+        payload: dict[str, Any],
+        model: str,
+        stage: str,
+        session_id: Optional[str],
+    ) -> dict[str, Any]:
+        # Usage is recorded once per upstream call, so coalesced followers are not double counted.
+        data = await self._post_json("/chat/completions", payload, "Chat completion request")
+        self.usage_tracker.record(model, stage, data.get("usage"), session_id)
+        return data
+
+    def _extract_text_from_stream_chunk(self, chunk: dict[str, Any]) -> str:
+        error = chunk.get("error")
+        if error:
+            message = error.get("message") if isinstance(error, dict) else error
+            raise LLMClientError(f"Chat stream returned an error: {message}")
+
+        choices = chunk.get("choices") or []
+        if not choices or not isinstance(choices[0], dict):
+            return ""
+
+        # OpenAI/OpenRouter deltas; some gateways send a final `message` instead.
+        delta = choices[0].get("delta") or choices[0].get("message") or {}
+        content = delta.get("content") if isinstance(delta, dict) else None
+        if isinstance(content, list):
+            return "".join(
+                part.get("text", "")
+                for part in content
+                if isinstance(part, dict)
+            )
+        if isinstance(content, str):
+            return content
+        return ""
+
+    def _parse_stream_event(self, raw: str, usage: dict[str, Any]) -> str:
+        try:
+            chunk = _loads(raw)
+        except ValueError:
+            self.logger.warning(f"Skipping malformed stream chunk: {raw[:120]}")
+            return ""
+        if not isinstance(chunk, dict):
+            return ""
+        # Usage arrives on the final chunk (OpenRouter always, OpenAI with `include_usage`).
+        if isinstance(chunk.get("usage"), dict):
+            usage.update(chunk["usage"])
+        return self._extract_text_from_stream_chunk(chunk)
+
+    async def _iter_stream_deltas(self, response: httpx.Response, usage: dict[str, Any]) -> AsyncIterator[str]:
+        """Parse an SSE chat completion stream into text deltas; usage is collected into `usage`."""
+        data_lines: list[str] = []
+
+        async for line in response.aiter_lines():
+            if line.startswith("data:"):
+                data_lines.append(line[5:].lstrip())
+                continue
+            if line:
+                # SSE comments (OpenRouter's ": OPENROUTER PROCESSING") and other fields.
+                continue
+            raw = "\n".join(data_lines).strip()
+            data_lines.clear()
+            if not raw:
+                continue
+            if raw == "[DONE]":
+                return
+            text = self._parse_stream_event(raw, usage)
+            if text:
+                yield text
+
+        raw = "\n".join(data_lines).strip()
+        if raw and raw != "[DONE]":
+            text = self._parse_stream_event(raw, usage)
+            if text:
+                yield text
+
+    async def _stream_chat_deltas(self, payload: dict[str, Any], usage: dict[str, Any]) -> AsyncIterator[str]:
+        path = "/chat/completions"
+        errors: list[str] = []
+        failed_urls: list[str] = []
+        max_attempts = self.retry_budget.policy.max_attempts
+        normalized_path = self._normalize_path(path)
+        model = str(payload.get("model", ""))
+
+        for url in self._endpoint_candidates(path):
+            wrong_path = False
+            for attempt in range(1, max_attempts + 1):
+                retry_wait: Optional[float] = None
+                started = False
+                try:
+                    async with self.rate_limiter.slot(self.rate_limit_scope, model) as permit, \
+                            self.http_pool.acquire(url) as client:
+                        async with client.stream(
+                            "POST",
+                            url,
+                            json=payload,
+                            headers={**self._headers(), "Accept": "text/event-stream"},
+                            timeout=self.timeout,
+                        ) as response:
+                            permit.observe(response)
+                            if self.gateway_member is not None:
+                                self.gateway_member.observe(response)
+                            if response.status_code >= 400:
+                                await response.aread()
+                                errors.append(
+                                    f"{url} [try {attempt}/{max_attempts}] -> HTTP {response.status_code}, body: {self._response_snippet(response)}"
+                                )
+                                wrong_path = response.status_code in WRONG_PATH_STATUSES
+                                if response.status_code in {429, 500, 502, 503, 504} and \
+                                        self._may_retry(attempt, max_attempts, 0.0, None):
+                                    retry_wait = self._retry_wait(response, attempt)
+                            elif "text/event-stream" in response.headers.get("content-type", ""):
+                                self.retry_budget.record_success()
+                                self.endpoint_resolver.record_success(
+                                    self.base_url, normalized_path, url, failed_urls
+                                )
+                                started = True
+                                async for text in self._iter_stream_deltas(response, usage):
+                                    yield text
+                                return
+                            else:
+                                # Gateway ignored `stream: true` and answered with a full completion.
+                                await response.aread()
+                                try:
+                                    data = _loads(response.content)
+                                except Exception as exc:
+                                    content_type = response.headers.get("content-type", "unknown")
+                                    errors.append(
+                                        f"{url} -> non-JSON response (content-type={content_type}): "
+                                        f"{self._response_snippet(response)} ({exc})"
+                                    )
+                                else:
+                                    if isinstance(data, dict):
+                                        if isinstance(data.get("usage"), dict):
+                                            usage.update(data["usage"])
+                                        text = self._extract_text_from_chat_response(data)
+                                        self.retry_budget.record_success()
+                                        self.endpoint_resolver.record_success(
+                                            self.base_url, normalized_path, url, failed_urls
+                                        )
+                                        started = True
+                                        yield text
+                                        return
+                                    errors.append(f"{url} -> unexpected JSON type: {type(data).__name__}")
+                except LLMClientError:
+                    raise
+                except Exception as exc:
+                    if isinstance(exc, httpx.TransportError) and self.gateway_member is not None:
+                        self.gateway_member.observe_error(exc)
+                    if started:
+                        raise LLMClientError(
+                            f"Chat stream interrupted: {type(exc).__name__}: {exc}"
+                        ) from exc
+                    errors.append(
+                        f"{url} [try {attempt}/{max_attempts}] -> network error: "
+                        f"{type(exc).__name__}: {exc}"
+                    )
+                    wait = self.retry_budget.policy.backoff(attempt)
+                    if self._may_retry(attempt, max_attempts, wait, None):
+                        await asyncio.sleep(wait)
+                        continue
+                    break
+
+                if retry_wait is not None:
+                    await asyncio.sleep(retry_wait)
+                    continue
+                break
+
+            if wrong_path:
+                failed_urls.append(url)
+
+        raise LLMClientError(f"Chat completion stream failed. Attempts: {' | '.join(errors)}")
+
+    async def chat_stream(
+        self,
+        messages: Iterable[dict[str, Any]],
+        model: str,
+        temperature: float = 0.4,
+        max_output_tokens: Optional[int] = None,
+        session_id: Optional[str] = None,
+        stage: str = "chat"
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion as text deltas (`stream: true` + SSE).
+
+        Time-to-first-token and total time are written to the session log.
+        """
+        messages = list(messages)
+        if self.gateway_pool is not None:
+            # A started stream cannot fail over, so the member is held until it ends.
+            async with self.gateway_pool.lease() as member:
+                async for text in self._member_client(member).chat_stream(
+                    messages, model, temperature, max_output_tokens, session_id, stage
+                ):
+                    yield text
+            return
+        payload = self._chat_payload(messages, model, temperature, max_output_tokens)
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+
+        if session_id:
+            self.logger.log_llm_call(
+                session_id=session_id,
+                stage=stage,
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_output_tokens
+            )
+
+        start = time.perf_counter()
+        ttft: Optional[float] = None
+        parts: list[str] = []
+        usage: dict[str, Any] = {}
+        try:
+            async for text in self._stream_chat_deltas(payload, usage):
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                    if session_id:
+                        self.logger.log_pipeline_step(
+                            session_id=session_id,
+                            step=f"{stage}_first_token",
+                            details={"model": model, "ttft_seconds": round(ttft, 3)}
+                        )
+                parts.append(text)
+                yield text
+        except Exception as exc:
+            error_msg = f"Chat completion stream failed: {str(exc)}"
+            if usage:
+                self.usage_tracker.record(model, stage, usage, session_id)
+            if session_id:
+                self.logger.log_llm_call(
+                    session_id=session_id,
+                    stage=stage,
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_output_tokens,
+                    error=error_msg,
+                    timing={"ttft_seconds": ttft, "total_seconds": time.perf_counter() - start}
+                )
+            if isinstance(exc, LLMClientError):
+                raise
+            raise LLMClientError(error_msg) from exc
+
+        normalized_usage = self.usage_tracker.record(model, stage, usage, session_id)
+        response_text = "".join(parts).strip()
+        if not response_text:
+            raise LLMClientError("Chat stream returned empty content.")
+
+        if session_id:
+            self.logger.log_llm_call(
+                session_id=session_id,
+                stage=stage,
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_output_tokens,
+                response=response_text,
+                timing={"ttft_seconds": ttft, "total_seconds": time.perf_counter() - start},
+                usage=normalized_usage
+            )
+
+    async def _generate_image_ref(
         self,
         prompt: str,
         model: str,
         width: int,
         height: int,
         session_id: Optional[str] = None,
-    ) -> bytes:
-        messages = [
-            {"role": "system", "content": "你是专业的 PPT 幻灯片视觉设计师"},
-            {"role": "user", "content": prompt}
-        ]
-
-        payload = {
-            "model": model,
-            "messages": messages,
-            "modalities": ["image", "text"],
-            "max_tokens": 2048,
-        }
-        if self._is_openrouter():
-            payload["max_output_tokens"] = 2048
-
+        deadline: Optional[Deadline] = None,
+    ) -> ImageRef:
         if session_id:
             self.logger.log_image_generation(
                 session_id=session_id,
@@ -347,59 +1128,59 @@ class OpenRouterClient:
                 height=height
             )
 
-        errors: list[str] = []
-
-        # Strategy 1: chat/completions image response
+        # Identical concurrent requests (same prompt, model and size) share one upstream call.
+        flight_key = self._flight_key(
+            "image",
+            {"model": model, "prompt": prompt, "width": width, "height": height},
+        )
+        flight = self.single_flight.do(
+            flight_key,
+            lambda: self._on_member(
+                lambda client: client._hedged_image_ref(prompt, model, width, height, deadline, session_id)
+            ),
+            kind="image",
+        )
         try:
-            chat_data = await self._post_json(
-                "/chat/completions",
-                payload,
-                "Image generation (chat/completions)",
-            )
-            image_ref = self._extract_image_ref_from_chat_response(chat_data)
-            if image_ref:
-                image_bytes = await self._resolve_image_ref_to_bytes(image_ref)
-                if session_id:
-                    self.logger.log_image_generation(
-                        session_id=session_id,
-                        prompt=prompt,
-                        model=model,
-                        width=width,
-                        height=height,
-                        image_path=f"Generated {len(image_bytes)} bytes"
-                    )
-                return image_bytes
-            errors.append("chat/completions returned no image reference")
-        except Exception as exc:  # pragma: no cover
-            errors.append(f"chat/completions failed: {exc}")
+            if deadline is None:
+                return await flight
+            # A caller that joined someone else's flight still honours its own deadline
+            # (the small grace lets the leader report its own, more detailed, timeout).
+            try:
+                return await asyncio.wait_for(flight, deadline.remaining() + 0.5)
+            except asyncio.TimeoutError as exc:
+                raise LLMClientError(
+                    f"Image generation exceeded its {deadline.budget:g}s deadline"
+                ) from exc
+        except LLMClientError as exc:
+            self._log_image_result(session_id, prompt, model, width, height, error=str(exc))
+            raise
 
-        # Strategy 2: images/generations endpoint
-        image_payload = {
-            "model": model,
-            "prompt": prompt,
-            "size": f"{width}x{height}",
-        }
-        try:
-            image_data = await self._post_json(
-                "/images/generations",
-                image_payload,
-                "Image generation (images/generations)",
-            )
-            image_bytes = await self._extract_image_bytes_from_images_endpoint(image_data)
-            if session_id:
-                self.logger.log_image_generation(
-                    session_id=session_id,
-                    prompt=prompt,
-                    model=model,
-                    width=width,
-                    height=height,
-                    image_path=f"Generated {len(image_bytes)} bytes"
-                )
-            return image_bytes
-        except Exception as exc:  # pragma: no cover
-            errors.append(f"images/generations failed: {exc}")
+    async def _hedged_image_ref(
+        self,
+        prompt: str,
+        model: str,
+        width: int,
+        height: int,
+        deadline: Optional[Deadline],
+        session_id: Optional[str],
+    ) -> ImageRef:
+        # Optionally hedged: a slow request gets a duplicate after the p-th percentile latency.
+        return await self.image_hedger.run(
+            self.base_url,
+            model,
+            lambda: self._generate_image_uncoalesced(prompt, model, width, height, deadline, session_id),
+        )
 
-        error_msg = f"Image generation request failed: {' | '.join(errors)}"
+    def _log_image_result(
+        self,
+        session_id: Optional[str],
+        prompt: str,
+        model: str,
+        width: int,
+        height: int,
+        image_path: Optional[str] = None,
+        error: Optional[str] = None,
+    ) -> None:
         if session_id:
             self.logger.log_image_generation(
                 session_id=session_id,
@@ -407,9 +1188,163 @@ class OpenRouterClient:
                 model=model,
                 width=width,
                 height=height,
-                error=error_msg
+                image_path=image_path,
+                error=error
             )
-        raise LLMClientError(error_msg)
+
+    async def generate_image(
+        self,
+        prompt: str,
+        model: str,
+        width: int,
+        height: int,
+        session_id: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> bytes:
+        ref = await self._generate_image_ref(prompt, model, width, height, session_id, deadline)
+        try:
+            image_bytes = await self._image_ref_to_bytes(ref)
+        except LLMClientError as exc:
+            self._log_image_result(session_id, prompt, model, width, height, error=str(exc))
+            raise
+        self._log_image_result(
+            session_id, prompt, model, width, height,
+            image_path=f"Generated {len(image_bytes)} bytes",
+        )
+        return image_bytes
+
+    async def generate_image_to_file(
+        self,
+        prompt: str,
+        model: str,
+        width: int,
+        height: int,
+        destination: Path,
+        session_id: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> int:
+        """
+        Generate an image and stream it straight to `destination`.
+
+        Inline base64 is decoded slice by slice and remote images are
+        downloaded in chunks, so the decoded image is never held in memory
+        as a whole. Returns the number of bytes written.
+
+        `deadline` bounds generation (all retries, endpoints and strategies);
+        an image that has already been produced is still stored after it.
+        """
+        ref = await self._generate_image_ref(prompt, model, width, height, session_id, deadline)
+        try:
+            written = await self._write_image_ref(ref, destination)
+        except LLMClientError as exc:
+            self._log_image_result(session_id, prompt, model, width, height, error=str(exc))
+            raise
+        self._log_image_result(
+            session_id, prompt, model, width, height,
+            image_path=f"{destination} ({written} bytes)",
+        )
+        return written
+
+    def _image_chat_payload(self, prompt: str, model: str) -> dict[str, Any]:
+        payload = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": "你是专业的 PPT 幻灯片视觉设计师"},
+                {"role": "user", "content": prompt}
+            ],
+            "modalities": ["image", "text"],
+            "max_tokens": 2048,
+        }
+        if self._is_openrouter():
+            payload["max_output_tokens"] = 2048
+        return payload
+
+    def _images_generations_payload(self, prompt: str, model: str, width: int, height: int) -> dict[str, Any]:
+        return {
+            "model": model,
+            "prompt": prompt,
+            "size": f"{width}x{height}",
+        }
+
+    async def _image_via_chat_completions(
+        self,
+        prompt: str,
+        model: str,
+        width: int,
+        height: int,
+        deadline: Optional[Deadline],
+    ) -> ImageRef:
+        chat_data = await self._post_json(
+            "/chat/completions",
+            self._image_chat_payload(prompt, model),
+            "Image generation (chat/completions)",
+            deadline,
+        )
+        image_ref = self._extract_image_ref_from_chat_response(chat_data)
+        if not image_ref:
+            raise LLMClientError("no image reference in response")
+        return replace(self._image_ref_from_string(image_ref), usage=chat_data.get("usage"))
+
+    async def _image_via_images_generations(
+        self,
+        prompt: str,
+        model: str,
+        width: int,
+        height: int,
+        deadline: Optional[Deadline],
+    ) -> ImageRef:
+        image_data = await self._post_json(
+            "/images/generations",
+            self._images_generations_payload(prompt, model, width, height),
+            "Image generation (images/generations)",
+            deadline,
+        )
+        return replace(self._extract_image_ref_from_images_endpoint(image_data), usage=image_data.get("usage"))
+
+    async def _generate_image_uncoalesced(
+        self,
+        prompt: str,
+        model: str,
+        width: int,
+        height: int,
+        deadline: Optional[Deadline] = None,
+        session_id: Optional[str] = None,
+    ) -> ImageRef:
+        strategies = {
+            "chat_completions": ("chat/completions", self._image_via_chat_completions),
+            "images_generations": ("images/generations", self._image_via_images_generations),
+        }
+        # Learned per (gateway, model): the strategy that last worked goes first.
+        order, reprobe = self.strategy_memory.order(self.base_url, model, list(strategies))
+        if reprobe:
+            self.logger.logger.info(f"Re-probing image strategies for {self.base_url} [{model}]: {order}")
+
+        errors: list[str] = []
+        for index, name in enumerate(order):
+            label, run = strategies[name]
+            if index > 0 and deadline is not None and deadline.expired:
+                errors.append(f"{label} skipped: deadline exceeded")
+                break
+            # Each strategy runs behind its own circuit breaker so a gateway that is
+            # known to be down fails fast (and the caller falls back to a placeholder).
+            try:
+                with self.circuit_breakers.get(self.base_url, name).guard():
+                    image_ref = await run(prompt, model, width, height, deadline)
+            except CircuitOpenError as exc:
+                errors.append(f"{label} skipped: {exc}")
+                continue
+            except DeadlineExceeded as exc:
+                errors.append(f"{label} failed: {exc}")
+                continue
+            except Exception as exc:  # pragma: no cover
+                errors.append(f"{label} failed: {exc}")
+                self.strategy_memory.record(self.base_url, model, name, success=False, first_choice=index == 0)
+                continue
+            self.strategy_memory.record(self.base_url, model, name, success=True, first_choice=index == 0)
+            self.usage_tracker.record(model, "image_generation", image_ref.usage, session_id)
+            return image_ref
+
+        raise LLMClientError(f"Image generation request failed: {' | '.join(errors)}")
 
 
-__all__ = ["LLMClientError", "OpenRouterClient"]
+__all__ = ["Deadline", "ImageRef", "LLMClientError", "OpenRouterClient"]
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Iterable, Optional
+
+from ..utils.logger import get_logger
+from .hedging import LatencyTracker
+
+# Text-generation stages that can be routed to their own model.
+ROUTED_STAGES = ("outline", "insert_slide", "style_analysis", "connection_test")
+
+
+@dataclass(frozen=True)
+class ModelRoutingPolicy:
+    default_model: str
+    stage_models: dict[str, str] = field(default_factory=dict)
+    fast_model: str = ""  # "" disables automatic downgrade
+    downgrade_stages: tuple[str, ...] = ()
+    small_input_chars: int = 0  # 0 disables the small-input rule
+    p95_threshold_seconds: float = 0.0  # 0 disables the latency rule
+    min_samples: int = 10
+    probe_interval: int = 10  # while downgraded for latency, every n-th call still probes the primary
+
+
+@dataclass(frozen=True)
+class RoutingDecision:
+    stage: str
+    model: str
+    primary_model: str
+    reason: str  # "primary", "small_input", "slow_primary" or "probe"
+    input_chars: int
+    primary_p95_seconds: Optional[float] = None
+
+    @property
+    def downgraded(self) -> bool:
+        return self.model != self.primary_model
+
+
+def message_chars(messages: Iterable[dict[str, Any]]) -> int:
+    """Rough input size of a chat request: characters of all text content."""
+    total = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            total += len(content)
+        elif isinstance(content, list):
+            total += sum(len(part.get("text", "")) for part in content if isinstance(part, dict))
+    return total
+
+
+class ModelRouter:
+    """
+    Pick the chat model for each text-generation stage.
+
+    Every stage uses its configured model (falling back to `llm_chat_model`).
+    For stages listed in `downgrade_stages`, calls go to `fast_model` instead
+    when the input is smaller than `small_input_chars`, or when the primary
+    model's recent p95 latency exceeds `p95_threshold_seconds`; every
+    `probe_interval`-th of those calls still goes to the primary so its p95
+    can recover.
+    """
+
+    def __init__(self, policy: Optional[ModelRoutingPolicy] = None) -> None:
+        self.policy = policy or ModelRoutingPolicy(default_model="")
+        self.logger = get_logger()
+        self._latency: dict[str, LatencyTracker] = {}
+        self.failures: dict[str, int] = defaultdict(int)
+        self.stats: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def configure(self, policy: ModelRoutingPolicy) -> None:
+        self.policy = policy
+
+    def primary_model(self, stage: str) -> str:
+        return self.policy.stage_models.get(stage) or self.policy.default_model
+
+    def p95(self, model: str) -> Optional[float]:
+        tracker = self._latency.get(model)
+        if tracker is None or len(tracker) < self.policy.min_samples:
+            return None
+        return tracker.percentile(0.95)
+
+    def route(self, stage: str, input_chars: int, session_id: Optional[str] = None) -> RoutingDecision:
+        """Choose the model for one call and record the decision in the session log."""
+        policy = self.policy
+        primary = self.primary_model(stage)
+        p95 = self.p95(primary)
+        model, reason = primary, "primary"
+        if policy.fast_model and policy.fast_model != primary and stage in policy.downgrade_stages:
+            if policy.small_input_chars and input_chars < policy.small_input_chars:
+                model, reason = policy.fast_model, "small_input"
+            elif policy.p95_threshold_seconds and p95 is not None and p95 > policy.p95_threshold_seconds:
+                slow_calls = self.stats[stage].get("slow_primary", 0) + self.stats[stage].get("probe", 0) + 1
+                if policy.probe_interval and slow_calls % policy.probe_interval == 0:
+                    reason = "probe"
+                else:
+                    model, reason = policy.fast_model, "slow_primary"
+
+        decision = RoutingDecision(
+            stage=stage,
+            model=model,
+            primary_model=primary,
+            reason=reason,
+            input_chars=input_chars,
+            primary_p95_seconds=round(p95, 3) if p95 is not None else None,
+        )
+        self.stats[stage][reason] += 1
+        if session_id:
+            self.logger.log_pipeline_step(
+                session_id=session_id,
+                step=f"{stage}_model_routing",
+                details={**asdict(decision), "downgraded": decision.downgraded},
+            )
+        return decision
+
+    def observe(self, model: str, seconds: float) -> None:
+        """Feed the latency of a successful call (per model, across stages)."""
+        tracker = self._latency.get(model)
+        if tracker is None:
+            tracker = LatencyTracker()
+            self._latency[model] = tracker
+        tracker.observe(seconds)
+
+    def record_failure(self, model: str) -> None:
+        """Count a failed call (per model); failures do not feed the latency percentiles."""
+        self.failures[model] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        policy = asdict(self.policy)
+        policy["downgrade_stages"] = list(self.policy.downgrade_stages)
+        return {
+            "policy": policy,
+            "stages": {stage: self.primary_model(stage) for stage in ROUTED_STAGES},
+            "decisions": {stage: dict(reasons) for stage, reasons in self.stats.items()},
+            "latency": {
+                model: {
+                    "samples": len(tracker),
+                    "p50_seconds": _round(tracker.percentile(0.5)),
+                    "p95_seconds": _round(tracker.percentile(0.95)),
+                }
+                for model, tracker in self._latency.items()
+            },
+            "failures": dict(self.failures),
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+# 全局模型路由实例
+_model_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """获取全局模型路由实例"""
+    global _model_router
+    if _model_router is None:
+        _model_router = ModelRouter()
+    return _model_router
+
+
+__all__ = [
+    "ModelRouter",
+    "ModelRoutingPolicy",
+    "ROUTED_STAGES",
+    "RoutingDecision",
+    "get_model_router",
+    "message_chars",
+]
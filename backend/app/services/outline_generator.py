@@ -3,22 +3,89 @@ from __future__ import annotations
 import json
 import math
 import re
-from typing import Any, List, Sequence, Optional
+import time
+from typing import Any, AsyncIterator, List, Sequence, Optional
 
 from ..schemas.outline import SlideContext
 from ..schemas.slide import SlideData, SlideStatus, SlideType
 from .llm_client import LLMClientError, OpenRouterClient
+from .model_router import ModelRouter, message_chars
 from ..utils.logger import get_logger
 
 
 class OutlineGenerator:
     """Convert long-form text into structured slide outlines."""
 
-    def __init__(self, llm_client: OpenRouterClient, chat_model: str) -> None:
+    def __init__(
+        self,
+        llm_client: OpenRouterClient,
+        chat_model: str,
+        model_router: ModelRouter | None = None,
+    ) -> None:
         self.llm_client = llm_client
         self.chat_model = chat_model
+        self.model_router = model_router
         self.logger = get_logger()
 
+    async def _chat(
+        self,
+        prompt: list[dict[str, str]],
+        routing_stage: str,
+        temperature: float,
+        session_id: str,
+        stage: str,
+    ) -> str:
+        """Call the LLM with the model routed for `routing_stage` (plain `chat_model` without a router)."""
+        model = self._route(prompt, routing_stage, session_id)
+        start = time.perf_counter()
+        try:
+            response_text = await self.llm_client.chat(
+                prompt,
+                model=model,
+                temperature=temperature,
+                session_id=session_id,
+                stage=stage
+            )
+        except Exception:
+            if self.model_router is not None:
+                self.model_router.record_failure(model)
+            raise
+        if self.model_router is not None:
+            self.model_router.observe(model, time.perf_counter() - start)
+        return response_text
+
+    async def chat_stream(
+        self,
+        prompt: list[dict[str, str]],
+        routing_stage: str,
+        temperature: float,
+        session_id: str,
+        stage: str,
+    ) -> AsyncIterator[str]:
+        """Streaming counterpart of `_chat`: same routing, latency of the whole stream reported on completion."""
+        model = self._route(prompt, routing_stage, session_id)
+        start = time.perf_counter()
+        try:
+            async for delta in self.llm_client.chat_stream(
+                prompt,
+                model=model,
+                temperature=temperature,
+                session_id=session_id,
+                stage=stage
+            ):
+                yield delta
+        except Exception:
+            if self.model_router is not None:
+                self.model_router.record_failure(model)
+            raise
+        if self.model_router is not None:
+            self.model_router.observe(model, time.perf_counter() - start)
+
+    def _route(self, prompt: list[dict[str, str]], routing_stage: str, session_id: str) -> str:
+        if self.model_router is None:
+            return self.chat_model
+        return self.model_router.route(routing_stage, message_chars(prompt), session_id).model or self.chat_model
+
     async def generate(
         self,
         text: str,
@@ -68,9 +135,9 @@ class OutlineGenerator:
         )
 
         try:
-            response_text = await self.llm_client.chat(
-                prompt, 
-                model=self.chat_model, 
+            response_text = await self._chat(
+                prompt,
+                routing_stage="outline",
                 temperature=0.3,
                 session_id=session_id,
                 stage="outline_generation"
@@ -177,9 +244,9 @@ class OutlineGenerator:
         )
 
         try:
-            response_text = await self.llm_client.chat(
+            response_text = await self._chat(
                 prompt,
-                model=self.chat_model,
+                routing_stage="insert_slide",
                 temperature=0.35,
                 session_id=session_id,
                 stage="insert_slide_generation"
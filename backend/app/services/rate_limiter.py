@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Callable, Optional
+
+import httpx
+
+from ..utils.logger import get_logger
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """Limits applied to every (base_url, model) pair."""
+
+    requests_per_minute: int = 0  # 0 disables the token bucket
+    max_concurrency: int = 16
+    min_concurrency: int = 1
+    decrease_factor: float = 0.5
+    decrease_cooldown_seconds: float = 1.0
+
+
+class RateLimitPermit:
+    """Handle returned by `AdaptiveRateLimiter.slot()` to report the outcome of a call."""
+
+    def __init__(self) -> None:
+        self.outcome = "error"
+        self.retry_after: Optional[float] = None
+
+    def success(self) -> None:
+        self.outcome = "success"
+
+    def throttled(self, retry_after: Optional[float] = None) -> None:
+        self.outcome = "throttled"
+        self.retry_after = retry_after
+
+    def observe(self, response: httpx.Response) -> None:
+        """Classify a gateway response: 429 (or 503 with retry-after) throttles, 2xx/3xx succeeds."""
+        retry_after = _parse_retry_after(response.headers.get("retry-after"))
+        if response.status_code == 429 or (response.status_code == 503 and retry_after is not None):
+            self.throttled(retry_after)
+        elif response.status_code < 400:
+            self.success()
+        else:
+            self.outcome = "error"
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket (requests per minute) plus an AIMD concurrency window.
+
+    The window shrinks multiplicatively on 429 / retry-after responses and
+    grows back additively (about +1 per window of successful calls).
+    A released slot is held for the oldest waiter until it resumes, so a
+    newcomer cannot take it in between; a waiter cancelled in that gap hands
+    the slot on to the next one.
+    """
+
+    def __init__(
+        self,
+        key: tuple[str, str],
+        policy: RateLimitPolicy,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.key = key
+        self.policy = policy
+        self._clock = clock
+        self.window = float(policy.max_concurrency)
+        self.in_flight = 0
+        self.tokens = float(policy.requests_per_minute or 0)
+        self.blocked_until = 0.0
+        self._last_refill = clock()
+        self._last_decrease = 0.0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        # Waiters handed a free slot by _wake that have not resumed yet; the slot is held for them.
+        self._woken: set[asyncio.Future[None]] = set()
+        self.stats = {
+            "acquired": 0,
+            "succeeded": 0,
+            "throttled": 0,
+            "errors": 0,
+            "waited": 0,
+            "wait_seconds_total": 0.0,
+        }
+
+    def configure(self, policy: RateLimitPolicy) -> None:
+        self.policy = policy
+        self.window = min(max(self.window, policy.min_concurrency), policy.max_concurrency)
+        if policy.requests_per_minute:
+            self.tokens = min(self.tokens, float(policy.requests_per_minute))
+        self._wake()
+
+    @property
+    def concurrency_limit(self) -> int:
+        return max(int(self.window), self.policy.min_concurrency)
+
+    def _refill(self, now: float) -> None:
+        rpm = self.policy.requests_per_minute
+        if rpm:
+            self.tokens = min(float(rpm), self.tokens + (now - self._last_refill) * rpm / 60.0)
+        self._last_refill = now
+
+    def _next_delay(self, now: float) -> Optional[float]:
+        """Seconds to sleep before retrying, 0 when a slot is free, None to wait for a release."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.in_flight + len(self._woken) >= self.concurrency_limit:
+            return None
+        rpm = self.policy.requests_per_minute
+        if rpm:
+            self._refill(now)
+            if self.tokens < 1:
+                return (1 - self.tokens) * 60.0 / rpm
+        return 0.0
+
+    async def acquire(self) -> None:
+        start = self._clock()
+        waited = False
+        while True:
+            now = self._clock()
+            delay = self._next_delay(now)
+            if delay == 0.0:
+                break
+            waited = True
+            if delay is None:
+                future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+                self._waiters.append(future)
+                try:
+                    await future
+                except asyncio.CancelledError:
+                    if future in self._woken:
+                        # Cancelled after being handed a slot: pass it on rather than lose the wake-up.
+                        self._woken.discard(future)
+                        self._wake()
+                    raise
+                finally:
+                    self._woken.discard(future)
+                    if future in self._waiters:
+                        self._waiters.remove(future)
+            else:
+                await asyncio.sleep(delay)
+
+        if self.policy.requests_per_minute:
+            self.tokens -= 1
+        self.in_flight += 1
+        self.stats["acquired"] += 1
+        if waited:
+            self.stats["waited"] += 1
+            self.stats["wait_seconds_total"] += self._clock() - start
+
+    def release(self, outcome: str, retry_after: Optional[float] = None) -> None:
+        self.in_flight = max(self.in_flight - 1, 0)
+        now = self._clock()
+        if outcome == "success":
+            self.stats["succeeded"] += 1
+            self.window = min(float(self.policy.max_concurrency), self.window + 1.0 / max(self.window, 1.0))
+        elif outcome == "throttled":
+            self.stats["throttled"] += 1
+            # Multiplicative decrease at most once per cooldown, so a burst of
+            # simultaneous 429s does not collapse the window to the minimum.
+            if now - self._last_decrease >= self.policy.decrease_cooldown_seconds:
+                self.window = max(float(self.policy.min_concurrency), self.window * self.policy.decrease_factor)
+                self._last_decrease = now
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+        else:
+            self.stats["errors"] += 1
+        self._wake()
+
+    def _wake(self) -> None:
+        free = self.concurrency_limit - self.in_flight - len(self._woken)
+        while free > 0 and self._waiters:
+            future = self._waiters.popleft()
+            if future.done() or future.get_loop().is_closed():
+                continue
+            self._woken.add(future)
+            future.get_loop().call_soon_threadsafe(_resolve, future)
+            free -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[RateLimitPermit]:
+        await self.acquire()
+        permit = RateLimitPermit()
+        try:
+            yield permit
+        finally:
+            self.release(permit.outcome, permit.retry_after)
+
+    def snapshot(self) -> dict[str, Any]:
+        now = self._clock()
+        return {
+            "base_url": self.key[0],
+            "model": self.key[1],
+            "window": round(self.window, 2),
+            "concurrency_limit": self.concurrency_limit,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "tokens": round(self.tokens, 2) if self.policy.requests_per_minute else None,
+            "blocked_for_seconds": round(max(self.blocked_until - now, 0.0), 2),
+            **self.stats,
+        }
+
+
+class RateLimiterRegistry:
+    """Process-wide limiters keyed by (base_url, model)."""
+
+    def __init__(self, policy: Optional[RateLimitPolicy] = None, clock: Callable[[], float] = time.monotonic) -> None:
+        self.policy = policy or RateLimitPolicy()
+        self._clock = clock
+        self.logger = get_logger()
+        self._limiters: dict[tuple[str, str], AdaptiveRateLimiter] = {}
+
+    def configure(self, policy: RateLimitPolicy) -> None:
+        if policy == self.policy:
+            return
+        self.policy = policy
+        for limiter in self._limiters.values():
+            limiter.configure(policy)
+        self.logger.logger.info(f"速率限制配置已更新: {asdict(policy)}")
+
+    def get(self, base_url: str, model: str) -> AdaptiveRateLimiter:
+        key = (base_url.rstrip("/"), model)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = AdaptiveRateLimiter(key, self.policy, self._clock)
+            self._limiters[key] = limiter
+        return limiter
+
+    def slot(self, base_url: str, model: str):
+        return self.get(base_url, model).slot()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "policy": asdict(self.policy),
+            "limiters": [limiter.snapshot() for limiter in self._limiters.values()],
+        }
+
+
+def _resolve(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+# 全局速率限制器实例
+_rate_limiter: Optional[RateLimiterRegistry] = None
+
+
+def get_rate_limiter() -> RateLimiterRegistry:
+    """获取全局速率限制器实例"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiterRegistry()
+    return _rate_limiter
+
+
+__all__ = [
+    "AdaptiveRateLimiter",
+    "RateLimitPermit",
+    "RateLimitPolicy",
+    "RateLimiterRegistry",
+    "get_rate_limiter",
+]
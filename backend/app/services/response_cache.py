@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from ..utils.logger import get_logger
+
+
+class ResponseCache:
+    """
+    Disk-backed LRU cache for deterministic chat completions.
+
+    Entries live in a small SQLite file keyed by a hash of the request
+    payload (model, messages and sampling parameters). Entries expire after
+    `ttl_seconds`; when the entry or size cap is exceeded the least recently
+    used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl_seconds: int = 7 * 24 * 3600,
+        max_entries: int = 500,
+        max_bytes: int = 50 * 1024 * 1024,
+        max_temperature: float = 0.3,
+    ) -> None:
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_temperature = max_temperature
+        self.logger = get_logger()
+        self.stats = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "evictions": 0}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chat_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chat_cache_access ON chat_cache(last_access)")
+        self._conn.commit()
+
+    def accepts(self, temperature: float) -> bool:
+        """Only low-temperature calls are deterministic enough to be worth caching."""
+        return temperature <= self.max_temperature
+
+    @staticmethod
+    def make_key(payload: dict[str, Any]) -> str:
+        canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def record_bypass(self) -> None:
+        self.stats["bypassed"] += 1
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM chat_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM chat_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE chat_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def _set(self, key: str, value: str) -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chat_cache (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        expired = self._conn.execute(
+            "DELETE FROM chat_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        evicted = max(expired, 0)
+        while True:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM chat_cache"
+            ).fetchone()
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            # Drop the least recently used tenth (at least one entry) per pass.
+            batch = max(1, count - self.max_entries, count // 10)
+            evicted += self._conn.execute(
+                "DELETE FROM chat_cache WHERE key IN (SELECT key FROM chat_cache ORDER BY last_access ASC LIMIT ?)",
+                (batch,),
+            ).rowcount
+        self.stats["evictions"] += evicted
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            value = await asyncio.to_thread(self._get, key)
+        except sqlite3.Error as exc:
+            self.logger.warning(f"Response cache read failed: {exc}")
+            value = None
+        self.stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        try:
+            await asyncio.to_thread(self._set, key, value)
+            self.stats["stores"] += 1
+        except sqlite3.Error as exc:
+            self.logger.warning(f"Response cache write failed: {exc}")
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM chat_cache").rowcount
+            self._conn.commit()
+        return removed
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM chat_cache"
+            ).fetchone()
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "enabled": True,
+            "path": str(self.path),
+            "entries": count,
+            "size_bytes": total,
+            "ttl_seconds": self.ttl_seconds,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "max_temperature": self.max_temperature,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else None,
+            **self.stats,
+        }
+
+
+__all__ = ["ResponseCache"]
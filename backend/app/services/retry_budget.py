@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import random
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Optional
+
+from ..utils.logger import get_logger
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 3  # per endpoint candidate, first try included
+    backoff_base_seconds: float = 1.0
+    backoff_max_seconds: float = 3.0
+    backoff_jitter: float = 0.2  # fraction of the backoff that is randomised away
+    budget_ratio: float = 0.2  # retries allowed per recent successful request
+    budget_min_retries: int = 10  # retries always allowed per window, so an idle process can still retry
+    budget_window_seconds: float = 10.0
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff after the `attempt`-th failed try, capped and jittered."""
+        wait = min(self.backoff_base_seconds * 2 ** (attempt - 1), self.backoff_max_seconds)
+        return wait * (1 - self.backoff_jitter * random.random())
+
+
+class RetryBudget:
+    """
+    Process-wide cap on retries.
+
+    Every gateway client shares one budget: within the sliding window a
+    retry is allowed only while retries stay below
+    `budget_min_retries + budget_ratio * successes`. When the gateway browns
+    out, successes dry up and retries are refused instead of multiplying the
+    load (workers x endpoint candidates x attempts); callers fail fast.
+    """
+
+    def __init__(
+        self, policy: Optional[RetryPolicy] = None, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.policy = policy or RetryPolicy()
+        self.clock = clock
+        self.logger = get_logger()
+        self._successes: deque[float] = deque()
+        self._retries: deque[float] = deque()
+        self._exhausted_logged_at = 0.0
+        self.stats = {"successes": 0, "retries": 0, "exhausted": 0}
+
+    def configure(self, policy: RetryPolicy) -> None:
+        self.policy = policy
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.policy.budget_window_seconds
+        for samples in (self._successes, self._retries):
+            while samples and samples[0] < cutoff:
+                samples.popleft()
+
+    def allowance(self, now: Optional[float] = None) -> float:
+        now = now if now is not None else self.clock()
+        self._prune(now)
+        return self.policy.budget_min_retries + self.policy.budget_ratio * len(self._successes)
+
+    def record_success(self) -> None:
+        self.stats["successes"] += 1
+        self._successes.append(self.clock())
+
+    def try_spend(self) -> bool:
+        """Reserve one retry; False (counted as exhausted) when the budget is used up."""
+        now = self.clock()
+        if len(self._retries) < self.allowance(now):
+            self._retries.append(now)
+            self.stats["retries"] += 1
+            return True
+        self.stats["exhausted"] += 1
+        if now - self._exhausted_logged_at >= self.policy.budget_window_seconds:
+            self._exhausted_logged_at = now
+            self.logger.logger.warning(
+                f"Retry budget exhausted: {len(self._retries)} retries vs "
+                f"{len(self._successes)} successes in the last {self.policy.budget_window_seconds:g}s"
+            )
+        return False
+
+    def snapshot(self) -> dict[str, Any]:
+        allowance = self.allowance()
+        return {
+            "policy": asdict(self.policy),
+            "window": {
+                "successes": len(self._successes),
+                "retries": len(self._retries),
+                "allowance": round(allowance, 1),
+                "available": max(int(allowance) - len(self._retries), 0),
+            },
+            **self.stats,
+        }
+
+
+# 全局重试预算实例
+_retry_budget: Optional[RetryBudget] = None
+
+
+def get_retry_budget() -> RetryBudget:
+    """获取全局重试预算实例"""
+    global _retry_budget
+    if _retry_budget is None:
+        _retry_budget = RetryBudget()
+    return _retry_budget
+
+
+__all__ = ["RetryBudget", "RetryPolicy", "get_retry_budget"]
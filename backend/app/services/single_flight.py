@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls onto one in-flight task.
+
+    While a call for `key` is running, later callers with the same key await
+    the same task instead of starting a new upstream request. The shared task
+    is shielded, so one caller being cancelled does not cancel it for the rest.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, asyncio.Task[Any]] = {}
+        self._stats: dict[str, dict[str, int]] = defaultdict(lambda: {"uncoalesced": 0, "coalesced": 0})
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[T]], kind: str = "default") -> T:
+        loop = asyncio.get_running_loop()
+        task = self._inflight.get(key)
+        if task is not None and not task.done() and task.get_loop() is loop:
+            self._stats[kind]["coalesced"] += 1
+            return await asyncio.shield(task)
+
+        self._stats[kind]["uncoalesced"] += 1
+        task = loop.create_task(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task[Any]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every caller was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+    def snapshot(self) -> dict[str, Any]:
+        kinds = {}
+        for kind, counts in self._stats.items():
+            total = counts["uncoalesced"] + counts["coalesced"]
+            kinds[kind] = {
+                **counts,
+                "coalesced_ratio": round(counts["coalesced"] / total, 3) if total else None,
+            }
+        return {"in_flight": len(self._inflight), "kinds": kinds}
+
+
+# 全局请求合并器实例
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """获取全局请求合并器实例"""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
+
+
+__all__ = ["SingleFlight", "get_single_flight"]
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from ..utils.logger import get_logger
+
+
+class StrategyMemory:
+    """
+    Remember which image generation strategy works for each (base_url, model).
+
+    `OpenRouterClient.generate_image` asks for the strategy order before each
+    call: the strategy that last succeeded goes first, so gateways that only
+    support `/images/generations` stop paying for a failed chat/completions
+    round trip on every slide. Every `reprobe_interval`-th call uses the
+    default order again, so a gateway that gains chat image support is
+    noticed. The preferences and counters are persisted to a JSON file; on
+    the event loop the file is written from a worker thread.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        reprobe_interval: int = 25,
+        log_interval: int = 50,
+    ) -> None:
+        self.path = Path(path) if path else None
+        self.reprobe_interval = reprobe_interval
+        self.log_interval = log_interval
+        self.logger = get_logger()
+        self._entries: dict[tuple[str, str], dict[str, Any]] = {}
+        self._dirty = 0
+        self._write_lock = threading.Lock()
+        self._flush_task: Optional[asyncio.Task[None]] = None
+        self._flush_requested = False
+        self._load()
+
+    def configure(self, path: Optional[Path], reprobe_interval: int) -> None:
+        self.reprobe_interval = reprobe_interval
+        path = Path(path) if path else None
+        if path != self.path:
+            self.flush()
+            self.path = path
+            self._entries.clear()
+            self._load()
+
+    def _entry(self, base_url: str, model: str) -> dict[str, Any]:
+        key = (base_url.rstrip("/"), model)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = {
+                "preferred": None,
+                "calls": 0,
+                "first_choice_hits": 0,
+                "probes": 0,
+                "strategies": {},
+            }
+            self._entries[key] = entry
+        return entry
+
+    def order(self, base_url: str, model: str, strategies: list[str]) -> tuple[list[str], bool]:
+        """
+        Strategy order for the next call and whether it is a re-probe.
+
+        Without a learned preference (or on a re-probe) `strategies` is
+        returned unchanged.
+        """
+        entry = self._entry(base_url, model)
+        entry["calls"] += 1
+        if self.log_interval and entry["calls"] % self.log_interval == 0:
+            self._log_hit_rate(base_url, model, entry)
+        preferred = entry["preferred"]
+        if preferred not in strategies or preferred == strategies[0]:
+            return list(strategies), False
+        if self.reprobe_interval and entry["calls"] % self.reprobe_interval == 0:
+            entry["probes"] += 1
+            return list(strategies), True
+        return [preferred, *[name for name in strategies if name != preferred]], False
+
+    def record(self, base_url: str, model: str, strategy: str, success: bool, first_choice: bool) -> None:
+        """Record the outcome of one strategy attempt; a success makes it the preferred strategy."""
+        entry = self._entry(base_url, model)
+        counts = entry["strategies"].setdefault(strategy, {"attempts": 0, "successes": 0})
+        counts["attempts"] += 1
+        self._dirty += 1
+        if success:
+            counts["successes"] += 1
+            if first_choice:
+                entry["first_choice_hits"] += 1
+            if entry["preferred"] != strategy:
+                self.logger.logger.info(
+                    f"Image strategy for {base_url} [{model}]: {entry['preferred'] or 'default'} -> {strategy}"
+                )
+                entry["preferred"] = strategy
+                self._schedule_flush()
+        if self._dirty >= self.log_interval:
+            self._schedule_flush()
+
+    def _log_hit_rate(self, base_url: str, model: str, entry: dict[str, Any]) -> None:
+        per_strategy = ", ".join(
+            f"{name} {counts['successes']}/{counts['attempts']}"
+            for name, counts in entry["strategies"].items()
+        )
+        self.logger.logger.info(
+            f"Image strategy hit rate for {base_url} [{model}]: first choice "
+            f"{entry['first_choice_hits']}/{entry['calls']} ({_ratio(entry['first_choice_hits'], entry['calls']):.0%}), "
+            f"{per_strategy}, re-probes {entry['probes']}"
+        )
+
+    def _load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            for item in data.get("entries", []):
+                key = (item["base_url"], item["model"])
+                self._entries[key] = {
+                    "preferred": item.get("preferred"),
+                    "calls": int(item.get("calls", 0)),
+                    "first_choice_hits": int(item.get("first_choice_hits", 0)),
+                    "probes": int(item.get("probes", 0)),
+                    "strategies": dict(item.get("strategies", {})),
+                }
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            self.logger.warning(f"Failed to load image strategy memory from {self.path}: {exc}")
+
+    def flush(self) -> None:
+        """Persist the current preferences and counters now (blocking; for startup and shutdown)."""
+        self._dirty = 0
+        self._write(self.path, self._serialize())
+
+    def _schedule_flush(self) -> None:
+        """Persist without blocking the event loop; writes requested while one runs are coalesced."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._flush_requested = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_in_background())
+
+    async def _flush_in_background(self) -> None:
+        while self._flush_requested:
+            self._flush_requested = False
+            self._dirty = 0
+            await asyncio.to_thread(self._write, self.path, self._serialize())
+
+    def _serialize(self) -> str:
+        return json.dumps({"entries": self.snapshot()}, ensure_ascii=False, indent=2)
+
+    def _write(self, path: Optional[Path], text: str) -> None:
+        """Atomic write; the lock keeps a background flush and a blocking one from sharing the .tmp file."""
+        if path is None:
+            return
+        with self._write_lock:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                partial = path.with_name(path.name + ".tmp")
+                partial.write_text(text, encoding="utf-8")
+                os.replace(partial, path)
+            except OSError as exc:
+                self.logger.warning(f"Failed to save image strategy memory to {path}: {exc}")
+
+    def reset(self) -> None:
+        """Forget every learned preference so the default order is probed again."""
+        self._entries.clear()
+        self._schedule_flush()
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "base_url": base_url,
+                "model": model,
+                "preferred": entry["preferred"],
+                "calls": entry["calls"],
+                "first_choice_hits": entry["first_choice_hits"],
+                "first_choice_hit_rate": round(_ratio(entry["first_choice_hits"], entry["calls"]), 3),
+                "probes": entry["probes"],
+                "strategies": entry["strategies"],
+            }
+            for (base_url, model), entry in sorted(self._entries.items())
+        ]
+
+
+def _ratio(numerator: int, denominator: int) -> float:
+    return numerator / denominator if denominator else 0.0
+
+
+# 全局图像策略记忆实例
+_strategy_memory: Optional[StrategyMemory] = None
+
+
+def get_strategy_memory() -> StrategyMemory:
+    """获取全局图像生成策略记忆实例"""
+    global _strategy_memory
+    if _strategy_memory is None:
+        _strategy_memory = StrategyMemory()
+    return _strategy_memory
+
+
+__all__ = ["StrategyMemory", "get_strategy_memory"]
@@ -2,12 +2,14 @@ from __future__ import annotations
 
 import io
 import statistics
-from typing import Iterable, List, Optional
+import time
+from typing import AsyncIterator, Iterable, List, Optional
 
 from fastapi import UploadFile
 from PIL import Image
 
 from .llm_client import LLMClientError, OpenRouterClient
+from .model_router import ModelRouter, message_chars
 from ..utils.logger import get_logger
 
 def _to_hex(rgb: tuple[int, int, int]) -> str:
@@ -17,11 +19,30 @@ def _to_hex(rgb: tuple[int, int, int]) -> str:
 class StyleAnalyzer:
     """Generate structured prompts based on reference images."""
 
-    def __init__(self, llm_client: OpenRouterClient, chat_model: str) -> None:
+    def __init__(
+        self,
+        llm_client: OpenRouterClient,
+        chat_model: str,
+        model_router: ModelRouter | None = None,
+    ) -> None:
         self.llm_client = llm_client
         self.chat_model = chat_model
+        self.model_router = model_router
         self.logger = get_logger()
 
+    def _route_model(self, messages: list[dict[str, str]], session_id: str) -> str:
+        if self.model_router is None:
+            return self.chat_model
+        return self.model_router.route("style_analysis", message_chars(messages), session_id).model or self.chat_model
+
+    def _observe(self, model: str, started: float) -> None:
+        if self.model_router is not None:
+            self.model_router.observe(model, time.perf_counter() - started)
+
+    def _record_failure(self, model: str) -> None:
+        if self.model_router is not None:
+            self.model_router.record_failure(model)
+
     async def build_prompt(self, files: Iterable[UploadFile]) -> str:
         return await self._build_prompt_with_session(files)
 
@@ -29,7 +50,89 @@ class StyleAnalyzer:
         if session_id is None:
             # 如果没有提供session_id，生成一个临时session用于记录
             session_id = self.logger.start_session("style_analyze", file_count=len(files))
-        
+
+        messages = await self._prepare_messages(files, session_id)
+        model = self._route_model(messages, session_id)
+
+        try:
+            started = time.perf_counter()
+            response = await self.llm_client.chat(
+                messages, 
+                model=model, 
+                temperature=0.1,
+                session_id=session_id,
+                stage="style_analysis"
+            )
+            self._observe(model, started)
+            final_prompt = response
+            
+            # 记录最终结果
+            self.logger.log_response(
+                session_id=session_id,
+                stage="style_analysis_complete",
+                data={
+                    "style_prompt": final_prompt
+                },
+                success=True
+            )
+            
+            return final_prompt
+        except LLMClientError as e:
+            self._record_failure(model)
+            self.logger.log_response(
+                session_id=session_id,
+                stage="style_analysis_error",
+                data={
+                    "error": str(e)
+                },
+                success=False
+            )
+            raise
+
+    async def stream_prompt(self, files: Iterable[UploadFile], session_id: Optional[str] = None) -> AsyncIterator[str]:
+        """与 build_prompt 相同，但以流式方式逐段产出模型生成的风格提示词"""
+        if session_id is None:
+            session_id = self.logger.start_session("style_analyze_stream", file_count=len(files))
+
+        messages = await self._prepare_messages(files, session_id)
+        model = self._route_model(messages, session_id)
+
+        parts: list[str] = []
+        try:
+            started = time.perf_counter()
+            async for delta in self.llm_client.chat_stream(
+                messages,
+                model=model,
+                temperature=0.1,
+                session_id=session_id,
+                stage="style_analysis"
+            ):
+                parts.append(delta)
+                yield delta
+            self._observe(model, started)
+        except LLMClientError as e:
+            self._record_failure(model)
+            self.logger.log_response(
+                session_id=session_id,
+                stage="style_analysis_error",
+                data={
+                    "error": str(e)
+                },
+                success=False
+            )
+            raise
+
+        self.logger.log_response(
+            session_id=session_id,
+            stage="style_analysis_complete",
+            data={
+                "style_prompt": "".join(parts).strip()
+            },
+            success=True
+        )
+
+    async def _prepare_messages(self, files: Iterable[UploadFile], session_id: str) -> list[dict[str, str]]:
+        """像素分析参考图并构建风格分析的LLM消息"""
         # 记录输入文件信息
         file_info = []
         analyses = []
@@ -187,37 +290,7 @@ class StyleAnalyzer:
             }
         )
 
-        try:
-            response = await self.llm_client.chat(
-                messages, 
-                model=self.chat_model, 
-                temperature=0.1,
-                session_id=session_id,
-                stage="style_analysis"
-            )
-            final_prompt = response
-            
-            # 记录最终结果
-            self.logger.log_response(
-                session_id=session_id,
-                stage="style_analysis_complete",
-                data={
-                    "style_prompt": final_prompt
-                },
-                success=True
-            )
-            
-            return final_prompt
-        except LLMClientError as e:
-            self.logger.log_response(
-                session_id=session_id,
-                stage="style_analysis_error",
-                data={
-                    "error": str(e)
-                },
-                success=False
-            )
-            raise
+        return messages
 
     def _analyze_single(self, filename: str, img: Image.Image) -> dict:
         rgb_image = img.convert("RGB")
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+# Rolling windows reported by `UsageTracker.snapshot()` (label -> seconds).
+USAGE_WINDOWS: dict[str, int] = {"5m": 300, "1h": 3600, "24h": 86400}
+
+
+@dataclass(frozen=True)
+class UsageRecord:
+    timestamp: float
+    session_id: Optional[str]
+    model: str
+    stage: str
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    cost: float
+    cached: bool = False
+
+
+def normalize_usage(usage: Any) -> Optional[dict[str, float]]:
+    """
+    Map a gateway `usage` block to prompt/completion/total tokens and cost.
+
+    Accepts OpenAI/OpenRouter chat usage (`prompt_tokens`, `completion_tokens`)
+    and images-endpoint usage (`input_tokens`, `output_tokens`). OpenRouter's
+    `cost` is kept when the gateway reports it.
+    """
+    if not isinstance(usage, dict):
+        return None
+
+    def number(*names: str) -> float:
+        for name in names:
+            value = usage.get(name)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return float(value)
+        return 0.0
+
+    prompt = number("prompt_tokens", "input_tokens")
+    completion = number("completion_tokens", "output_tokens")
+    total = number("total_tokens") or prompt + completion
+    if not (prompt or completion or total):
+        return None
+    return {
+        "prompt_tokens": int(prompt),
+        "completion_tokens": int(completion),
+        "total_tokens": int(total),
+        "cost": number("cost", "total_cost"),
+    }
+
+
+class _Totals:
+    __slots__ = ("calls", "cached_calls", "calls_without_usage", "prompt_tokens", "completion_tokens", "total_tokens", "cost")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.cached_calls = 0
+        self.calls_without_usage = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_tokens = 0
+        self.cost = 0.0
+
+    def add(self, record: UsageRecord, has_usage: bool = True) -> None:
+        self.calls += 1
+        if record.cached:
+            self.cached_calls += 1
+        elif not has_usage:
+            self.calls_without_usage += 1
+        self.prompt_tokens += record.prompt_tokens
+        self.completion_tokens += record.completion_tokens
+        self.total_tokens += record.total_tokens
+        self.cost += record.cost
+
+    def as_dict(self) -> dict[str, Any]:
+        paid_calls = self.calls - self.cached_calls - self.calls_without_usage
+        return {
+            "calls": self.calls,
+            "cached_calls": self.cached_calls,
+            "calls_without_usage": self.calls_without_usage,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "avg_prompt_tokens": round(self.prompt_tokens / paid_calls, 1) if paid_calls > 0 else None,
+            "cost": round(self.cost, 6),
+        }
+
+
+class UsageTracker:
+    """
+    Token usage per session, model and stage.
+
+    Lifetime totals are kept per model and per stage, per-session totals for
+    the most recent `max_sessions` sessions, and individual records for the
+    largest rolling window so the 5m / 1h / 24h views can be rebuilt on demand.
+    """
+
+    def __init__(self, max_sessions: int = 500, max_records: int = 100_000) -> None:
+        self.max_sessions = max_sessions
+        self._records: deque[tuple[UsageRecord, bool]] = deque(maxlen=max_records)
+        self._by_model: dict[str, _Totals] = defaultdict(_Totals)
+        self._by_stage: dict[str, _Totals] = defaultdict(_Totals)
+        self._by_session: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._overall = _Totals()
+
+    def record(
+        self,
+        model: str,
+        stage: str,
+        usage: Any,
+        session_id: Optional[str] = None,
+        cached: bool = False,
+    ) -> Optional[dict[str, float]]:
+        """Record one call; returns the normalized usage (None if the gateway sent none)."""
+        normalized = None if cached else normalize_usage(usage)
+        values = normalized or {}
+        record = UsageRecord(
+            timestamp=time.time(),
+            session_id=session_id,
+            model=model,
+            stage=stage,
+            prompt_tokens=int(values.get("prompt_tokens", 0)),
+            completion_tokens=int(values.get("completion_tokens", 0)),
+            total_tokens=int(values.get("total_tokens", 0)),
+            cost=float(values.get("cost", 0.0)),
+            cached=cached,
+        )
+        has_usage = normalized is not None
+        self._records.append((record, has_usage))
+        self._overall.add(record, has_usage)
+        self._by_model[model].add(record, has_usage)
+        self._by_stage[stage].add(record, has_usage)
+        if session_id:
+            session = self._by_session.pop(session_id, None)
+            if session is None:
+                session = {"started_at": record.timestamp, "totals": _Totals(), "stages": defaultdict(_Totals)}
+            session["totals"].add(record, has_usage)
+            session["stages"][stage].add(record, has_usage)
+            self._by_session[session_id] = session
+            while len(self._by_session) > self.max_sessions:
+                self._by_session.popitem(last=False)
+        return normalized
+
+    def _window(self, seconds: int, now: float) -> dict[str, Any]:
+        overall = _Totals()
+        by_stage: dict[str, _Totals] = defaultdict(_Totals)
+        by_model: dict[str, _Totals] = defaultdict(_Totals)
+        for record, has_usage in reversed(self._records):
+            if now - record.timestamp > seconds:
+                break
+            overall.add(record, has_usage)
+            by_stage[record.stage].add(record, has_usage)
+            by_model[record.model].add(record, has_usage)
+        return {
+            "totals": overall.as_dict(),
+            "by_stage": _sorted_totals(by_stage.items()),
+            "by_model": _sorted_totals(by_model.items()),
+        }
+
+    def session(self, session_id: str) -> Optional[dict[str, Any]]:
+        session = self._by_session.get(session_id)
+        if session is None:
+            return None
+        return {
+            "session_id": session_id,
+            "started_at": session["started_at"],
+            "totals": session["totals"].as_dict(),
+            "by_stage": _sorted_totals(session["stages"].items()),
+        }
+
+    def snapshot(self, recent_sessions: int = 20) -> dict[str, Any]:
+        now = time.time()
+        sessions = list(self._by_session)[-recent_sessions:]
+        return {
+            "totals": self._overall.as_dict(),
+            "by_stage": _sorted_totals(self._by_stage.items()),
+            "by_model": _sorted_totals(self._by_model.items()),
+            "windows": {label: self._window(seconds, now) for label, seconds in USAGE_WINDOWS.items()},
+            "recent_sessions": [self.session(session_id) for session_id in reversed(sessions)],
+        }
+
+
+def _sorted_totals(items: Iterable[tuple[str, _Totals]]) -> dict[str, dict[str, Any]]:
+    # Heaviest first, so the stages worth trimming or caching stand out.
+    ordered = sorted(items, key=lambda item: item[1].total_tokens, reverse=True)
+    return {name: totals.as_dict() for name, totals in ordered}
+
+
+# 全局Token用量统计实例
+_usage_tracker: Optional[UsageTracker] = None
+
+
+def get_usage_tracker() -> UsageTracker:
+    """获取全局Token用量统计实例"""
+    global _usage_tracker
+    if _usage_tracker is None:
+        _usage_tracker = UsageTracker()
+    return _usage_tracker
+
+
+__all__ = ["USAGE_WINDOWS", "UsageRecord", "UsageTracker", "get_usage_tracker", "normalize_usage"]
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from ..utils.logger import get_logger
+
+# (purpose, warm-up coroutine factory); the factory returns one result dict per gateway.
+WarmupStep = tuple[str, Callable[[], Awaitable[list[dict[str, Any]]]]]
+
+
+class GatewayWarmup:
+    """
+    Readiness state of the gateway warm-up.
+
+    `schedule()` runs the warm-up steps (chat and image gateways) in the
+    background, cancelling a warm-up that is still running, e.g. when the
+    config changes again at startup. Failures are reported per gateway and
+    never block readiness: an unreachable gateway is reported, not retried.
+    """
+
+    def __init__(self) -> None:
+        self.logger = get_logger()
+        self.status = "pending"
+        self.reason: Optional[str] = None
+        self.runs = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.duration_seconds: Optional[float] = None
+        self.gateways: list[dict[str, Any]] = []
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status in ("ready", "skipped")
+
+    def schedule(self, steps: list[WarmupStep], reason: str) -> asyncio.Task[None]:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self.status = "warming"
+        self.reason = reason
+        self.runs += 1
+        self.started_at = time.time()
+        self.finished_at = None
+        self.duration_seconds = None
+        self.gateways = []
+        self._task = asyncio.get_running_loop().create_task(self._run(steps))
+        return self._task
+
+    def skip(self, reason: str) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self.status = "skipped"
+        self.reason = reason
+        self.gateways = []
+        self.finished_at = time.time()
+
+    async def _run(self, steps: list[WarmupStep]) -> None:
+        start = time.perf_counter()
+
+        async def run_step(purpose: str, factory: Callable[[], Awaitable[list[dict[str, Any]]]]) -> list[dict[str, Any]]:
+            try:
+                return [{"purpose": purpose, **result} for result in await factory()]
+            except Exception as exc:
+                return [{"purpose": purpose, "error": f"{type(exc).__name__}: {exc}"}]
+
+        results = await asyncio.gather(*(run_step(purpose, factory) for purpose, factory in steps))
+        self.gateways = [result for step in results for result in step]
+        self.duration_seconds = round(time.perf_counter() - start, 3)
+        self.finished_at = time.time()
+        self.status = "ready"
+        failed = [item for item in self.gateways if item.get("error")]
+        summary = ", ".join(
+            f"{item['purpose']} {item.get('base_url', '')}: "
+            + (item["error"] if item.get("error") else f"{item.get('opened_connections', 0)} new conn")
+            for item in self.gateways
+        )
+        log = self.logger.logger.warning if failed else self.logger.logger.info
+        log(f"Gateway warm-up finished in {self.duration_seconds:g}s ({self.reason}): {summary}")
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "status": self.status,
+            "reason": self.reason,
+            "runs": self.runs,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_seconds": self.duration_seconds,
+            "gateways": self.gateways,
+        }
+
+
+# 全局网关预热实例
+_gateway_warmup: Optional[GatewayWarmup] = None
+
+
+def get_gateway_warmup() -> GatewayWarmup:
+    """获取全局网关预热实例"""
+    global _gateway_warmup
+    if _gateway_warmup is None:
+        _gateway_warmup = GatewayWarmup()
+    return _gateway_warmup
+
+
+__all__ = ["GatewayWarmup", "WarmupStep", "get_gateway_warmup"]
@@ -129,7 +129,8 @@ class PipelineLogger:
     
     def log_llm_call(self, session_id: str, stage: str, model: str, messages: list, 
                     temperature: float = None, max_tokens: int = None, response: str = None, 
-                    error: str = None):
+                    error: str = None, timing: Dict[str, Any] = None,
+                    usage: Dict[str, Any] = None):
         """记录LLM调用的详细信息"""
         timestamp = datetime.now().isoformat()
         safe_messages = self.safe_serialize_data(messages)
@@ -147,6 +148,12 @@ class PipelineLogger:
             }
         }
         
+        if timing:
+            llm_data["timing"] = timing
+
+        if usage:
+            llm_data["usage"] = usage
+
         if response:
             llm_data["response"] = response
             self.logger.info(f"[{session_id}] 🤖 LLM {stage} | Model: {model} | Response: {response[:200]}...")
@@ -0,0 +1,108 @@
+"""
+Microbenchmark: decoding large image responses from the gateway.
+
+Compares the previous path (`response.json()` on the full body, then walking
+the object tree) with the client's fast path (orjson when installed, then
+slimming to the fields the client reads).
+
+Usage (from the backend directory):
+
+    python benchmarks/bench_json_decode.py                      # synthetic 8 MB payload
+    python benchmarks/bench_json_decode.py --size-mb 4 --size-mb 10
+    python benchmarks/bench_json_decode.py --payload recorded.json --repeat 50
+
+`--payload` takes raw response bodies saved from `/chat/completions` or
+`/images/generations`; it may be given several times.
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services import llm_client  # noqa: E402
+from app.services.llm_client import OpenRouterClient, _loads, _slim_response  # noqa: E402
+
+
+def synthetic_payload(size_mb: float) -> bytes:
+    """A chat completion carrying one data-URL image, shaped like OpenRouter's responses."""
+    image = base64.b64encode(os.urandom(int(size_mb * 1024 * 1024 * 3 / 4))).decode()
+    body = {
+        "id": "gen-benchmark",
+        "object": "chat.completion",
+        "model": "google/gemini-3-pro-image-preview",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {
+                "role": "assistant",
+                "content": "Here is the slide.",
+                "images": [{"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image}"}}],
+            },
+        }],
+        "usage": {"prompt_tokens": 812, "completion_tokens": 1290, "total_tokens": 2102},
+    }
+    return json.dumps(body).encode()
+
+
+def baseline(client: OpenRouterClient, content: bytes) -> object:
+    data = httpx.Response(200, content=content).json()
+    return client._extract_image_ref_from_chat_response(data) or data.get("data")
+
+
+def fast_path(client: OpenRouterClient, content: bytes) -> object:
+    data = _slim_response(_loads(httpx.Response(200, content=content).content))
+    return client._extract_image_ref_from_chat_response(data) or data.get("data")
+
+
+def measure(fn: Callable[[], object], repeat: int) -> tuple[float, float, float]:
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), min(timings), peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payload", action="append", type=Path, default=[], help="recorded response body")
+    parser.add_argument("--size-mb", action="append", type=float, default=[], help="synthetic payload size")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    payloads = [(path.name, path.read_bytes()) for path in args.payload]
+    for size in args.size_mb or ([] if payloads else [8.0]):
+        payloads.append((f"synthetic-{size:g}MB", synthetic_payload(size)))
+
+    client = OpenRouterClient(api_key="benchmark", base_url="https://example.invalid")
+    print(f"orjson: {'yes' if llm_client.orjson is not None else 'no (stdlib json fallback)'}")
+    print(f"{'payload':<24}{'path':<10}{'median ms':>12}{'min ms':>10}{'peak MB':>10}")
+    for name, content in payloads:
+        results = {}
+        for label, fn in (("baseline", baseline), ("fast", fast_path)):
+            assert fn(client, content) == baseline(client, content)
+            median, best, peak = measure(lambda: fn(client, content), args.repeat)
+            results[label] = median
+            print(f"{name:<24}{label:<10}{median * 1000:>12.2f}{best * 1000:>10.2f}{peak / 1e6:>10.1f}")
+        print(f"{'':<24}speedup {results['baseline'] / results['fast']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+# The app creates logs/ and data/ relative to the working directory on import;
+# run the suite from a scratch directory so the checkout stays clean.
+os.chdir(tempfile.mkdtemp(prefix="aippt-tests-"))
+
+
+class FakeClock:
+    """Manually advanced replacement for time.monotonic."""
+
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def make_client(handler, base_url: str = "https://gw.example", **overrides):
+    """An OpenRouterClient whose requests are answered by `handler` and whose shared state is private."""
+    import httpx
+
+    from app.services.endpoint_resolver import EndpointResolver
+    from app.services.http_pool import HTTPClientPool, PoolLimits
+    from app.services.llm_client import OpenRouterClient
+    from app.services.rate_limiter import RateLimiterRegistry
+    from app.services.retry_budget import RetryBudget, RetryPolicy
+    from app.services.single_flight import SingleFlight
+
+    http_pool = HTTPClientPool()
+    http_pool.configure(PoolLimits(http2=False), transport_wrapper=lambda _transport: httpx.MockTransport(handler))
+    options = {
+        "http_pool": http_pool,
+        "endpoint_resolver": EndpointResolver(),
+        "rate_limiter": RateLimiterRegistry(),
+        "single_flight": SingleFlight(),
+        "retry_budget": RetryBudget(RetryPolicy(max_attempts=1)),
+        **overrides,
+    }
+    return OpenRouterClient(api_key="test", base_url=base_url, **options)
+
+
+def chat_reply(text: str = "ok") -> dict:
+    return {"choices": [{"message": {"role": "assistant", "content": text}}]}
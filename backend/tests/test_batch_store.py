@@ -0,0 +1,135 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from uuid import UUID, uuid4
+
+from app.schemas.generation import BatchGenerateItem
+from app.schemas.slide import SlideData, SlideStatus
+from app.services.batch_image_generator import BatchImageGenerator
+from app.services.batch_store import BatchStore
+from app.services.prompt_builder import PromptBuilder
+
+
+def slides(count: int) -> list[SlideData]:
+    return [
+        SlideData(page_num=index + 1, title=f"Slide {index + 1}", content_text="text", visual_desc="desc")
+        for index in range(count)
+    ]
+
+
+def done_item(slide: SlideData) -> BatchGenerateItem:
+    return BatchGenerateItem(
+        slide_id=slide.id, page_num=slide.page_num, title=slide.title, image_url=f"/assets/{slide.page_num}.png",
+        final_prompt="prompt", status=SlideStatus.done, generation_time=1.0
+    )
+
+
+class FakeImageGenerator:
+    """Stands in for ImageGenerator: records which slides were generated."""
+
+    image_model = "image-model"
+
+    def __init__(self) -> None:
+        self.llm_client = SimpleNamespace(gateway_pool=None, rate_limit_scope="https://gw.example")
+        self.generated: list[int] = []
+
+    async def create(self, title, final_prompt, aspect_ratio, page_num=None, **options):
+        self.generated.append(page_num)
+        return SimpleNamespace(image_url=f"/assets/{page_num}.png")
+
+
+def seed(path, batch_slides: list[SlideData], done_positions: list[int]) -> str:
+    store = BatchStore(path)
+    batch_id = str(uuid4())
+    store.create(batch_id, batch_slides, "style", "16:9", 4, None, 1.0, time.time())
+    for seq, position in enumerate(done_positions, start=1):
+        store.record_result(batch_id, position, done_item(batch_slides[position]), seq)
+    return batch_id
+
+
+def test_store_round_trip_keeps_results_in_completion_order(tmp_path):
+    path = tmp_path / "batches.sqlite3"
+    batch_slides = slides(3)
+    batch_id = seed(path, batch_slides, done_positions=[2, 0])
+
+    [stored] = BatchStore(path).load_all()
+    assert stored.batch_id == batch_id
+    assert stored.status == "running"
+    assert [slide.id for slide in stored.slides] == [slide.id for slide in batch_slides]
+    assert [item.page_num for item in stored.results] == [3, 1]
+    assert stored.pending_positions == [1]
+
+    store = BatchStore(path)
+    store.finish(batch_id, "completed")
+    [stored] = BatchStore(path).load_all()
+    assert stored.status == "completed"
+    assert stored.finished_at is not None
+
+    store.delete([batch_id])
+    assert BatchStore(path).load_all() == []
+
+
+def test_resume_generates_only_the_pending_slides(tmp_path):
+    path = tmp_path / "batches.sqlite3"
+    batch_slides = slides(4)
+    batch_id = seed(path, batch_slides, done_positions=[0, 3])
+    images = FakeImageGenerator()
+
+    async def run():
+        generator = BatchImageGenerator(images, PromptBuilder(), store=BatchStore(path))
+        assert await generator.resume() == 1
+        batch_task = generator.active_batches[UUID(batch_id)]
+        assert await generator.wait_until_done(batch_task, timeout=5)
+        return batch_task
+
+    batch_task = asyncio.run(run())
+    assert sorted(images.generated) == [2, 3]
+    assert batch_task.status == "completed"
+    assert batch_task.success_count == 4
+    [stored] = BatchStore(path).load_all()
+    assert stored.status == "completed"
+    assert stored.pending_positions == []
+    assert len(stored.results) == 4
+
+
+def test_batches_without_an_api_key_wait_for_resume_deferred(tmp_path):
+    path = tmp_path / "batches.sqlite3"
+    batch_id = UUID(seed(path, slides(2), done_positions=[1]))
+    images = FakeImageGenerator()
+
+    async def run():
+        generator = BatchImageGenerator(images, PromptBuilder(), store=BatchStore(path))
+        assert await generator.resume(generate=False) == 0
+        batch_task = generator.active_batches[batch_id]
+        await asyncio.sleep(0)
+        assert batch_task.status == "running"
+        assert images.generated == []
+
+        assert generator.resume_deferred() == 1
+        assert await generator.wait_until_done(batch_task, timeout=5)
+        assert generator.resume_deferred() == 0
+        return batch_task
+
+    batch_task = asyncio.run(run())
+    assert images.generated == [1]
+    assert batch_task.status == "completed"
+
+
+def test_create_batch_persists_and_cleanup_removes_old_finished_batches(tmp_path):
+    path = tmp_path / "batches.sqlite3"
+    images = FakeImageGenerator()
+
+    async def run():
+        generator = BatchImageGenerator(images, PromptBuilder(), store=BatchStore(path))
+        old_id = await generator.create_batch(slides(1), "style")
+        recent_id = await generator.create_batch(slides(1), "style")
+        for batch_id in (old_id, recent_id):
+            assert await generator.wait_until_done(generator.active_batches[batch_id], timeout=5)
+        generator.active_batches[old_id].finished_at -= 3 * 3600
+
+        assert await generator.cleanup_completed_batches(max_age_hours=2) == 1
+        assert list(generator.active_batches) == [recent_id]
+        return recent_id
+
+    recent_id = asyncio.run(run())
+    assert [stored.batch_id for stored in BatchStore(path).load_all()] == [str(recent_id)]
@@ -0,0 +1,98 @@
+import pytest
+from conftest import FakeClock
+
+from app.services.circuit_breaker import BreakerPolicy, CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError
+from app.services.deadline import DeadlineExceeded
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def breaker(clock, **policy) -> CircuitBreaker:
+    return CircuitBreaker(("https://gw.example", "chat"), BreakerPolicy(**policy), clock)
+
+
+def fail(breaker: CircuitBreaker, times: int = 1) -> None:
+    for _ in range(times):
+        with pytest.raises(RuntimeError):
+            with breaker.guard():
+                raise RuntimeError("boom")
+
+
+def test_opens_after_consecutive_failures(clock):
+    b = breaker(clock, failure_threshold=3)
+    fail(b, 2)
+    assert b.state == CircuitBreaker.CLOSED
+    fail(b)
+    assert b.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        with b.guard():
+            pass
+    assert b.stats["rejected"] == 1
+
+
+def test_success_resets_the_failure_count(clock):
+    b = breaker(clock, failure_threshold=3)
+    fail(b, 2)
+    with b.guard():
+        pass
+    fail(b, 2)
+    assert b.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_after_timeout_admits_limited_probes(clock):
+    b = breaker(clock, failure_threshold=1, reset_timeout_seconds=30, half_open_max_calls=1)
+    fail(b)
+    clock.advance(29.9)
+    assert not b.allow()
+
+    clock.advance(0.1)
+    assert b.allow()
+    assert b.state == CircuitBreaker.HALF_OPEN
+    assert not b.allow()  # the single probe slot is taken
+
+
+def test_half_open_probe_success_closes(clock):
+    b = breaker(clock, failure_threshold=1, reset_timeout_seconds=30)
+    fail(b)
+    clock.advance(30)
+    with b.guard():
+        pass
+    assert b.state == CircuitBreaker.CLOSED
+    assert b.allow() and b.allow()
+
+
+def test_half_open_probe_failure_reopens_with_a_fresh_timeout(clock):
+    b = breaker(clock, failure_threshold=1, reset_timeout_seconds=30)
+    fail(b)
+    clock.advance(30)
+    fail(b)
+    assert b.state == CircuitBreaker.OPEN
+    assert b.stats["opened"] == 2
+    clock.advance(29)
+    assert not b.allow()
+    assert b.snapshot()["retry_in_seconds"] == 1.0
+
+
+@pytest.mark.parametrize("error", [DeadlineExceeded("late"), KeyboardInterrupt()])
+def test_abandoned_probe_frees_its_slot_without_counting(clock, error):
+    b = breaker(clock, failure_threshold=1, reset_timeout_seconds=30)
+    fail(b)
+    clock.advance(30)
+    with pytest.raises(type(error)):
+        with b.guard():
+            raise error
+    assert b.state == CircuitBreaker.HALF_OPEN
+    assert b.stats["failures"] == 1
+    assert b.allow()
+
+
+def test_registry_reset_closes_breakers_of_one_gateway(clock):
+    registry = CircuitBreakerRegistry(BreakerPolicy(failure_threshold=1), clock)
+    fail(registry.get("https://a.example/", "chat"))
+    fail(registry.get("https://b.example", "chat"))
+    assert registry.reset("https://a.example") == 1
+    assert registry.get("https://a.example", "chat").state == CircuitBreaker.CLOSED
+    assert registry.get("https://b.example", "chat").state == CircuitBreaker.OPEN
@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from conftest import make_client
+
+from app.services.deadline import Deadline, DeadlineExceeded
+from app.services.llm_client import LLMClientError
+
+
+def test_empty_or_zero_budget_means_no_deadline():
+    assert Deadline.after(None) is None
+    assert Deadline.after(0) is None
+    assert Deadline.after(5).budget == 5.0
+
+
+def test_attempt_timeout_is_capped_by_what_is_left():
+    deadline = Deadline(10)
+    assert deadline.timeout(3) == 3
+    assert 9 < deadline.timeout(60) <= 10
+    assert deadline.allows_wait(5)
+    assert not deadline.allows_wait(11)
+
+
+def test_expired_deadline_refuses_another_attempt():
+    deadline = Deadline(0.01)
+    time.sleep(0.02)
+    assert deadline.expired
+    with pytest.raises(DeadlineExceeded):
+        deadline.timeout(60)
+
+
+def test_coalesced_follower_gives_up_at_its_own_deadline():
+    async def run():
+        gate = asyncio.Event()
+
+        async def handler(request):
+            await gate.wait()
+            return httpx.Response(500)
+
+        client = make_client(handler)
+        # The leader has no deadline; the follower joins its flight with 0.2 s to spare.
+        leader = asyncio.create_task(client.generate_image("a cat", "image-model", 512, 512))
+        await asyncio.sleep(0.01)
+        started = time.monotonic()
+        with pytest.raises(LLMClientError, match="deadline"):
+            await client.generate_image("a cat", "image-model", 512, 512, deadline=Deadline(0.2))
+        assert time.monotonic() - started < 1.5
+        assert not leader.done()
+        assert client.single_flight.snapshot()["in_flight"] == 1
+
+        gate.set()
+        with pytest.raises(LLMClientError):
+            await leader
+
+    asyncio.run(run())
@@ -0,0 +1,77 @@
+from conftest import FakeClock
+
+from app.services.endpoint_resolver import EndpointResolver
+
+BASE = "https://gw.example"
+PATH = "/chat/completions"
+V1 = f"{BASE}/v1/chat/completions"
+API_V1 = f"{BASE}/api/v1/chat/completions"
+CANDIDATES = [V1, API_V1]
+
+
+def test_learned_url_is_tried_first():
+    resolver = EndpointResolver()
+    resolver.record_success(BASE, PATH, API_V1)
+    assert resolver.order(BASE, PATH, CANDIDATES) == [API_V1, V1]
+
+
+def test_wrong_path_candidates_are_skipped_until_they_expire():
+    clock = FakeClock()
+    resolver = EndpointResolver(bad_ttl_seconds=60, clock=clock)
+    resolver.record_success(BASE, PATH, API_V1, failed=[V1])
+    assert resolver.order(BASE, PATH, CANDIDATES) == [API_V1]
+
+    clock.advance(61)
+    assert resolver.order(BASE, PATH, CANDIDATES) == [API_V1, V1]
+    assert resolver.snapshot()[0]["known_bad"] == []
+
+
+def test_success_clears_a_bad_mark():
+    resolver = EndpointResolver()
+    resolver.record_success(BASE, PATH, API_V1, failed=[V1])
+    resolver.record_success(BASE, PATH, V1)
+    assert resolver.order(BASE, PATH, CANDIDATES) == [V1, API_V1]
+
+
+def test_all_candidates_bad_falls_back_to_full_list():
+    resolver = EndpointResolver()
+    resolver.record_success(BASE, PATH, "other", failed=CANDIDATES)
+    assert resolver.order(BASE, PATH, CANDIDATES) == CANDIDATES
+
+
+def test_reset_forgets_everything():
+    resolver = EndpointResolver()
+    resolver.record_success(BASE, PATH, API_V1, failed=[V1])
+    resolver.reset()
+    assert resolver.order(BASE, PATH, CANDIDATES) == CANDIDATES
+    assert resolver.snapshot() == []
+
+
+def _chat_with_first_candidate_answering(status: int):
+    import asyncio
+
+    import httpx
+
+    from conftest import chat_reply, make_client
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/chat/completions":
+            return httpx.Response(status, text="nope")
+        return httpx.Response(200, json=chat_reply())
+
+    client = make_client(handler, base_url=BASE)
+    assert asyncio.run(client.chat([{"role": "user", "content": "hi"}], model="m")) == "ok"
+    return client.endpoint_resolver.snapshot()[0]
+
+
+def test_client_marks_wrong_path_candidate_bad():
+    entry = _chat_with_first_candidate_answering(404)
+    assert entry["preferred"] == f"{BASE}/v1/chat/completions"
+    assert entry["known_bad"] == [f"{BASE}/chat/completions"]
+
+
+def test_client_does_not_mark_transient_failures_bad():
+    for status in (429, 500, 503, 400):
+        entry = _chat_with_first_candidate_answering(status)
+        assert entry["preferred"] == f"{BASE}/v1/chat/completions"
+        assert entry["known_bad"] == []
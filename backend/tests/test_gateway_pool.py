@@ -0,0 +1,147 @@
+import asyncio
+
+import httpx
+import pytest
+from conftest import chat_reply, make_client
+
+from app.services.gateway_pool import GatewayMemberSpec, GatewayPool, PoolPolicy
+from app.services.llm_client import LLMClientError
+
+BASE = "https://gw.example/v1"  # a single endpoint candidate, so one reply per call
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def pool(*names, **policy) -> GatewayPool:
+    specs = [GatewayMemberSpec(name=name, api_key=f"key-{name}", base_url=BASE) for name in names]
+    return GatewayPool("chat", specs, PoolPolicy(**policy))
+
+
+def key_of(request: httpx.Request) -> str:
+    return request.headers["authorization"].removeprefix("Bearer key-")
+
+
+def chat(client, content: str = "hi") -> str:
+    return asyncio.run(client.chat([{"role": "user", "content": content}], model="m"))
+
+
+def test_server_error_is_counted_once():
+    gateway = pool("a")
+    client = make_client(lambda request: httpx.Response(503), base_url=BASE, gateway_pool=gateway)
+    with pytest.raises(LLMClientError):
+        chat(client)
+    member = gateway.members[0]
+    assert member.stats["failures"] == 1
+    assert member.consecutive_failures == 1
+
+
+def test_client_errors_do_not_count_towards_draining():
+    gateway = pool("a", failure_threshold=2)
+    client = make_client(lambda request: httpx.Response(400, text="bad prompt"), base_url=BASE, gateway_pool=gateway)
+    for index in range(3):
+        with pytest.raises(LLMClientError):
+            chat(client, f"prompt {index}")
+    member = gateway.members[0]
+    assert member.stats["failures"] == 0
+    assert not member.is_drained()
+
+
+def test_transport_errors_are_counted():
+    def handler(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    gateway = pool("a")
+    client = make_client(handler, base_url=BASE, gateway_pool=gateway)
+    with pytest.raises(LLMClientError):
+        chat(client)
+    assert gateway.members[0].stats["failures"] == 1
+
+
+def test_throttled_member_is_drained_and_the_call_fails_over():
+    def handler(request):
+        if key_of(request) == "a":
+            return httpx.Response(429, headers={"retry-after": "30"})
+        return httpx.Response(200, json=chat_reply("from b"))
+
+    gateway = pool("a", "b")
+    gateway.members[1].in_flight = 1  # make "a" the first pick
+    client = make_client(handler, base_url=BASE, gateway_pool=gateway)
+    assert chat(client) == "from b"
+    a, b = gateway.members
+    assert a.is_drained() and a.stats["throttled"] == 1 and a.stats["failovers"] == 1
+    assert b.stats["successes"] == 1
+
+
+def test_identical_concurrent_calls_coalesce_across_members():
+    calls = []
+
+    async def handler(request):
+        calls.append(key_of(request))
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json=chat_reply())
+
+    client = make_client(handler, base_url=BASE, gateway_pool=pool("a", "b"))
+
+    async def run():
+        return await asyncio.gather(*(client.chat(MESSAGES, model="m") for _ in range(6)))
+
+    assert asyncio.run(run()) == ["ok"] * 6
+    assert len(calls) == 1
+
+
+def test_lease_prefers_the_lowest_weighted_load():
+    specs = [
+        GatewayMemberSpec(name="heavy", api_key="k1", base_url=BASE, weight=3.0),
+        GatewayMemberSpec(name="light", api_key="k2", base_url=BASE, weight=1.0),
+    ]
+    gateway = GatewayPool("chat", specs)
+
+    async def run():
+        leases = []
+        for _ in range(4):
+            lease = gateway.lease()
+            leases.append((lease, await lease.__aenter__()))
+        names = [member.name for _, member in leases]
+        for lease, _ in leases:
+            await lease.__aexit__(None, None, None)
+        return names
+
+    names = asyncio.run(run())
+    assert names.count("heavy") == 3 and names.count("light") == 1
+
+
+def test_full_pool_waits_for_a_release():
+    gateway = GatewayPool("chat", [GatewayMemberSpec(name="a", api_key="k", base_url=BASE, max_concurrency=1)])
+
+    async def run():
+        first = gateway.lease()
+        await first.__aenter__()
+        second = gateway.lease()
+        waiter = asyncio.create_task(second.__aenter__())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        await first.__aexit__(None, None, None)
+        member = await asyncio.wait_for(waiter, 1)
+        assert member.in_flight == 1
+        await second.__aexit__(None, None, None)
+
+    asyncio.run(run())
+
+
+def test_lease_keeps_waiting_past_the_recheck_interval():
+    gateway = GatewayPool("chat", [GatewayMemberSpec(name="a", api_key="k", base_url=BASE, max_concurrency=1)])
+
+    async def run():
+        first = gateway.lease()
+        await first.__aenter__()
+        second = gateway.lease()
+        waiter = asyncio.create_task(second.__aenter__())
+        # Outlast the 1 s re-check, which must loop rather than raise.
+        await asyncio.sleep(1.2)
+        assert not waiter.done()
+        await first.__aexit__(None, None, None)
+        member = await asyncio.wait_for(waiter, 1)
+        assert member.in_flight == 1
+        await second.__aexit__(None, None, None)
+        assert gateway.stats["waited"] == 1
+
+    asyncio.run(run())
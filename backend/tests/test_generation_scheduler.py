@@ -0,0 +1,165 @@
+import asyncio
+
+import pytest
+
+from app.services.generation_scheduler import GenerationScheduler, SchedulerPolicy
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class Harness:
+    """Starts scheduler waiters that record when they are granted and hold the slot until released."""
+
+    def __init__(self, max_concurrency: int) -> None:
+        self.scheduler = GenerationScheduler(SchedulerPolicy(max_concurrency=max_concurrency))
+        self.granted: list[str] = []
+        self.release = asyncio.Event()
+        self.tasks: list[asyncio.Task] = []
+
+    def start(self, name: str, lane: str = "batch", flow: str = "", weight: float = 1.0, hold: bool = True):
+        async def run():
+            async with self.scheduler.slot(lane, flow, weight):
+                self.granted.append(name)
+                if hold:
+                    await self.release.wait()
+
+        task = asyncio.create_task(run())
+        self.tasks.append(task)
+        return task
+
+    def running(self, flow: str) -> int:
+        return self.scheduler.snapshot()["flows"].get(flow, {}).get("running", 0)
+
+
+def test_concurrency_is_capped_and_freed_slots_are_handed_on():
+    async def run():
+        h = Harness(max_concurrency=2)
+        for index in range(5):
+            h.start(f"job{index}", flow="f")
+        await settle()
+        assert h.granted == ["job0", "job1"]
+        assert h.scheduler.running == 2
+        assert h.scheduler.snapshot()["lanes"]["batch"]["queue_depth"] == 3
+        h.release.set()
+        await asyncio.gather(*h.tasks)
+        assert len(h.granted) == 5
+        assert h.scheduler.running == 0
+        assert h.scheduler.snapshot()["flows"] == {}
+
+    asyncio.run(run())
+
+
+def test_interactive_lane_is_served_before_batch():
+    async def run():
+        h = Harness(max_concurrency=1)
+        blocker = asyncio.Event()
+
+        async def hold():
+            async with h.scheduler.slot("batch", "blocker"):
+                await blocker.wait()
+
+        holder = asyncio.create_task(hold())
+        await settle()
+        for index in range(3):
+            h.start(f"batch{index}", "batch", "big", hold=False)
+        await settle()
+        h.start("click", "interactive", hold=False)
+        await settle()
+        blocker.set()
+        await asyncio.gather(holder, *h.tasks)
+        assert h.granted == ["click", "batch0", "batch1", "batch2"]
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("small_weight, expected", [(1.0, (2, 2)), (3.0, (1, 3))])
+def test_slots_are_shared_between_flows_by_weight(small_weight, expected):
+    async def run():
+        h = Harness(max_concurrency=4)
+        blocker = asyncio.Event()
+
+        async def hold():
+            async with h.scheduler.slot("batch", "blocker"):
+                await blocker.wait()
+
+        holders = [asyncio.create_task(hold()) for _ in range(4)]
+        await settle()
+        # The large batch queues first; it must not take every freed slot.
+        for index in range(10):
+            h.start(f"large{index}", flow="large")
+        for index in range(4):
+            h.start(f"small{index}", flow="small", weight=small_weight)
+        await settle()
+        blocker.set()
+        await settle()
+        assert (h.running("large"), h.running("small")) == expected
+        h.release.set()
+        await asyncio.gather(*holders, *h.tasks)
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_leaves_the_queue_without_taking_a_slot():
+    async def run():
+        h = Harness(max_concurrency=1)
+        h.start("first", flow="f")
+        queued = h.start("cancelled", flow="f")
+        h.start("last", flow="f")
+        await settle()
+        queued.cancel()
+        await settle()
+        stats = h.scheduler.snapshot()["lanes"]["batch"]
+        assert stats["queue_depth"] == 1
+        assert stats["cancelled"] == 1
+        h.release.set()
+        await asyncio.gather(*h.tasks, return_exceptions=True)
+        assert h.granted == ["first", "last"]
+        assert h.scheduler.running == 0
+
+    asyncio.run(run())
+
+
+def test_waiter_cancelled_as_a_slot_frees_is_skipped():
+    async def run():
+        h = Harness(max_concurrency=1)
+        h.start("first", flow="f")
+        queued = h.start("cancelled", flow="f")
+        h.start("last", flow="f", hold=False)
+        await settle()
+        # The freed slot is dispatched before the cancelled waiter's task gets to run.
+        h.release.set()
+        queued.cancel()
+        await asyncio.gather(*h.tasks, return_exceptions=True)
+        assert h.granted == ["first", "last"]
+        assert h.scheduler.running == 0
+        assert h.scheduler.snapshot()["lanes"]["batch"]["queue_depth"] == 0
+
+    asyncio.run(run())
+
+
+def test_raising_the_limit_dispatches_waiters_immediately():
+    async def run():
+        h = Harness(max_concurrency=1)
+        for index in range(3):
+            h.start(f"job{index}", flow="f")
+        await settle()
+        assert h.granted == ["job0"]
+        h.scheduler.configure(SchedulerPolicy(max_concurrency=3))
+        await settle()
+        assert h.granted == ["job0", "job1", "job2"]
+        h.release.set()
+        await asyncio.gather(*h.tasks)
+
+    asyncio.run(run())
+
+
+def test_unknown_lane_is_rejected():
+    async def run():
+        async with GenerationScheduler().slot("background"):
+            pass
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from app.services.hedging import HedgePolicy, ImageRequestHedger, LatencyTracker
+
+BASE, MODEL = "https://gw.example", "image"
+
+
+def hedger(**policy) -> ImageRequestHedger:
+    options = {"enabled": True, "min_delay_seconds": 0.02, "min_samples": 3, "budget_per_minute": 10, **policy}
+    hedger = ImageRequestHedger(HedgePolicy(**options))
+    for _ in range(options["min_samples"]):
+        hedger._tracker(BASE, MODEL).observe(0.001)
+    return hedger
+
+
+class Requests:
+    """Factory whose n-th call sleeps `delays[n]` and returns its index; records cancellations."""
+
+    def __init__(self, *delays, error_on=()) -> None:
+        self.delays = delays
+        self.error_on = error_on
+        self.started = 0
+        self.cancelled = []
+
+    async def __call__(self):
+        index = self.started
+        self.started += 1
+        try:
+            await asyncio.sleep(self.delays[index])
+        except asyncio.CancelledError:
+            self.cancelled.append(index)
+            raise
+        if index in self.error_on:
+            raise RuntimeError(f"request {index} failed")
+        return index
+
+
+def test_latency_tracker_percentiles():
+    tracker = LatencyTracker(max_samples=4)
+    assert tracker.percentile(0.5) is None
+    for value in (5, 1, 3, 2, 4):
+        tracker.observe(value)
+    assert len(tracker) == 4  # the oldest sample (5) was dropped
+    assert tracker.percentile(0.5) == 3
+    assert tracker.percentile(1.0) == 4
+
+
+def test_hedge_delay_needs_enough_samples_and_respects_the_floor():
+    assert ImageRequestHedger(HedgePolicy(enabled=False)).hedge_delay(BASE, MODEL) is None
+    h = hedger(min_samples=3, min_delay_seconds=2.0)
+    assert h.hedge_delay(BASE, "unseen-model") is None
+    assert h.hedge_delay(BASE, MODEL) == 2.0
+    for _ in range(20):
+        h._tracker(BASE, MODEL).observe(7.0)
+    assert h.hedge_delay(BASE, MODEL) == 7.0
+
+
+def test_fast_primary_is_not_hedged():
+    h, requests = hedger(), Requests(0)
+    assert asyncio.run(h.run(BASE, MODEL, requests)) == 0
+    assert requests.started == 1
+    assert h.stats["hedges_fired"] == 0
+
+
+def test_slow_primary_is_hedged_and_cancelled_when_the_hedge_wins():
+    h, requests = hedger(), Requests(5, 0)
+    assert asyncio.run(h.run(BASE, MODEL, requests)) == 1
+    assert requests.cancelled == [0]
+    assert h.stats["hedges_fired"] == 1
+    assert h.stats["hedge_wins"] == 1
+
+
+def test_hedge_is_cancelled_when_the_primary_wins():
+    h, requests = hedger(), Requests(0.05, 5)
+    assert asyncio.run(h.run(BASE, MODEL, requests)) == 0
+    assert requests.cancelled == [1]
+    assert h.stats["primary_wins"] == 1
+
+
+def test_failed_request_falls_back_to_the_other_one():
+    h, requests = hedger(), Requests(0.05, 0.1, error_on={0})
+    assert asyncio.run(h.run(BASE, MODEL, requests)) == 1
+
+
+def test_error_is_raised_when_every_request_fails():
+    h, requests = hedger(), Requests(0.05, 0.05, error_on={0, 1})
+    with pytest.raises(RuntimeError):
+        asyncio.run(h.run(BASE, MODEL, requests))
+
+
+def test_cancelling_the_caller_cancels_both_requests():
+    h, requests = hedger(), Requests(5, 5)
+
+    async def run():
+        caller = asyncio.create_task(h.run(BASE, MODEL, requests))
+        await asyncio.sleep(0.1)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert sorted(requests.cancelled) == [0, 1]
+
+
+def test_budget_caps_hedges_per_minute():
+    h = hedger(budget_per_minute=1)
+    asyncio.run(h.run(BASE, MODEL, Requests(0.05, 0.05)))
+    requests = Requests(0.3)  # well past the hedge delay learned from the first run
+    asyncio.run(h.run(BASE, MODEL, requests))
+    assert requests.started == 1
+    assert h.stats["budget_exhausted"] == 1
+    assert h.snapshot()["budget_remaining"] == 0
@@ -0,0 +1,39 @@
+import base64
+import io
+import os
+
+import httpx
+import pytest
+from conftest import make_client
+
+from app.services import llm_client
+
+PREFIX = "data:image/png;base64,"
+IMAGE = os.urandom(6000)
+ENCODED = base64.b64encode(IMAGE).decode()
+
+
+def decode(value: str, start: int = 0) -> bytes:
+    sink = io.BytesIO()
+    client = make_client(lambda request: httpx.Response(404))
+    assert client._write_base64(value, start, sink) == len(sink.getvalue())
+    return sink.getvalue()
+
+
+@pytest.fixture(params=[1000, 1 << 20], ids=["small-slices", "default-slices"])
+def slice_chars(request, monkeypatch):
+    monkeypatch.setattr(llm_client, "_BASE64_CHUNK_CHARS", request.param)
+
+
+def test_plain_payload_after_a_data_url_prefix(slice_chars):
+    assert decode(PREFIX + ENCODED, len(PREFIX)) == IMAGE
+
+
+def test_mime_wrapped_payload(slice_chars):
+    wrapped = "\r\n".join(ENCODED[offset:offset + 76] for offset in range(0, len(ENCODED), 76))
+    assert decode(wrapped) == IMAGE
+
+
+def test_whitespace_only_after_the_first_kilobyte(slice_chars):
+    value = ENCODED[:1500] + "\n" + ENCODED[1500:3001] + " " + ENCODED[3001:] + "\n"
+    assert decode(value) == IMAGE
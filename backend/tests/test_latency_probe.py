@@ -0,0 +1,43 @@
+import asyncio
+
+import httpx
+from conftest import chat_reply, make_client
+
+BASE = "http://127.0.0.1:9/v1"  # resolves locally; never actually dialled
+
+
+def test_probes_go_through_the_shared_pool_and_its_transport():
+    seen = []
+
+    def handler(request):
+        seen.append((request.url.path, request.headers["authorization"]))
+        return httpx.Response(200, json=chat_reply("pong"), headers={"x-ratelimit-remaining": "41"})
+
+    client = make_client(handler, base_url=BASE)
+
+    async def run():
+        result = await client.probe_latency("chat", "m", probes=3)
+        # One acquisition of the pooled client for the candidate that answered.
+        [pooled] = client.http_pool.stats()["clients"]
+        assert pooled["requests_total"] == 1
+        return result
+
+    result = asyncio.run(run())
+    assert seen == [("/v1/chat/completions", "Bearer test")] * 3
+    assert result["endpoint"] == f"{BASE}/chat/completions"
+    assert result["succeeded"] == 3
+    assert result["status_codes"] == {"200": 3}
+    assert result["rate_limit_headers"] == {"x-ratelimit-remaining": "41"}
+    assert result["phases"]["total"]["max"] is not None
+
+
+def test_wrong_prefix_moves_on_to_the_next_candidate():
+    def handler(request):
+        if request.url.path.startswith("/v1/"):
+            return httpx.Response(200, json=chat_reply("pong"))
+        return httpx.Response(404)
+
+    client = make_client(handler, base_url="http://127.0.0.1:9")
+    result = asyncio.run(client.probe_latency("chat", "m", probes=2))
+    assert result["endpoint"] == "http://127.0.0.1:9/v1/chat/completions"
+    assert result["succeeded"] == 2
@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from conftest import make_client
+
+from app.services.model_router import ModelRouter, ModelRoutingPolicy, message_chars
+from app.services.outline_generator import OutlineGenerator
+
+
+def router(**policy) -> ModelRouter:
+    options = {
+        "default_model": "main",
+        "stage_models": {"outline": "outline-model"},
+        "fast_model": "fast",
+        "downgrade_stages": ("outline",),
+        **policy,
+    }
+    return ModelRouter(ModelRoutingPolicy(**options))
+
+
+def test_stage_model_falls_back_to_the_default():
+    r = router()
+    assert r.route("outline", 1000).model == "outline-model"
+    assert r.route("insert_slide", 1000).model == "main"
+
+
+def test_small_input_is_downgraded_only_for_listed_stages():
+    r = router(small_input_chars=100, stage_models={})
+    assert r.route("outline", 99).reason == "small_input"
+    assert r.route("outline", 100).model == "main"
+    assert r.route("insert_slide", 10).model == "main"
+
+
+def test_slow_primary_is_downgraded_with_periodic_probes():
+    r = router(p95_threshold_seconds=5, min_samples=3, probe_interval=3)
+    for _ in range(3):
+        r.observe("outline-model", 10.0)
+    reasons = [r.route("outline", 1000).reason for _ in range(6)]
+    assert reasons == ["slow_primary", "slow_primary", "probe"] * 2
+
+
+def test_failures_are_counted_per_model():
+    r = router()
+    r.record_failure("outline-model")
+    assert r.snapshot()["failures"] == {"outline-model": 1}
+
+
+def test_message_chars_counts_text_parts():
+    messages = [{"content": "abc"}, {"content": [{"type": "text", "text": "de"}, {"type": "image_url"}]}]
+    assert message_chars(messages) == 5
+
+
+def _sse(*deltas: str) -> bytes:
+    events = [f"data: {json.dumps({'choices': [{'delta': {'content': delta}}]})}\n\n" for delta in deltas]
+    return "".join(events + ["data: [DONE]\n\n"]).encode()
+
+
+def _stream(generator: OutlineGenerator) -> str:
+    async def run():
+        parts = []
+        async for delta in generator.chat_stream(
+            [{"role": "user", "content": "x" * 500}], "outline", 0.3, "session", "outline_generation_stream"
+        ):
+            parts.append(delta)
+        return "".join(parts)
+
+    return asyncio.run(run())
+
+
+def test_outline_stream_uses_the_routed_model_and_reports_latency():
+    models = []
+
+    def handler(request):
+        models.append(json.loads(request.content)["model"])
+        return httpx.Response(200, content=_sse("[", "]"), headers={"content-type": "text/event-stream"})
+
+    r = router()
+    generator = OutlineGenerator(make_client(handler), "main", model_router=r)
+    assert _stream(generator) == "[]"
+    assert models == ["outline-model"]
+    assert r.snapshot()["decisions"] == {"outline": {"primary": 1}}
+    assert r.snapshot()["latency"]["outline-model"]["samples"] == 1
+
+
+def test_outline_stream_failure_is_reported():
+    r = router()
+    generator = OutlineGenerator(make_client(lambda request: httpx.Response(500)), "main", model_router=r)
+    with pytest.raises(Exception):
+        _stream(generator)
+    assert r.snapshot()["failures"] == {"outline-model": 1}
+    assert "outline-model" not in r.snapshot()["latency"]
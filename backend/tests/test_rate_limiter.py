@@ -0,0 +1,186 @@
+import asyncio
+
+import httpx
+import pytest
+from conftest import FakeClock
+
+from app.services.rate_limiter import AdaptiveRateLimiter, RateLimitPermit, RateLimitPolicy
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake clock; asyncio.sleep advances it instead of waiting, and records the delays."""
+    clock = FakeClock()
+    clock.sleeps = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay, result=None):
+        if delay:
+            clock.sleeps.append(round(delay, 6))
+            clock.advance(delay)
+        return await real_sleep(0, result)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    return clock
+
+
+def limiter(clock, **policy) -> AdaptiveRateLimiter:
+    return AdaptiveRateLimiter(("https://gw.example", "m"), RateLimitPolicy(**policy), clock)
+
+
+def test_token_bucket_spaces_requests_once_the_burst_is_spent(clock):
+    bucket = limiter(clock, requests_per_minute=60, max_concurrency=100)
+
+    async def run():
+        for _ in range(60):
+            await bucket.acquire()
+            bucket.release("success")
+        assert clock.sleeps == []
+        await bucket.acquire()  # 61st request waits for one token: 1 s at 60 rpm
+        await bucket.acquire()
+
+    asyncio.run(run())
+    assert clock.sleeps == [1.0, 1.0]
+
+
+def test_token_bucket_refills_up_to_its_capacity(clock):
+    bucket = limiter(clock, requests_per_minute=60, max_concurrency=100)
+    bucket.tokens = 0
+    clock.advance(30)
+    assert bucket._next_delay(clock()) == 0.0
+    assert bucket.tokens == pytest.approx(30)
+    clock.advance(3600)
+    bucket._next_delay(clock())
+    assert bucket.tokens == 60
+
+
+def test_throttling_halves_the_window_at_most_once_per_cooldown(clock):
+    aimd = limiter(clock, max_concurrency=16, decrease_cooldown_seconds=1.0)
+    for _ in range(3):
+        aimd.in_flight += 1
+        aimd.release("throttled")
+    assert aimd.window == 8
+
+    clock.advance(1.0)
+    aimd.in_flight += 1
+    aimd.release("throttled")
+    assert aimd.window == 4
+
+    aimd.in_flight += 1
+    aimd.release("success")
+    assert aimd.window == pytest.approx(4.25)
+
+
+def test_window_never_drops_below_the_minimum(clock):
+    aimd = limiter(clock, max_concurrency=4, min_concurrency=2)
+    for _ in range(5):
+        clock.advance(1.0)
+        aimd.in_flight += 1
+        aimd.release("throttled")
+    assert aimd.concurrency_limit == 2
+
+
+def test_retry_after_blocks_new_requests(clock):
+    blocked = limiter(clock)
+
+    async def run():
+        async with blocked.slot() as permit:
+            permit.throttled(retry_after=5)
+        await blocked.acquire()
+
+    asyncio.run(run())
+    assert clock.sleeps == [5.0]
+
+
+def test_full_window_queues_until_a_slot_is_released(clock):
+    single = limiter(clock, max_concurrency=1)
+
+    async def run():
+        await single.acquire()
+        waiter = asyncio.create_task(single.acquire())
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert not waiter.done()
+        assert single.snapshot()["queued"] == 1
+
+        single.release("success")
+        await asyncio.wait_for(waiter, 1)
+        assert single.in_flight == 1
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_leaves_the_queue(clock):
+    single = limiter(clock, max_concurrency=1)
+
+    async def run():
+        await single.acquire()
+        waiter = asyncio.create_task(single.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert single.snapshot()["queued"] == 0
+        single.release("success")
+        assert single.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_woken_waiter_cancelled_before_it_runs_passes_the_slot_on(clock):
+    single = limiter(clock, max_concurrency=1)
+
+    async def run():
+        await single.acquire()
+        woken = asyncio.create_task(single.acquire())
+        next_in_line = asyncio.create_task(single.acquire())
+        await asyncio.sleep(0)
+        single.release("success")  # hands the slot to `woken`...
+        woken.cancel()  # ...which is cancelled before it gets to run
+        with pytest.raises(asyncio.CancelledError):
+            await woken
+        await asyncio.wait_for(next_in_line, 1)
+        assert single.in_flight == 1
+        assert single.snapshot()["queued"] == 0
+
+    asyncio.run(run())
+
+
+def test_released_slot_goes_to_the_oldest_waiter_not_a_newcomer(clock):
+    single = limiter(clock, max_concurrency=1)
+    order = []
+
+    async def take(name):
+        await single.acquire()
+        order.append(name)
+
+    async def run():
+        await single.acquire()
+        waiter = asyncio.create_task(take("waiter"))
+        await asyncio.sleep(0)
+        single.release("success")
+        newcomer = asyncio.create_task(take("newcomer"))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert order == ["waiter"]
+        single.release("success")
+        await asyncio.gather(waiter, newcomer)
+        assert order == ["waiter", "newcomer"]
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    ("status", "headers", "outcome"),
+    [
+        (200, {}, "success"),
+        (429, {}, "throttled"),
+        (503, {"retry-after": "2"}, "throttled"),
+        (503, {}, "error"),
+        (400, {}, "error"),
+    ],
+)
+def test_permit_classifies_responses(status, headers, outcome):
+    permit = RateLimitPermit()
+    permit.observe(httpx.Response(status, headers=headers))
+    assert permit.outcome == outcome
@@ -0,0 +1,94 @@
+import asyncio
+
+import httpx
+import pytest
+from conftest import FakeClock, chat_reply, make_client
+
+from app.services.llm_client import LLMClientError
+from app.services.rate_limiter import RateLimiterRegistry, RateLimitPolicy
+from app.services.retry_budget import RetryBudget, RetryPolicy
+
+
+def budget(clock, **policy) -> RetryBudget:
+    options = {"budget_min_retries": 2, "budget_ratio": 0.5, "budget_window_seconds": 10.0, **policy}
+    return RetryBudget(RetryPolicy(**options), clock)
+
+
+def test_min_retries_are_allowed_without_successes():
+    retries = budget(FakeClock())
+    assert [retries.try_spend() for _ in range(3)] == [True, True, False]
+    assert retries.stats == {"successes": 0, "retries": 2, "exhausted": 1}
+
+
+def test_successes_grow_the_allowance():
+    retries = budget(FakeClock())
+    for _ in range(4):
+        retries.record_success()
+    assert retries.allowance() == 4
+    assert [retries.try_spend() for _ in range(5)] == [True] * 4 + [False]
+
+
+def test_window_slides_out_old_retries_and_successes():
+    clock = FakeClock()
+    retries = budget(clock)
+    for _ in range(2):
+        retries.record_success()
+    assert sum(retries.try_spend() for _ in range(4)) == 3
+    clock.advance(10.5)
+    assert retries.allowance() == 2
+    assert retries.snapshot()["window"] == {"successes": 0, "retries": 0, "allowance": 2, "available": 2}
+    assert retries.try_spend()
+
+
+def test_backoff_is_exponential_capped_and_jittered_downwards():
+    policy = RetryPolicy(backoff_base_seconds=1.0, backoff_max_seconds=3.0, backoff_jitter=0.2)
+    for attempt, ceiling in [(1, 1.0), (2, 2.0), (3, 3.0), (6, 3.0)]:
+        wait = policy.backoff(attempt)
+        assert ceiling * 0.8 <= wait <= ceiling
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay, result=None):
+        return await real_sleep(0, result)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+
+
+def _client(handler, retries: RetryBudget):
+    # A roomy limiter so 503s do not trip an adaptive cooldown that the test would wait out.
+    limiter = RateLimiterRegistry(RateLimitPolicy(requests_per_minute=6000, max_concurrency=10))
+    return make_client(handler, retry_budget=retries, rate_limiter=limiter)
+
+
+def test_client_retries_transient_errors_while_the_budget_allows(no_sleep):
+    statuses = iter([503, 503, 200])
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        status = next(statuses)
+        return httpx.Response(status, json=chat_reply("hi") if status == 200 else {})
+
+    retries = budget(FakeClock(), max_attempts=3)
+    text = asyncio.run(_client(handler, retries).chat([{"role": "user", "content": "x"}], model="m"))
+    assert text == "hi"
+    assert len(calls) == 3
+    assert retries.stats == {"successes": 1, "retries": 2, "exhausted": 0}
+
+
+def test_client_fails_fast_once_the_budget_is_spent(no_sleep):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(503, json={})
+
+    retries = budget(FakeClock(), max_attempts=3, budget_min_retries=0)
+    with pytest.raises(LLMClientError):
+        asyncio.run(_client(handler, retries).chat([{"role": "user", "content": "x"}], model="m"))
+    # One try per endpoint candidate, none of them retried.
+    assert retries.stats["retries"] == 0
+    assert retries.stats["exhausted"] == len(calls)
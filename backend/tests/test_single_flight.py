@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+class Upstream:
+    """Counts calls; every call blocks until `release` is set."""
+
+    def __init__(self, result="done", error=None) -> None:
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.result = result
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_identical_concurrent_calls_share_one_upstream_call():
+    async def run():
+        flight, upstream = SingleFlight(), Upstream()
+        callers = [asyncio.create_task(flight.do("k", upstream, kind="chat")) for _ in range(5)]
+        await settle()
+        upstream.release.set()
+        assert await asyncio.gather(*callers) == ["done"] * 5
+        assert upstream.calls == 1
+        assert flight.snapshot()["kinds"]["chat"] == {"uncoalesced": 1, "coalesced": 4, "coalesced_ratio": 0.8}
+
+    asyncio.run(run())
+
+
+def test_different_keys_and_later_calls_are_not_coalesced():
+    async def run():
+        flight, upstream = SingleFlight(), Upstream()
+        upstream.release.set()
+        await asyncio.gather(flight.do("a", upstream), flight.do("b", upstream))
+        await flight.do("a", upstream)
+        assert upstream.calls == 3
+        assert flight.snapshot()["in_flight"] == 0
+
+    asyncio.run(run())
+
+
+def test_errors_reach_every_caller():
+    async def run():
+        flight, upstream = SingleFlight(), Upstream(error=ValueError("bad gateway"))
+        callers = [asyncio.create_task(flight.do("k", upstream)) for _ in range(3)]
+        await settle()
+        upstream.release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert upstream.calls == 1
+
+    asyncio.run(run())
+
+
+def test_cancelling_one_caller_does_not_cancel_the_shared_call():
+    async def run():
+        flight, upstream = SingleFlight(), Upstream()
+        first = asyncio.create_task(flight.do("k", upstream))
+        second = asyncio.create_task(flight.do("k", upstream))
+        await settle()
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        upstream.release.set()
+        assert await second == "done"
+        assert upstream.calls == 1
+
+    asyncio.run(run())
+
+
+def test_call_finishes_and_is_forgotten_when_every_caller_is_cancelled():
+    async def run():
+        loop = asyncio.get_running_loop()
+        unhandled = []
+        loop.set_exception_handler(lambda _loop, context: unhandled.append(context))
+        flight, upstream = SingleFlight(), Upstream(error=ValueError("late failure"))
+        caller = asyncio.create_task(flight.do("k", upstream))
+        await settle()
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        assert flight.snapshot()["in_flight"] == 1
+
+        upstream.release.set()
+        await settle()
+        assert flight.snapshot()["in_flight"] == 0
+        assert unhandled == []
+
+    asyncio.run(run())
@@ -0,0 +1,52 @@
+import asyncio
+import json
+import threading
+
+from app.services.strategy_memory import StrategyMemory
+
+BASE, MODEL = "https://gw.example", "image"
+DEFAULT = ["chat_completions", "images_generations"]
+
+
+def saved(path) -> dict:
+    return {entry["model"]: entry for entry in json.loads(path.read_text(encoding="utf-8"))["entries"]}
+
+
+def test_success_becomes_the_preferred_strategy_with_periodic_reprobes(tmp_path):
+    memory = StrategyMemory(tmp_path / "strategies.json", reprobe_interval=3)
+    memory.record(BASE, MODEL, "chat_completions", success=False, first_choice=True)
+    memory.record(BASE, MODEL, "images_generations", success=True, first_choice=False)
+    orders = [memory.order(BASE, MODEL, DEFAULT) for _ in range(3)]
+    assert orders[0] == (["images_generations", "chat_completions"], False)
+    assert orders[2] == (DEFAULT, True)
+
+
+def test_preferences_survive_a_restart(tmp_path):
+    path = tmp_path / "strategies.json"
+    StrategyMemory(path).record(BASE, MODEL, "images_generations", success=True, first_choice=False)
+    reloaded = StrategyMemory(path)
+    assert reloaded.order(BASE, MODEL, DEFAULT)[0][0] == "images_generations"
+
+
+def test_flush_on_the_event_loop_writes_from_a_worker_thread(tmp_path):
+    path = tmp_path / "strategies.json"
+    memory = StrategyMemory(path)
+    writers = []
+    write = memory._write
+
+    def recording_write(*args):
+        writers.append(threading.current_thread() is threading.main_thread())
+        write(*args)
+
+    memory._write = recording_write
+
+    async def run():
+        memory.record(BASE, MODEL, "images_generations", success=True, first_choice=False)
+        memory.record(BASE, "other", "images_generations", success=True, first_choice=False)
+        assert not path.exists()  # nothing written on the loop itself
+        await memory._flush_task
+
+    asyncio.run(run())
+    assert writers and not any(writers)
+    assert set(saved(path)) == {MODEL, "other"}
+    assert saved(path)[MODEL]["preferred"] == "images_generations"
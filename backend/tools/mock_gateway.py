@@ -0,0 +1,370 @@
+"""
+Local OpenAI/OpenRouter-compatible mock gateway for load testing.
+
+Implements `/chat/completions` (JSON and SSE streaming),
+`/images/generations` and `/models` (also under `/v1/*`) in the shapes `OpenRouterClient`
+parses, with configurable latency, 429/5xx injection and image size, so
+batch generation, outline generation and export can be benchmarked without
+paying for real gateway calls.
+
+Start it from the backend directory with one command:
+
+    python tools/mock_gateway.py --port 8765
+
+then point the backend at it (`LLM_API_BASE=http://127.0.0.1:8765/v1`, any
+`LLM_API_KEY`). Examples:
+
+    # Long-tail image latency, 5% 429s with retry-after, 2 MB images
+    python tools/mock_gateway.py --image-latency lognormal:20:0.6 \\
+        --rate-429 0.05 --retry-after 2 --image-size-kb 2048
+
+    # A gateway without chat image support (exercises the images endpoint fallback)
+    python tools/mock_gateway.py --no-chat-images
+
+Latency specs: `0.5` (fixed seconds), `uniform:LOW:HIGH`, `normal:MEAN:STD`,
+`lognormal:MEDIAN:SIGMA`, `exp:MEAN`. Counters are served at `GET /stats`.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import io
+import json
+import math
+import random
+import re
+import struct
+import time
+import uuid
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from PIL import Image
+
+Sampler = Callable[[], float]
+
+
+def parse_latency(spec: str) -> Sampler:
+    """Turn a latency spec (see module docstring) into a sampler returning seconds."""
+    kind, _, rest = spec.partition(":")
+    args = [float(part) for part in rest.split(":") if part] if rest else []
+    try:
+        if not rest:
+            fixed = float(kind)
+            return lambda: fixed
+        if kind == "uniform":
+            low, high = args
+            return lambda: random.uniform(low, high)
+        if kind == "normal":
+            mean, std = args
+            return lambda: max(random.gauss(mean, std), 0.0)
+        if kind == "lognormal":
+            median, sigma = args
+            return lambda: random.lognormvariate(math.log(max(median, 1e-6)), sigma)
+        if kind == "exp":
+            (mean,) = args
+            return lambda: random.expovariate(1.0 / mean) if mean > 0 else 0.0
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"invalid latency spec {spec!r}: {exc}") from exc
+    raise argparse.ArgumentTypeError(f"unknown latency distribution {kind!r}")
+
+
+@dataclass
+class MockSettings:
+    chat_latency: Sampler = field(default_factory=lambda: parse_latency("0.3"))
+    image_latency: Sampler = field(default_factory=lambda: parse_latency("2"))
+    token_interval: float = 0.02
+    rate_429: float = 0.0
+    rate_5xx: float = 0.0
+    retry_after: Optional[float] = 1.0
+    image_size_kb: int = 512
+    images_response: str = "b64"  # b64 | url
+    chat_images: bool = True
+    seed: Optional[int] = None
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def make_png(width: int, height: int, size_bytes: int, seed: int) -> bytes:
+    """A valid PNG of the requested dimensions, padded with a private chunk to ~`size_bytes`."""
+    rng = random.Random(seed)
+    color = tuple(rng.randrange(40, 220) for _ in range(3))
+    buffer = io.BytesIO()
+    Image.new("RGB", (max(width, 1), max(height, 1)), color).save(buffer, "PNG")
+    png = buffer.getvalue()
+    padding = size_bytes - len(png) - 12
+    if padding > 0:
+        # Ancillary, private chunk (lowercase first letter): decoders skip it.
+        iend = png.rindex(b"IEND") - 4
+        png = png[:iend] + _png_chunk(b"mcKp", rng.randbytes(padding)) + png[iend:]
+    return png
+
+
+class MockGateway:
+    def __init__(self, settings: MockSettings) -> None:
+        self.settings = settings
+        self.stats: Counter[str] = Counter()
+        self.files: dict[str, bytes] = {}
+        self._images: dict[tuple[int, int], bytes] = {}
+        self.started_at = time.time()
+        if settings.seed is not None:
+            random.seed(settings.seed)
+
+    # ----- helpers -------------------------------------------------------
+
+    def inject_fault(self, route: str) -> Optional[Response]:
+        roll = random.random()
+        headers = {"retry-after": f"{self.settings.retry_after:g}"} if self.settings.retry_after is not None else {}
+        if roll < self.settings.rate_429:
+            self.stats[f"{route}:429"] += 1
+            return JSONResponse({"error": {"message": "Rate limit exceeded (mock)", "code": 429}}, 429, headers)
+        if roll < self.settings.rate_429 + self.settings.rate_5xx:
+            status = random.choice([500, 502, 503])
+            self.stats[f"{route}:{status}"] += 1
+            return JSONResponse(
+                {"error": {"message": "Upstream error (mock)", "code": status}},
+                status,
+                headers if status == 503 else {},
+            )
+        return None
+
+    def image_png(self, width: int, height: int) -> bytes:
+        key = (width, height)
+        if key not in self._images:
+            self._images[key] = make_png(width, height, self.settings.image_size_kb * 1024, seed=width * 7919 + height)
+        return self._images[key]
+
+    def store_file(self, data: bytes) -> str:
+        name = f"{uuid.uuid4().hex}.png"
+        self.files[name] = data
+        if len(self.files) > 256:
+            self.files.pop(next(iter(self.files)))
+        return name
+
+    @staticmethod
+    def usage(prompt: str, completion: str, extra_completion_tokens: int = 0) -> dict[str, int]:
+        prompt_tokens = max(len(prompt) // 4, 1)
+        completion_tokens = max(len(completion) // 4, 1) + extra_completion_tokens
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    @staticmethod
+    def text_reply(messages: list[dict[str, Any]]) -> str:
+        """A plausible reply for the prompts the backend sends (outline, insert slide, style, test)."""
+        text = "\n".join(
+            part if isinstance(part, str) else json.dumps(part, ensure_ascii=False)
+            for part in (message.get("content", "") for message in messages)
+        )
+        page_match = re.search(r"预期页数：(\d+)", text)
+        if page_match:
+            count = max(int(page_match.group(1)), 1)
+            slides = []
+            for idx in range(1, count + 1):
+                slide_type = "cover" if idx == 1 else "ending" if idx == count and count > 1 else "content"
+                slides.append({
+                    "page_num": idx,
+                    "type": slide_type,
+                    "title": f"模拟页面 {idx}",
+                    "content_text": f"第 {idx} 页的要点一\n第 {idx} 页的要点二\n第 {idx} 页的要点三",
+                    "visual_desc": f"浅色背景上居中的标题，下方三栏图标卡片依次排列，第 {idx} 页配图为简洁的扁平插画",
+                })
+            return json.dumps(slides, ensure_ascii=False)
+        if "仅输出一个 JSON 对象" in text:
+            return json.dumps({
+                "type": "content",
+                "title": "模拟插入页",
+                "content_text": "承接上一页的要点\n引出下一页的内容",
+                "visual_desc": "左侧为大号标题，右侧为流程箭头串联的三个圆形节点",
+            }, ensure_ascii=False)
+        return (
+            "整体风格：简洁的扁平化商务风，浅灰白背景，主色为深蓝色，点缀橙色高亮。"
+            "标题使用无衬线粗体，正文左对齐，留白充足，配图为等距插画与线性图标。"
+        )
+
+    # ----- routes --------------------------------------------------------
+
+    async def chat_completions(self, request: Request) -> Response:
+        body = await request.json()
+        route = "chat"
+        self.stats[f"{route}:requests"] += 1
+        fault = self.inject_fault(route)
+        if fault is not None:
+            return fault
+
+        messages = body.get("messages") or []
+        prompt = json.dumps(messages, ensure_ascii=False)
+        model = body.get("model", "mock-model")
+
+        if body.get("modalities"):
+            route = "chat_image"
+            self.stats[f"{route}:requests"] += 1
+            await asyncio.sleep(self.settings.image_latency())
+            if not self.settings.chat_images:
+                self.stats[f"{route}:400"] += 1
+                return JSONResponse({"error": {"message": "This model does not support image output (mock)"}}, 400)
+            data_url = "data:image/png;base64," + base64.b64encode(self.image_png(1280, 720)).decode()
+            self.stats[f"{route}:200"] += 1
+            return JSONResponse({
+                "id": f"gen-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {
+                        "role": "assistant",
+                        "content": "",
+                        "images": [{"type": "image_url", "image_url": {"url": data_url}}],
+                    },
+                }],
+                "usage": self.usage(prompt, "", extra_completion_tokens=1290),
+            })
+
+        reply = self.text_reply(messages)
+        if body.get("stream"):
+            self.stats[f"{route}:stream"] += 1
+            return StreamingResponse(self._stream(model, prompt, reply), media_type="text/event-stream")
+
+        await asyncio.sleep(self.settings.chat_latency())
+        self.stats[f"{route}:200"] += 1
+        return JSONResponse({
+            "id": f"gen-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": reply}}],
+            "usage": self.usage(prompt, reply),
+        })
+
+    async def _stream(self, model: str, prompt: str, reply: str) -> AsyncIterator[str]:
+        # Time to first token follows the chat latency distribution.
+        yield ": MOCK PROCESSING\n\n"
+        await asyncio.sleep(self.settings.chat_latency())
+        chunk_id = f"gen-{uuid.uuid4().hex[:12]}"
+        for start in range(0, len(reply), 8):
+            chunk = {
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": reply[start:start + 8]}}],
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            await asyncio.sleep(self.settings.token_interval)
+        final = {
+            "id": chunk_id,
+            "object": "chat.completion.chunk",
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "usage": self.usage(prompt, reply),
+        }
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+        self.stats["chat:200"] += 1
+
+    async def images_generations(self, request: Request) -> Response:
+        body = await request.json()
+        route = "images"
+        self.stats[f"{route}:requests"] += 1
+        fault = self.inject_fault(route)
+        if fault is not None:
+            return fault
+
+        width, height = 1280, 720
+        size_match = re.fullmatch(r"(\d+)x(\d+)", str(body.get("size", "")))
+        if size_match:
+            width, height = int(size_match.group(1)), int(size_match.group(2))
+
+        await asyncio.sleep(self.settings.image_latency())
+        png = self.image_png(width, height)
+        if self.settings.images_response == "url":
+            item = {"url": str(request.base_url).rstrip("/") + f"/files/{self.store_file(png)}"}
+        else:
+            item = {"b64_json": base64.b64encode(png).decode()}
+        self.stats[f"{route}:200"] += 1
+        return JSONResponse({
+            "created": int(time.time()),
+            "data": [item],
+            "usage": self.usage(str(body.get("prompt", "")), "", extra_completion_tokens=1290),
+        })
+
+    async def list_models(self) -> dict[str, Any]:
+        self.stats["models:200"] += 1
+        return {"object": "list", "data": [{"id": "mock-chat", "object": "model"}, {"id": "mock-image", "object": "model"}]}
+
+    async def get_file(self, name: str) -> Response:
+        data = self.files.get(name)
+        if data is None:
+            return JSONResponse({"error": {"message": "not found"}}, 404)
+        return Response(data, media_type="image/png")
+
+    async def get_stats(self) -> dict[str, Any]:
+        return {"uptime_seconds": round(time.time() - self.started_at, 1), "counters": dict(sorted(self.stats.items()))}
+
+
+def create_app(settings: Optional[MockSettings] = None) -> FastAPI:
+    gateway = MockGateway(settings or MockSettings())
+    app = FastAPI(title="AI-PPT mock gateway")
+    for prefix in ("", "/v1", "/api/v1"):
+        app.add_api_route(f"{prefix}/chat/completions", gateway.chat_completions, methods=["POST"])
+        app.add_api_route(f"{prefix}/images/generations", gateway.images_generations, methods=["POST"])
+        app.add_api_route(f"{prefix}/models", gateway.list_models, methods=["GET"])
+    app.add_api_route("/files/{name}", gateway.get_file, methods=["GET"])
+    app.add_api_route("/stats", gateway.get_stats, methods=["GET"])
+    app.state.gateway = gateway
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0],
+        epilog="Latency specs: 0.5 | uniform:LOW:HIGH | normal:MEAN:STD | lognormal:MEDIAN:SIGMA | exp:MEAN",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--chat-latency", type=parse_latency, default="0.3",
+                        help="latency of text completions / time to first token (default: 0.3)")
+    parser.add_argument("--image-latency", type=parse_latency, default="lognormal:3:0.5",
+                        help="latency of image generation (default: lognormal:3:0.5)")
+    parser.add_argument("--token-interval", type=float, default=0.02, help="seconds between SSE chunks")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="fraction of requests answered with 500/502/503")
+    parser.add_argument("--retry-after", type=float, default=1.0,
+                        help="retry-after seconds on 429/503; negative disables the header")
+    parser.add_argument("--image-size-kb", type=int, default=512, help="approximate size of generated images")
+    parser.add_argument("--images-response", choices=["b64", "url"], default="b64",
+                        help="how /images/generations returns images")
+    parser.add_argument("--no-chat-images", action="store_true",
+                        help="reject image requests on /chat/completions (images endpoint only)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible latency and faults")
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        chat_latency=args.chat_latency,
+        image_latency=args.image_latency,
+        token_interval=args.token_interval,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        retry_after=args.retry_after if args.retry_after >= 0 else None,
+        image_size_kb=args.image_size_kb,
+        images_response=args.images_response,
+        chat_images=not args.no_chat_images,
+        seed=args.seed,
+    )
+    print(f"Mock gateway on http://{args.host}:{args.port}/v1 (set LLM_API_BASE to this URL)")
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
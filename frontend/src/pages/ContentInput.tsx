@@ -28,6 +28,7 @@ export default function ContentInput() {
   const [isGenerating, setIsGenerating] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [streamMessages, setStreamMessages] = useState<StreamMessage[]>([]);
+  const [streamedText, setStreamedText] = useState('');
   const [generatedSlides, setGeneratedSlides] = useState<SlideData[]>([]);
   const [revisionNotes, setRevisionNotes] = useState('');
 
@@ -72,11 +73,16 @@ export default function ContentInput() {
     setIsGenerating(true);
     setError(null);
     setStreamMessages([]);
+    setStreamedText('');
     const tempSlides: SlideData[] = [];
     setGeneratedSlides([]);
     
     try {
       await generateOutlineStream(promptInput, pageCount, currentTemplate?.id, (message) => {
+        if (message.type === 'token') {
+          setStreamedText(prev => prev + (message.content ?? ''));
+          return;
+        }
         setStreamMessages(prev => [...prev, message]);
         
         if (message.type === 'slide' && message.slide) {
@@ -347,6 +353,12 @@ export default function ContentInput() {
                   {streamMessages.map((message, index) => renderMessage(message, index))}
                 </div>
               )}
+
+              {isGenerating && streamedText && (
+                <pre className="mt-2 max-h-48 overflow-y-auto whitespace-pre-wrap break-all rounded-lg border border-gray-200 bg-gray-50 p-3 text-xs text-gray-600">
+                  {streamedText}
+                </pre>
+              )}
             </div>
 
             <div>
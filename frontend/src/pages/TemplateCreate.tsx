@@ -119,12 +119,13 @@ export default function TemplateCreate() {
 
     try {
       await analyzeTemplateStream(files, (message) => {
-        setStreamMessages((prev) => [...prev, message]);
-
-        if (message.type === 'chunk' && message.content) {
-          setPrompt((prev) => prev + message.content + '\n');
+        if (message.type === 'chunk') {
+          setPrompt((prev) => prev + (message.content ?? ''));
+          return;
         }
 
+        setStreamMessages((prev) => [...prev, message]);
+
         if (message.type === 'complete' && message.style_prompt) {
           setPrompt(message.style_prompt);
         }
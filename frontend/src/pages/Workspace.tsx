@@ -6,9 +6,10 @@ import { SlideCanvas } from '../components/workspace/SlideCanvas';
 import { Button } from '../components/ui/Button';
 import { Card } from '../components/ui/Card';
 import { AspectRatioSelector } from '../components/ui/AspectRatioSelector';
-import { generateSlide, exportPptx, batchGenerateSlides, generateInsertedSlide } from '../services/api';
+import { generateSlide, exportPptx, batchGenerateSlides, getBatchStatus, generateInsertedSlide, subscribeBatchEvents } from '../services/api';
 import type { SlideStatus, CustomDimensions } from '../services/types';
 import { useProjectStore } from '../store/useProjectStore';
+import { generateId } from '../utils/uuid';
 
 export default function Workspace() {
   const MAX_CONCURRENT_REGENERATIONS = 3;
@@ -140,6 +141,19 @@ export default function Workspace() {
     setBatchProgress('准备批量生成...');
     setError(null);
 
+    // 先订阅进度推送再提交任务，每完成一张立即显示
+    const batchId = generateId();
+    const unsubscribe = subscribeBatchEvents(batchId, (message) => {
+      if (message.type === 'slide') {
+        updateSlide(message.item.slide_id, {
+          image_url: message.item.image_url,
+          status: message.item.status as SlideStatus,
+          final_prompt: message.item.final_prompt
+        });
+        setBatchProgress(`正在批量生成图片... ${message.completed_slides}/${message.total_slides}`);
+      }
+    });
+
     try {
       // 将所有幻灯片状态设置为生成中
       slides.forEach(slide => {
@@ -153,7 +167,7 @@ export default function Workspace() {
         ? customDimensions.aspectRatio 
         : selectedAspectRatio;
         
-      const result = await batchGenerateSlides({
+      const submitted = await batchGenerateSlides({
         slides: slides.map(slide => ({
           id: slide.id,
           page_num: slide.page_num,
@@ -164,10 +178,18 @@ export default function Workspace() {
         })),
         style_prompt: currentTemplate.style_prompt,
         max_workers: slides.length,
-        aspect_ratio: aspectRatioToUse
+        aspect_ratio: aspectRatioToUse,
+        batch_id: batchId
       });
 
-      setBatchProgress(`批量生成完成！成功: ${result.successful}/${result.total_slides}`);
+      // 长轮询等待任务结束，期间各张幻灯片由进度推送实时更新
+      let result = await getBatchStatus({ batch_id: submitted.batch_id, wait: 60 });
+      while (result.status === 'running') {
+        result = await getBatchStatus({ batch_id: submitted.batch_id, wait: 60 });
+      }
+
+      const elapsed = result.total_time !== null ? `，耗时 ${result.total_time.toFixed(1)} 秒` : '';
+      setBatchProgress(`批量生成完成！成功: ${result.successful}/${result.total_slides}${elapsed}`);
 
       // 更新幻灯片状态和图片URL
       result.results.forEach(slideResult => {
@@ -202,6 +224,7 @@ export default function Workspace() {
         updateSlide(slide.id, { status: 'pending' });
       });
     } finally {
+      unsubscribe();
       setBatchGenerating(false);
       // 进度提示的隐藏逻辑已在上面处理（图片生成完毕后3秒）
     }
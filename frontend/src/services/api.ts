@@ -66,6 +66,7 @@ export async function analyzeTemplateStream(
 
   const reader = res.body?.getReader();
   const decoder = new TextDecoder();
+  let buffer = '';
 
   if (!reader) {
     throw new Error('Response body is not readable');
@@ -79,8 +80,10 @@ export async function analyzeTemplateStream(
         break;
       }
 
-      const chunk = decoder.decode(value, { stream: true });
-      const lines = chunk.split('\n');
+      // SSE 事件可能被拆分到多个读取块中，保留末尾不完整的行
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split('\n');
+      buffer = lines.pop() ?? '';
 
       for (const line of lines) {
         if (line.startsWith('data: ')) {
@@ -147,8 +150,9 @@ export async function generateInsertedSlide(payload: {
 }
 
 export interface StreamMessage {
-  type: 'start' | 'progress' | 'slide' | 'complete' | 'error';
+  type: 'start' | 'progress' | 'token' | 'slide' | 'complete' | 'error';
   message?: string;
+  content?: string;
   slide_count?: number;
   slide?: {
     page_num: number;
@@ -181,6 +185,7 @@ export async function generateOutlineStream(
 
   const reader = res.body?.getReader();
   const decoder = new TextDecoder();
+  let buffer = '';
 
   if (!reader) {
     throw new Error('Response body is not readable');
@@ -194,8 +199,10 @@ export async function generateOutlineStream(
         break;
       }
 
-      const chunk = decoder.decode(value, { stream: true });
-      const lines = chunk.split('\n');
+      // SSE 事件可能被拆分到多个读取块中，保留末尾不完整的行
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split('\n');
+      buffer = lines.pop() ?? '';
 
       for (const line of lines) {
         if (line.startsWith('data: ')) {
@@ -253,14 +260,17 @@ export interface BatchGenerateRequest {
   style_prompt: string;
   max_workers?: number;
   aspect_ratio?: string;
+  batch_id?: string;
 }
 
 export interface BatchGenerateResult {
   batch_id: string;
+  status: string;
   total_slides: number;
+  completed_slides: number;
   successful: number;
   failed: number;
-  total_time: number;
+  total_time: number | null;
   results: Array<{
     slide_id: string;
     page_num: number;
@@ -273,6 +283,7 @@ export interface BatchGenerateResult {
   }>;
 }
 
+// 提交批量任务，后端立即返回（202）；结果通过 subscribeBatchEvents / getBatchStatus 获取
 export async function batchGenerateSlides(request: BatchGenerateRequest): Promise<BatchGenerateResult> {
   const res = await fetch(`${API_BASE}/slide/batch/generate`, {
     method: 'POST',
@@ -288,6 +299,7 @@ export async function batchGenerateSlides(request: BatchGenerateRequest): Promis
 
 export interface BatchStatusRequest {
   batch_id: string;
+  wait?: number; // 长轮询：任务仍在运行时最多等待的秒数
 }
 
 export interface BatchStatusResult {
@@ -299,6 +311,7 @@ export interface BatchStatusResult {
   successful: number;
   failed: number;
   estimated_remaining_time: number | null;
+  total_time: number | null;
   results: BatchGenerateResult['results'];
 }
 
@@ -311,6 +324,41 @@ export async function getBatchStatus(request: BatchStatusRequest): Promise<Batch
   return handleResponse<BatchStatusResult>(res);
 }
 
+export interface BatchProgress {
+  batch_id: string;
+  status: string;
+  total_slides: number;
+  completed_slides: number;
+  successful: number;
+  failed: number;
+  progress: number;
+}
+
+export type BatchStreamMessage =
+  | ({ type: 'snapshot' } & BatchProgress)
+  | ({ type: 'slide'; item: BatchGenerateResult['results'][number] } & BatchProgress)
+  | ({ type: 'complete'; total_time: number } & BatchProgress);
+
+// 订阅批量任务进度推送，返回取消订阅函数；断线时浏览器携带 Last-Event-ID 自动重连
+export function subscribeBatchEvents(
+  batchId: string,
+  onMessage: (message: BatchStreamMessage) => void
+): () => void {
+  const source = new EventSource(`${API_BASE}/slide/batch/${batchId}/events`);
+  source.onmessage = (event) => {
+    try {
+      const message = JSON.parse(event.data) as BatchStreamMessage;
+      if (message.type === 'complete') {
+        source.close();
+      }
+      onMessage(message);
+    } catch (e) {
+      console.error('Error parsing batch event:', e, 'Original data:', event.data);
+    }
+  };
+  return () => source.close();
+}
+
 export async function fetchProjects(): Promise<ProjectListItem[]> {
   const res = await fetch(`${API_BASE}/projects`);
   return handleResponse<ProjectListItem[]>(res);
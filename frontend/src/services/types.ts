@@ -93,10 +93,12 @@ export interface ProjectListItem {
 
 export interface BatchGenerateResult {
   batch_id: string;
+  status: string;
   total_slides: number;
+  completed_slides: number;
   successful: number;
   failed: number;
-  total_time: number;
+  total_time: number | null;
   results: Array<{
     slide_id: string;
     page_num: number;